@@ -9,12 +9,17 @@ from typing import Optional, Dict, Any, List
 import httpx
 from tenacity import (
     retry,
+    stop_any,
     stop_after_attempt,
     wait_exponential,
-    retry_if_exception_type
+    retry_if_exception
 )
 from pydantic import BaseModel
 
+# Utilitários compartilhados: execute com a raiz do repositório no PYTHONPATH
+from src.utils.deadline import cap_timeout, remaining_time
+from src.utils.retry import Hedger
+
 
 class APIError(Exception):
     """Erro customizado para problemas de API."""
@@ -42,6 +47,24 @@ class Deal(BaseModel):
     expected_close_date: Optional[str] = None
 
 
+# Backoff entre tentativas (depende só do número da tentativa)
+_BACKOFF = wait_exponential(multiplier=1, min=1, max=10)
+
+# Tempo mínimo para uma nova tentativa valer a pena depois do backoff
+MIN_ATTEMPT_TIME = 0.5
+
+
+def _retry_would_miss_deadline(retry_state) -> bool:
+    """Para os retries quando o backoff mais uma tentativa não cabem no deadline."""
+    remaining = remaining_time()
+    return remaining is not None and _BACKOFF(retry_state) + MIN_ATTEMPT_TIME > remaining
+
+
+def _is_transient(error: BaseException) -> bool:
+    """Timeouts e erros de rede (encapsulados em APIError) podem ser repetidos."""
+    return isinstance(error.__cause__, (httpx.TimeoutException, httpx.NetworkError))
+
+
 class CRMAPIClient:
     """Cliente para integração com CRM API."""
     
@@ -76,6 +99,9 @@ class CRMAPIClient:
         self._cache: Dict[str, tuple[Any, float]] = {}
         self.cache_ttl = int(os.getenv("CACHE_TTL", "300"))
         self.enable_cache = os.getenv("ENABLE_CACHE", "True").lower() == "true"
+        
+        # Hedge em leituras idempotentes lentas (acima do p95 recente)
+        self.hedger = Hedger(percentile=95.0, max_hedge_rate=0.05)
     
     def _get_from_cache(self, key: str) -> Optional[Any]:
         """Obtém valor do cache se ainda válido."""
@@ -96,36 +122,60 @@ class CRMAPIClient:
             self._cache[key] = (value, time.time())
     
     @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=1, max=10),
-        retry=retry_if_exception_type((httpx.TimeoutException, httpx.NetworkError))
+        stop=stop_any(stop_after_attempt(3), _retry_would_miss_deadline),
+        wait=_BACKOFF,
+        retry=retry_if_exception(_is_transient),
+        reraise=True
     )
     def _request(
         self,
         method: str,
         endpoint: str,
         data: Optional[Dict] = None,
-        params: Optional[Dict] = None
+        params: Optional[Dict] = None,
+        hedge_key: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Faz requisição HTTP com retry logic.
         
+        Dentro de um ``deadline`` (src.utils.deadline), o timeout HTTP é
+        reduzido ao tempo restante e só são feitos retries cujo backoff,
+        mais ``MIN_ATTEMPT_TIME``, cabe no tempo que resta.
+        
+        Com ``hedge_key`` (só leituras idempotentes), cada tentativa passa
+        pelo hedger; o p95 dele mede uma tentativa, sem os backoffs.
+        
         Args:
             method: Método HTTP (GET, POST, etc)
             endpoint: Endpoint da API
             data: Dados do body (JSON)
             params: Query parameters
+            hedge_key: Chave de latência do hedger (None = sem hedge)
         
         Returns:
             Response JSON
         
         Raises:
             APIError: Se a requisição falhar após retries
+            DeadlineExceeded: Se o deadline da requisição já passou
         """
+        if hedge_key is None:
+            return self._send(method, endpoint, data, params)
+        return self.hedger.call(hedge_key, self._send, method, endpoint, data, params)
+    
+    def _send(
+        self,
+        method: str,
+        endpoint: str,
+        data: Optional[Dict] = None,
+        params: Optional[Dict] = None
+    ) -> Dict[str, Any]:
+        """Faz uma tentativa da requisição HTTP (sem retry)."""
         url = f"{self.base_url}{endpoint}"
+        timeout = cap_timeout(self.timeout)
         
         try:
-            with httpx.Client(timeout=self.timeout) as client:
+            with httpx.Client(timeout=timeout) as client:
                 response = client.request(
                     method=method,
                     url=url,
@@ -143,9 +193,9 @@ class CRMAPIClient:
                 return response.json()
         
         except httpx.TimeoutException as e:
-            raise APIError(f"Request timeout: {e}")
+            raise APIError(f"Request timeout: {e}") from e
         except httpx.NetworkError as e:
-            raise APIError(f"Network error: {e}")
+            raise APIError(f"Network error: {e}") from e
         except Exception as e:
             raise APIError(f"Unexpected error: {e}")
     
@@ -166,7 +216,9 @@ class CRMAPIClient:
             return Customer(**cached)
         
         try:
-            data = self._request("GET", f"/customers/{customer_id}")
+            data = self._request(
+                "GET", f"/customers/{customer_id}", hedge_key="crm:get_customer"
+            )
             customer = Customer(**data)
             self._set_cache(cache_key, data)
             return customer
@@ -198,7 +250,9 @@ class CRMAPIClient:
             params["email"] = email
         
         try:
-            data = self._request("GET", "/customers", params=params)
+            data = self._request(
+                "GET", "/customers", params=params, hedge_key="crm:search_customers"
+            )
             return [Customer(**item) for item in data.get("customers", [])]
         except APIError as e:
             print(f"⚠️  Erro ao buscar clientes: {e}")
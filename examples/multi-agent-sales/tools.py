@@ -14,6 +14,9 @@ from crewai_tools import tool
 from typing import Dict, List, Any
 from datetime import datetime
 
+# Utilitários compartilhados: execute com a raiz do repositório no PYTHONPATH
+from src.utils import cached
+
 
 # ==================== Sales Tools ====================
 
@@ -214,6 +217,7 @@ def check_error_logs(customer_id: str, last_hours: int = 24) -> str:
 # ==================== Product Tools ====================
 
 @tool("Comparar Planos")
+@cached(ttl=3600)  # Saída estática: evita recalcular e re-serializar
 def compare_plans(plan_a: str, plan_b: str) -> str:
     """
     Compara dois planos de produtos.
@@ -290,6 +294,7 @@ def compare_plans(plan_a: str, plan_b: str) -> str:
 
 
 @tool("Obter Roadmap")
+@cached(ttl=3600)
 def get_product_roadmap(product: str) -> str:
     """
     Obtém roadmap de features futuras.
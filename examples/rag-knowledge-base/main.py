@@ -14,6 +14,8 @@ from agno.models.openai import OpenAIChat
 from agno.db.sqlite import SqliteDb
 from agno.tools.toolkit import Toolkit
 
+from src.utils.formatters import pack_to_token_budget
+
 from vector_store import VectorStore
 from knowledge_loader import KnowledgeLoader
 
@@ -24,10 +26,18 @@ load_dotenv()
 class KnowledgeToolkit(Toolkit):
     """Toolkit para busca na base de conhecimento."""
     
-    def __init__(self, vector_store: VectorStore, top_k: int = 3):
+    def __init__(
+        self,
+        vector_store: VectorStore,
+        top_k: int = 3,
+        max_context_tokens: int = 1500,
+        model: str = None
+    ):
         super().__init__(name="knowledge_toolkit")
         self.vector_store = vector_store
         self.top_k = top_k
+        self.max_context_tokens = max_context_tokens
+        self.model = model
         
         # Registrar funções
         self.register(self.search_knowledge)
@@ -47,14 +57,22 @@ class KnowledgeToolkit(Toolkit):
         if not results:
             return "Não encontrei informações relevantes sobre isso na base de conhecimento."
         
-        # Formatar resultados
-        formatted = "📚 Informações encontradas na base de conhecimento:\n\n"
-        for i, result in enumerate(results, 1):
-            formatted += f"--- Documento {i} ---\n"
-            formatted += f"Fonte: {result['metadata'].get('filename', 'unknown')}\n"
-            formatted += f"Conteúdo:\n{result['document']}\n\n"
+        # Formatar resultados (em ordem de relevância)
+        sections = [
+            f"--- Documento {i} ---\n"
+            f"Fonte: {result['metadata'].get('filename', 'unknown')}\n"
+            f"Conteúdo:\n{result['document']}"
+            for i, result in enumerate(results, 1)
+        ]
+        
+        # Caber no orçamento de tokens: os menos relevantes são cortados primeiro
+        sections = pack_to_token_budget(
+            sections,
+            self.max_context_tokens,
+            model=self.model
+        )
         
-        return formatted
+        return "📚 Informações encontradas na base de conhecimento:\n\n" + "\n\n".join(sections) + "\n\n"
 
 
 def initialize_knowledge_base() -> VectorStore:
@@ -121,7 +139,12 @@ def create_agent(vector_store: VectorStore) -> Agent:
     
     # Criar toolkit de conhecimento
     top_k = int(os.getenv("TOP_K_RESULTS", "3"))
-    knowledge_toolkit = KnowledgeToolkit(vector_store, top_k=top_k)
+    knowledge_toolkit = KnowledgeToolkit(
+        vector_store,
+        top_k=top_k,
+        max_context_tokens=int(os.getenv("MAX_CONTEXT_TOKENS", "1500")),
+        model=os.getenv("OPENAI_MODEL", "gpt-4-turbo")
+    )
     
     # Instruções do agente (lista de strings - padrão AGNO)
     instructions = [
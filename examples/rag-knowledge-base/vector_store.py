@@ -9,6 +9,10 @@ import chromadb
 from chromadb.config import Settings
 from sentence_transformers import SentenceTransformer
 
+# Utilitários compartilhados: execute com a raiz do repositório no PYTHONPATH
+from src.utils.deadline import check_deadline
+from src.utils.retry import Hedger
+
 
 class VectorStore:
     """Gerencia embeddings e busca vetorial com ChromaDB."""
@@ -44,6 +48,9 @@ class VectorStore:
             name=collection_name,
             metadata={"description": "Knowledge base for RAG"}
         )
+        
+        # Hedge em consultas lentas (a busca é idempotente)
+        self.hedger = Hedger(percentile=95.0, max_hedge_rate=0.05)
     
     def add_documents(
         self,
@@ -93,12 +100,20 @@ class VectorStore:
         
         Returns:
             Lista de dicionários com 'document', 'metadata' e 'distance'
+        
+        Raises:
+            DeadlineExceeded: Se o deadline da requisição acabou antes da busca
         """
+        check_deadline()
+        
         # Gerar embedding da query
         query_embedding = self.embedding_model.encode([query]).tolist()
         
-        # Buscar na coleção
-        results = self.collection.query(
+        # Buscar na coleção (o embedding pode ter consumido o orçamento)
+        check_deadline()
+        results = self.hedger.call(
+            "vector:search",
+            self.collection.query,
             query_embeddings=query_embedding,
             n_results=top_k,
             where=where
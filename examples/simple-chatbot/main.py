@@ -7,11 +7,15 @@ Atualizado em: 2025-11-20
 
 import os
 import sys
+import time
 from dotenv import load_dotenv
 from agno.agent import Agent
 from agno.models.openai import OpenAIChat
 from agno.db.sqlite import SqliteDb
 
+# Utilitários compartilhados: execute com a raiz do repositório no PYTHONPATH
+from src.utils.validators import StreamingSensitiveScanner
+
 # Carregar variáveis de ambiente
 load_dotenv()
 
@@ -25,6 +29,38 @@ def print_welcome():
     print("Para sair, digite 'sair' ou 'quit'.\n")
 
 
+def stream_response(agent: Agent, message: str, session_id: str) -> float:
+    """
+    Imprime a resposta conforme os pedaços chegam, com guardrail incremental.
+
+    Args:
+        agent: Agente AGNO
+        message: Mensagem do usuário
+        session_id: ID da sessão
+
+    Returns:
+        Time-to-first-token em segundos (0 se não houve texto)
+    """
+    start = time.perf_counter()
+    ttft = 0.0
+    scanner = StreamingSensitiveScanner()
+
+    for event in agent.run(message, session_id=session_id, stream=True):
+        text = getattr(event, "content", None)
+        if not isinstance(text, str) or not text:
+            continue
+        if not ttft:
+            ttft = time.perf_counter() - start
+
+        print(scanner.feed(text), end="", flush=True)
+        if scanner.detected:
+            print("\n⚠️  Resposta interrompida: continha informação sensível.", end="")
+            break
+
+    print(scanner.flush(), end="", flush=True)
+    return ttft
+
+
 def main():
     """Função principal."""
     # Verificar API key
@@ -103,10 +139,10 @@ def main():
             # Processar com agente AGNO
             print("🤖 Agente: ", end="", flush=True)
             
-            # Usar run() com session_id para manter contexto
-            response = agent.run(user_input, session_id=session_id, stream=True)
-            
-            print("\n")  # Nova linha após resposta
+            # Usar run() com session_id para manter contexto (streaming)
+            ttft = stream_response(agent, user_input, session_id)
+
+            print(f"\n   ⏱️  primeiro token em {ttft * 1000:.0f}ms\n")
 
         except KeyboardInterrupt:
             print("\n\n👋 Interrompido pelo usuário. Até logo!")
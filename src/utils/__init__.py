@@ -2,17 +2,42 @@
 Utilidades compartilhadas do framework.
 """
 
-from .validators import validate_email, validate_phone, sanitize_input
-from .formatters import format_currency, format_phone
+from .validators import (
+    validate_email,
+    validate_phone,
+    sanitize_input,
+    validate_emails,
+    validate_phones,
+    validate_contacts,
+)
+from .formatters import format_currency, format_phone, format_phones
 from .retry import retry_with_backoff
-from .cache import SimpleCache
+from .cache import SimpleCache, cached
+from .tiered_cache import TieredCache, SQLiteCacheBackend
+from .deadline import deadline, DeadlineExceeded
+from .rate_limit import RateLimiter, get_rate_limiter
+from .response_cache import ResponseCache
+from .token_ledger import TokenLedger
 
 __all__ = [
     'validate_email',
     'validate_phone',
     'sanitize_input',
+    'validate_emails',
+    'validate_phones',
+    'validate_contacts',
     'format_currency',
     'format_phone',
+    'format_phones',
     'retry_with_backoff',
     'SimpleCache',
+    'cached',
+    'TieredCache',
+    'SQLiteCacheBackend',
+    'deadline',
+    'DeadlineExceeded',
+    'RateLimiter',
+    'get_rate_limiter',
+    'ResponseCache',
+    'TokenLedger',
 ]
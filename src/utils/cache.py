@@ -2,30 +2,217 @@
 Utilitários de cache simples.
 """
 
+import asyncio
+import atexit
+import datetime
+import decimal
+import enum
+import hashlib
+import heapq
+import inspect
+import json
+import logging
+import os
+import sys
+import threading
 import time
-from typing import Any, Optional, Dict
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Iterable, Optional, Dict, List, Set, Tuple, Union
 from dataclasses import dataclass
+from functools import wraps
 
+from .cache_snapshot import SnapshotReader, SnapshotRecord, write_snapshot
 
-@dataclass
+
+logger = logging.getLogger(__name__)
+
+
+# Overhead aproximado de cada entrada: CacheEntry, nó do OrderedDict e item
+# do heap de expiração (ver tests/performance/test_cache_benchmarks.py)
+ENTRY_OVERHEAD_BYTES = 250
+
+
+# Relógio monotônico: imune a ajustes de NTP no relógio de parede
+_clock = time.monotonic
+
+# Marcador de cache negativo ("não encontrado")
+_NEGATIVE = object()
+
+# Delimitadores que definem os segmentos indexados por prefixo
+PREFIX_DELIMITERS = "_:/."
+
+
+@dataclass(slots=True)
 class CacheEntry:
-    """Entrada de cache com TTL."""
+    """
+    Entrada de cache com TTL (instantes no relógio monotônico).
+
+    ``stale_at`` marca o fim do TTL soft: depois dele o valor ainda é
+    servido, mas ``get_or_compute`` dispara um refresh em background.
+
+    Usa ``__slots__``: sem ``__dict__`` por instância, o que importa com
+    milhões de entradas pequenas.
+    """
     value: Any
     expires_at: float
+    size: int = 0
+    stale_at: Optional[float] = None
+    tags: Optional[Tuple[str, ...]] = None
+
+
+def estimate_size(value: Any, _depth: int = 0) -> int:
+    """
+    Estima o tamanho aproximado de um valor em bytes.
+
+    Percorre containers até dois níveis de profundidade; objetos mais
+    profundos contam apenas pelo tamanho raso. A estimativa é barata
+    e suficiente para aplicar limites de memória do cache.
+
+    Args:
+        value: Valor a medir
+
+    Returns:
+        Tamanho estimado em bytes
+    """
+    size = sys.getsizeof(value)
+
+    if _depth >= 2:
+        return size
+
+    if isinstance(value, dict):
+        for k, v in value.items():
+            size += estimate_size(k, _depth + 1) + estimate_size(v, _depth + 1)
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        for item in value:
+            size += estimate_size(item, _depth + 1)
+
+    return size
+
+
+def _key_prefixes(key: str) -> List[str]:
+    """
+    Retorna os prefixos da chave que terminam num delimitador.
+
+    Ex.: "customer_42:orders" -> ["customer_", "customer_42:"]
+    """
+    return [key[:i + 1] for i, char in enumerate(key[:-1]) if char in PREFIX_DELIMITERS]
+
+
+def _unwrap(value: Any) -> Any:
+    """Converte o marcador de cache negativo em None."""
+    return None if value is _NEGATIVE else value
 
 
 class SimpleCache:
-    """Cache simples em memória com TTL."""
+    """
+    Cache simples em memória com TTL e eviction LRU.
+
+    Quando ``max_entries`` ou ``max_bytes`` são definidos, cada ``set``
+    remove as entradas menos recentemente usadas até o cache voltar ao
+    limite, em O(1) por entrada removida.
 
-    def __init__(self, default_ttl: int = 300):
+    Expirações ficam num min-heap ordenado por ``expires_at``, então
+    ``cleanup_expired`` só visita as entradas vencidas. Um reaper em
+    background opcional (``start_reaper``) faz a limpeza periodicamente.
+
+    É thread-safe. ``get_or_compute``/``aget_or_compute`` garantem que
+    apenas um chamador por chave executa o loader (single-flight); os
+    demais aguardam o mesmo resultado. A coordenação dos loaders usa
+    locks listrados por hash da chave, então loaders de chaves diferentes
+    não disputam o mesmo lock.
+
+    Stale-while-revalidate: com ``soft_ttl`` menor que o TTL, entradas na
+    janela soft são servidas imediatamente enquanto um refresh roda em
+    background. Com ``negative_ttl``, loaders que retornam None têm o
+    "não encontrado" cacheado por esse TTL curto.
+
+    Invalidação em massa: ``set(..., tags=[...])`` alimenta um índice
+    tag → chaves usado por ``invalidate_tag``. Com ``index_prefixes=True``,
+    os prefixos de cada chave terminados em ``_``, ``:``, ``/`` ou ``.``
+    também são indexados, e ``invalidate_prefix`` custa O(chaves afetadas).
+
+    Warm-start: ``save_snapshot`` grava as entradas vivas com o TTL restante
+    num arquivo binário; ``load_snapshot`` mapeia o arquivo em memória e
+    carrega cada entrada só no primeiro acesso. Com ``snapshot_path``, o
+    snapshot é carregado na criação e gravado ao encerrar o processo.
+    """
+
+    def __init__(
+        self,
+        default_ttl: int = 300,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        lock_stripes: int = 16,
+        default_soft_ttl: Optional[int] = None,
+        negative_ttl: Optional[int] = None,
+        index_prefixes: bool = False,
+        snapshot_path: Optional[str] = None
+    ):
         """
         Inicializa cache.
 
         Args:
-            default_ttl: Tempo de vida padrão em segundos
+            default_ttl: Tempo de vida padrão em segundos (TTL hard)
+            max_entries: Número máximo de entradas (None = ilimitado)
+            max_bytes: Tamanho máximo estimado em bytes (None = ilimitado)
+            lock_stripes: Número de locks para coordenação de loaders
+            default_soft_ttl: TTL soft padrão em segundos (None = sem revalidação)
+            negative_ttl: TTL de resultados None em get_or_compute (None = não cachear)
+            index_prefixes: Indexa prefixos das chaves para invalidate_prefix
+            snapshot_path: Arquivo de snapshot carregado no início e gravado no exit
         """
         self.default_ttl = default_ttl
-        self._cache: Dict[str, CacheEntry] = {}
+        self.default_soft_ttl = default_soft_ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._cache: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._current_bytes = 0
+
+        # Índice de expiração: (expires_at, key); o float é o mesmo objeto
+        # referenciado pela entrada, então o heap custa só a tupla
+        self._expiry_heap: List[Tuple[float, str]] = []
+
+        self._lock = threading.RLock()
+        self._reaper_thread: Optional[threading.Thread] = None
+        self._reaper_stop = threading.Event()
+
+        # Single-flight: chamadas em andamento por chave, listradas por hash
+        self._stripes: List[Tuple[threading.Lock, Dict[str, Future]]] = [
+            (threading.Lock(), {}) for _ in range(max(1, lock_stripes))
+        ]
+        self._async_inflight: Dict[Tuple[int, str], "asyncio.Task"] = {}
+
+        # Índices secundários para invalidação em massa
+        self.index_prefixes = index_prefixes
+        self._tag_index: Dict[str, Set[str]] = {}
+        self._prefix_index: Dict[str, Set[str]] = {}
+
+        # Estatísticas
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "rejected": 0,
+            "loads": 0,
+            "coalesced": 0,
+            "stale_hits": 0,
+            "refreshes": 0,
+            "refresh_failures": 0,
+            "negative_hits": 0,
+            "invalidations": 0,
+            "warm_hits": 0
+        }
+
+        # Snapshot pendente de carga (warm-start lazy)
+        self._snapshot: Optional[SnapshotReader] = None
+        if snapshot_path is not None:
+            if os.path.exists(snapshot_path):
+                self.load_snapshot(snapshot_path)
+            atexit.register(self.save_snapshot, snapshot_path)
 
     def get(self, key: str) -> Optional[Any]:
         """
@@ -37,19 +224,226 @@ class SimpleCache:
         Returns:
             Valor se existe e não expirou, None caso contrário
         """
-        if key not in self._cache:
-            return None
+        entry = self._lookup(key)
+        return None if entry is None else _unwrap(entry.value)
+
+    def get_or_compute(
+        self,
+        key: str,
+        loader: Callable[[], Any],
+        ttl: Optional[int] = None,
+        soft_ttl: Optional[int] = None
+    ) -> Any:
+        """
+        Retorna valor do cache ou calcula com ``loader`` (single-flight).
 
-        entry = self._cache[key]
+        Em um miss, apenas o primeiro chamador executa ``loader``; chamadas
+        concorrentes para a mesma chave aguardam e recebem o mesmo resultado
+        (ou a mesma exceção). Evita stampede quando uma entrada popular expira.
 
-        # Verificar expiração
-        if time.time() > entry.expires_at:
-            del self._cache[key]
-            return None
+        Se a entrada está na janela soft, o valor atual é retornado e o
+        refresh roda numa thread em background (um por chave).
+
+        Args:
+            key: Chave do cache
+            loader: Função sem argumentos que produz o valor
+            ttl: TTL hard em segundos (usa default se None)
+            soft_ttl: TTL soft em segundos (usa default_soft_ttl se None)
+
+        Returns:
+            Valor em cache ou recém-calculado
+        """
+        entry = self._lookup(key)
+        if entry is not None:
+            if self._is_stale(entry):
+                self._refresh_in_background(key, loader, ttl, soft_ttl)
+            return _unwrap(entry.value)
+
+        stripe_lock, inflight = self._stripe(key)
+        with stripe_lock:
+            # Outro chamador pode ter concluído o load enquanto esperávamos
+            entry = self._lookup(key, record_stats=False)
+            if entry is not None:
+                return _unwrap(entry.value)
+
+            call = inflight.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = Future()
+                inflight[key] = call
+
+        if not is_leader:
+            self._incr("coalesced")
+            return call.result()
+
+        try:
+            self._incr("loads")
+            value = loader()
+            self._store_loaded(key, value, ttl, soft_ttl)
+            call.set_result(value)
+            return value
+        except BaseException as e:
+            call.set_exception(e)
+            raise
+        finally:
+            with stripe_lock:
+                inflight.pop(key, None)
+
+    async def aget_or_compute(
+        self,
+        key: str,
+        loader: Callable[[], Union[Awaitable[Any], Any]],
+        ttl: Optional[int] = None,
+        soft_ttl: Optional[int] = None
+    ) -> Any:
+        """
+        Versão asyncio de ``get_or_compute`` para loaders coroutine.
+
+        O load roda numa task compartilhada; cancelar um dos chamadores
+        não cancela o load para os demais. Na janela soft, o refresh roda
+        como task em background e o valor atual é retornado sem esperar.
+
+        Args:
+            key: Chave do cache
+            loader: Função sem argumentos que retorna um awaitable (ou valor)
+            ttl: TTL hard em segundos (usa default se None)
+            soft_ttl: TTL soft em segundos (usa default_soft_ttl se None)
+
+        Returns:
+            Valor em cache ou recém-calculado
+        """
+        entry = self._lookup(key)
+        if entry is not None and not self._is_stale(entry):
+            return _unwrap(entry.value)
+
+        loop = asyncio.get_running_loop()
+        inflight_key = (id(loop), key)
+
+        task = self._async_inflight.get(inflight_key)
+        if task is None:
+            if entry is not None:
+                self._incr("refreshes")
+            task = loop.create_task(self._aload(key, loader, ttl, soft_ttl))
+            self._async_inflight[inflight_key] = task
+            is_refresh = entry is not None
+            task.add_done_callback(
+                lambda t: self._async_load_done(inflight_key, key, t, is_refresh)
+            )
+        elif entry is None:
+            self._incr("coalesced")
+
+        # Stale-while-revalidate: não espera o refresh
+        if entry is not None:
+            return _unwrap(entry.value)
+
+        return await asyncio.shield(task)
+
+    async def _aload(
+        self,
+        key: str,
+        loader: Callable[[], Union[Awaitable[Any], Any]],
+        ttl: Optional[int],
+        soft_ttl: Optional[int]
+    ) -> Any:
+        """Executa loader assíncrono e armazena o resultado."""
+        self._incr("loads")
+        value = loader()
+        if inspect.isawaitable(value):
+            value = await value
+        self._store_loaded(key, value, ttl, soft_ttl)
+        return value
 
-        return entry.value
+    def _async_load_done(
+        self,
+        inflight_key: Tuple[int, str],
+        key: str,
+        task: "asyncio.Task",
+        is_refresh: bool
+    ):
+        """Remove task concluída do mapa e registra falhas de refresh."""
+        self._async_inflight.pop(inflight_key, None)
+        if task.cancelled() or task.exception() is None:
+            return
+        if is_refresh:
+            # Valor stale continua válido até o TTL hard
+            self._incr("refresh_failures")
+            logger.warning(f"Background refresh failed for '{key}': {task.exception()}")
 
-    def set(self, key: str, value: Any, ttl: Optional[int] = None):
+    def _refresh_in_background(
+        self,
+        key: str,
+        loader: Callable[[], Any],
+        ttl: Optional[int],
+        soft_ttl: Optional[int]
+    ):
+        """Dispara refresh de entrada stale numa thread, no máximo um por chave."""
+        stripe_lock, inflight = self._stripe(key)
+        with stripe_lock:
+            if key in inflight:
+                return
+            call = Future()
+            inflight[key] = call
+
+        self._incr("refreshes")
+
+        def _run():
+            try:
+                self._incr("loads")
+                value = loader()
+                self._store_loaded(key, value, ttl, soft_ttl)
+                call.set_result(value)
+            except BaseException as e:
+                # Valor stale continua válido até o TTL hard
+                self._incr("refresh_failures")
+                logger.warning(f"Background refresh failed for '{key}': {e}")
+                call.set_exception(e)
+            finally:
+                with stripe_lock:
+                    inflight.pop(key, None)
+
+        threading.Thread(
+            target=_run,
+            name=f"SimpleCacheRefresh-{key}",
+            daemon=True
+        ).start()
+
+    def _store_loaded(
+        self,
+        key: str,
+        value: Any,
+        ttl: Optional[int],
+        soft_ttl: Optional[int]
+    ):
+        """Armazena resultado de loader, aplicando cache negativo a None."""
+        if value is None:
+            if self.negative_ttl is not None:
+                self.set_negative(key)
+            return
+        self.set(key, value, ttl, soft_ttl=soft_ttl)
+
+    def set_negative(self, key: str, ttl: Optional[int] = None):
+        """
+        Registra "não encontrado" para a chave.
+
+        ``get`` e ``get_or_compute`` retornam None sem chamar o backend
+        até o TTL negativo vencer.
+
+        Args:
+            key: Chave do cache
+            ttl: TTL em segundos (usa negative_ttl, ou default_ttl, se None)
+        """
+        if ttl is None:
+            ttl = self.negative_ttl if self.negative_ttl is not None else self.default_ttl
+        self.set(key, _NEGATIVE, ttl)
+
+    def set(
+        self,
+        key: str,
+        value: Any,
+        ttl: Optional[int] = None,
+        soft_ttl: Optional[int] = None,
+        tags: Optional[Iterable[str]] = None
+    ):
         """
         Armazena valor no cache.
 
@@ -57,37 +451,743 @@ class SimpleCache:
             key: Chave do cache
             value: Valor a armazenar
             ttl: Tempo de vida em segundos (usa default se None)
+            soft_ttl: TTL soft em segundos (usa default_soft_ttl se None)
+            tags: Tags para invalidação em massa (ex: ["customer:42", "catalog:v3"])
         """
-        if ttl is None:
-            ttl = self.default_ttl
+        entry = self._build_entry(key, value, _clock(), ttl, soft_ttl, tags)
 
-        expires_at = time.time() + ttl
+        with self._lock:
+            self._insert(key, entry)
+            self._evict_if_needed()
 
-        self._cache[key] = CacheEntry(
-            value=value,
-            expires_at=expires_at
-        )
+    def get_many(self, keys: Iterable[str]) -> Tuple[Dict[str, Any], List[str]]:
+        """
+        Recupera várias chaves com uma leitura de relógio e um lock.
+
+        Chaves com cache negativo entram nos hits com valor None, para
+        não serem buscadas de novo no backend.
+
+        Args:
+            keys: Chaves a buscar
+
+        Returns:
+            Tuple (hits {chave: valor}, misses [chaves])
+        """
+        hits: Dict[str, Any] = {}
+        misses: List[str] = []
+        now = _clock()
+
+        with self._lock:
+            for key in keys:
+                entry = self._lookup(key, now=now)
+                if entry is None:
+                    misses.append(key)
+                else:
+                    hits[key] = _unwrap(entry.value)
+
+        return hits, misses
+
+    def set_many(
+        self,
+        items: Union[Dict[str, Any], Iterable[Tuple[str, Any]]],
+        ttl: Optional[int] = None,
+        soft_ttl: Optional[int] = None,
+        tags: Optional[Iterable[str]] = None
+    ):
+        """
+        Armazena vários valores com uma leitura de relógio e um lock.
+
+        Args:
+            items: Dict ou pares (chave, valor)
+            ttl: Tempo de vida em segundos (usa default se None)
+            soft_ttl: TTL soft em segundos (usa default_soft_ttl se None)
+            tags: Tags aplicadas a todas as entradas
+        """
+        pairs = items.items() if isinstance(items, dict) else items
+        now = _clock()
+        tags = tuple(tags) if tags else None
+        entries = [
+            (key, self._build_entry(key, value, now, ttl, soft_ttl, tags))
+            for key, value in pairs
+        ]
+
+        with self._lock:
+            for key, entry in entries:
+                self._insert(key, entry)
+            self._evict_if_needed()
+
+    def delete_many(self, keys: Iterable[str]) -> int:
+        """
+        Remove várias chaves com um único lock.
+
+        Args:
+            keys: Chaves a remover
+
+        Returns:
+            Número de entradas removidas
+        """
+        removed = 0
+        with self._lock:
+            for key in keys:
+                if key in self._cache:
+                    self._remove(key)
+                    removed += 1
+                if self._snapshot is not None:
+                    self._snapshot.discard(key)
+        return removed
+
+    def get_or_compute_many(
+        self,
+        keys: Iterable[str],
+        batch_loader: Callable[[List[str]], Dict[str, Any]],
+        ttl: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Busca várias chaves e carrega todos os misses numa única chamada.
+
+        ``batch_loader`` recebe a lista de misses e retorna um dict com os
+        valores encontrados. Chaves ausentes do retorno viram cache
+        negativo quando ``negative_ttl`` está configurado.
+
+        Args:
+            keys: Chaves a buscar
+            batch_loader: Função que carrega vários valores de uma vez
+            ttl: Tempo de vida em segundos (usa default se None)
+
+        Returns:
+            Dict {chave: valor} (None para chaves não encontradas)
+        """
+        hits, misses = self.get_many(keys)
+        if not misses:
+            return hits
+
+        self._incr("loads")
+        loaded = batch_loader(misses) or {}
+
+        found = {key: value for key, value in loaded.items() if value is not None}
+        self.set_many(found, ttl=ttl)
+
+        if self.negative_ttl is not None:
+            not_found = [key for key in misses if key not in found]
+            self.set_many(((key, _NEGATIVE) for key in not_found), ttl=self.negative_ttl)
+
+        for key in misses:
+            hits[key] = found.get(key)
+        return hits
 
     def delete(self, key: str):
         """Remove entrada do cache."""
-        if key in self._cache:
-            del self._cache[key]
+        self.delete_many((key,))
 
     def clear(self):
         """Limpa todo o cache."""
-        self._cache.clear()
-
-    def cleanup_expired(self):
-        """Remove entradas expiradas."""
-        now = time.time()
-        expired_keys = [
-            key for key, entry in self._cache.items()
-            if now > entry.expires_at
-        ]
+        with self._lock:
+            self._cache.clear()
+            self._expiry_heap.clear()
+            self._tag_index.clear()
+            self._prefix_index.clear()
+            self._current_bytes = 0
+            self._drop_snapshot()
+
+    def invalidate_tag(self, tag: str) -> int:
+        """
+        Remove todas as entradas marcadas com a tag.
+
+        Args:
+            tag: Tag usada em ``set(..., tags=...)``
+
+        Returns:
+            Número de entradas removidas
+        """
+        with self._lock:
+            if self._snapshot is not None:
+                for key in self._snapshot.tagged(tag):
+                    self._snapshot.discard(key)
+
+            keys = self._tag_index.pop(tag, None)
+            if not keys:
+                return 0
+
+            for key in list(keys):
+                if key in self._cache:
+                    self._remove(key)
 
-        for key in expired_keys:
-            del self._cache[key]
+            self.stats["invalidations"] += len(keys)
+            return len(keys)
+
+    def invalidate_prefix(self, prefix: str) -> int:
+        """
+        Remove todas as entradas cuja chave começa com ``prefix``.
+
+        Com ``index_prefixes=True`` e prefixo terminado num delimitador
+        (ex: "customer_42:"), usa o índice e custa O(chaves afetadas).
+        Outros prefixos filtram as chaves do maior segmento contido neles;
+        sem índice (ou sem delimitador no prefixo), faz varredura completa.
+
+        Args:
+            prefix: Prefixo das chaves
+
+        Returns:
+            Número de entradas removidas
+        """
+        # Maior segmento do prefixo terminado em delimitador
+        segments = _key_prefixes(prefix + "\0")
+
+        with self._lock:
+            if self.index_prefixes and segments:
+                candidates = list(self._prefix_index.get(segments[-1], ()))
+            else:
+                candidates = list(self._cache)
+
+            if self._snapshot is not None:
+                for key in [k for k in self._snapshot.keys() if k.startswith(prefix)]:
+                    self._snapshot.discard(key)
+
+            keys = [key for key in candidates if key.startswith(prefix)]
+            for key in keys:
+                self._remove(key)
+
+            self.stats["invalidations"] += len(keys)
+            return len(keys)
+
+    def cleanup_expired(self, max_items: Optional[int] = None) -> int:
+        """
+        Remove entradas expiradas.
+
+        Consome apenas o topo do heap de expiração, então o custo é
+        proporcional ao número de entradas vencidas, não ao tamanho do cache.
+
+        Args:
+            max_items: Máximo de entradas a remover nesta passada (None = todas)
+
+        Returns:
+            Número de entradas removidas
+        """
+        removed = 0
+        now = _clock()
+
+        with self._lock:
+            heap = self._expiry_heap
+            while heap and heap[0][0] <= now:
+                if max_items is not None and removed >= max_items:
+                    break
+
+                expires_at, key = heapq.heappop(heap)
+                entry = self._cache.get(key)
+
+                # Item obsoleto do heap (chave sobrescrita, removida ou evictada)
+                if entry is None or entry.expires_at != expires_at:
+                    continue
+
+                self._remove(key)
+                removed += 1
+
+            self.stats["expirations"] += removed
+
+        return removed
+
+    def save_snapshot(self, path: str) -> int:
+        """
+        Grava entradas vivas num snapshot binário com o TTL restante.
+
+        Entradas do snapshot anterior ainda não acessadas também são
+        gravadas. A escrita é atômica (arquivo temporário + rename).
+
+        Args:
+            path: Caminho do arquivo de snapshot
+
+        Returns:
+            Número de entradas gravadas
+        """
+        now = _clock()
+        wall_offset = time.time() - now
+
+        with self._lock:
+            records = [
+                SnapshotRecord(
+                    key=key,
+                    value=None if entry.value is _NEGATIVE else entry.value,
+                    expires_at=entry.expires_at + wall_offset,
+                    stale_at=entry.stale_at + wall_offset if entry.stale_at is not None else None,
+                    tags=entry.tags,
+                    negative=entry.value is _NEGATIVE
+                )
+                for key, entry in self._cache.items()
+                if entry.expires_at > now
+            ]
+            if self._snapshot is not None:
+                for key in list(self._snapshot.keys()):
+                    if key not in self._cache:
+                        record = self._snapshot.read(key)
+                        if record is not None:
+                            records.append(record)
+
+        try:
+            written = write_snapshot(path, records)
+        except OSError as e:
+            logger.error(f"Failed to write cache snapshot to {path}: {e}")
+            return 0
+
+        logger.info(f"Cache snapshot saved: {written} entries to {path}")
+        return written
+
+    def load_snapshot(self, path: str) -> int:
+        """
+        Abre snapshot para warm-start lazy.
+
+        Apenas as chaves são indexadas agora; cada valor é desserializado
+        no primeiro acesso. Entradas expiradas são descartadas.
+
+        Args:
+            path: Caminho do arquivo de snapshot
+
+        Returns:
+            Número de entradas disponíveis para carga
+        """
+        try:
+            reader = SnapshotReader(path)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring cache snapshot {path}: {e}")
+            return 0
+
+        with self._lock:
+            self._drop_snapshot()
+            self._snapshot = reader
+
+        logger.info(
+            f"Cache snapshot loaded: {len(reader)} entries pending, "
+            f"{reader.dropped} expired dropped"
+        )
+        return len(reader)
+
+    def start_reaper(self, interval: float = 1.0, max_items_per_pass: int = 10_000):
+        """
+        Inicia thread daemon que remove entradas expiradas periodicamente.
+
+        Args:
+            interval: Intervalo entre passadas em segundos
+            max_items_per_pass: Limite de remoções por passada (limita o tempo com lock)
+        """
+        if self._reaper_thread is not None and self._reaper_thread.is_alive():
+            return
+
+        self._reaper_stop.clear()
+
+        def _run():
+            while not self._reaper_stop.wait(interval):
+                try:
+                    self.cleanup_expired(max_items=max_items_per_pass)
+                except Exception as e:
+                    logger.error(f"Cache reaper failed: {e}", exc_info=True)
+
+        self._reaper_thread = threading.Thread(
+            target=_run,
+            name="SimpleCacheReaper",
+            daemon=True
+        )
+        self._reaper_thread.start()
+
+    def stop_reaper(self, timeout: Optional[float] = None):
+        """Para a thread de limpeza, se estiver rodando."""
+        self._reaper_stop.set()
+        if self._reaper_thread is not None:
+            self._reaper_thread.join(timeout)
+            self._reaper_thread = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Retorna estatísticas do cache.
+
+        Returns:
+            Dict com contadores, ocupação e hit rate
+        """
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "entries": len(self._cache),
+            "bytes": self._current_bytes,
+            "expiry_index_size": len(self._expiry_heap),
+            "snapshot_pending": len(self._snapshot) if self._snapshot is not None else 0,
+            "hit_rate": self.stats["hits"] / lookups if lookups > 0 else 0
+        }
+
+    @property
+    def current_bytes(self) -> int:
+        """Tamanho estimado atual do cache em bytes."""
+        return self._current_bytes
+
+    def _lookup(
+        self,
+        key: str,
+        record_stats: bool = True,
+        now: Optional[float] = None
+    ) -> Optional[CacheEntry]:
+        """Busca entrada válida; retorna None se ausente ou expirada."""
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None and self._snapshot is not None:
+                entry = self._warm_from_snapshot(key)
+            if entry is None:
+                if record_stats:
+                    self.stats["misses"] += 1
+                return None
+
+            # Verificar expiração
+            if (now if now is not None else _clock()) > entry.expires_at:
+                self._remove(key)
+                self.stats["expirations"] += 1
+                if record_stats:
+                    self.stats["misses"] += 1
+                return None
+
+            self._cache.move_to_end(key)
+            if record_stats:
+                self.stats["hits"] += 1
+                if entry.value is _NEGATIVE:
+                    self.stats["negative_hits"] += 1
+            return entry
+
+    def _warm_from_snapshot(self, key: str) -> Optional[CacheEntry]:
+        """Carrega a chave do snapshot pendente, se ainda válida."""
+        record = self._snapshot.pop(key)
+        if len(self._snapshot) == 0:
+            self._drop_snapshot()
+        if record is None:
+            return None
+
+        now_wall = time.time()
+        self.set(
+            key,
+            _NEGATIVE if record.negative else record.value,
+            ttl=record.expires_at - now_wall,
+            soft_ttl=record.stale_at - now_wall if record.stale_at is not None else None,
+            tags=record.tags
+        )
+
+        entry = self._cache.get(key)
+        if entry is not None:
+            self.stats["warm_hits"] += 1
+        return entry
+
+    def _drop_snapshot(self):
+        """Descarta o snapshot pendente."""
+        if self._snapshot is not None:
+            self._snapshot.close()
+            self._snapshot = None
+
+    def _is_stale(self, entry: CacheEntry) -> bool:
+        """Indica se a entrada passou do TTL soft."""
+        if entry.stale_at is None or _clock() <= entry.stale_at:
+            return False
+        self._incr("stale_hits")
+        return True
+
+    def _incr(self, counter: str):
+        """Incrementa contador de estatística sob o lock."""
+        with self._lock:
+            self.stats[counter] += 1
+
+    def _stripe(self, key: str) -> Tuple[threading.Lock, Dict[str, Future]]:
+        """Retorna o lock e o mapa de chamadas em andamento da chave."""
+        return self._stripes[hash(key) % len(self._stripes)]
+
+    def _build_entry(
+        self,
+        key: str,
+        value: Any,
+        now: float,
+        ttl: Optional[float],
+        soft_ttl: Optional[float],
+        tags: Optional[Iterable[str]]
+    ) -> CacheEntry:
+        """Cria entrada calculando expirações e tamanho (fora do lock)."""
+        if ttl is None:
+            ttl = self.default_ttl
+        if soft_ttl is None and value is not _NEGATIVE:
+            soft_ttl = self.default_soft_ttl
+
+        return CacheEntry(
+            value=value,
+            expires_at=now + ttl,
+            size=estimate_size(key) + estimate_size(value) + ENTRY_OVERHEAD_BYTES,
+            stale_at=now + soft_ttl if soft_ttl is not None and soft_ttl < ttl else None,
+            tags=tuple(tags) if tags else None
+        )
+
+    def _insert(self, key: str, entry: CacheEntry):
+        """Insere entrada substituindo a anterior; chamar com o lock."""
+        if key in self._cache:
+            self._remove(key)
+
+        # O valor novo substitui o do snapshot pendente: sem isso, o antigo
+        # voltaria depois que o novo fosse evictado ou expirasse
+        if self._snapshot is not None:
+            self._snapshot.discard(key)
+
+        # Valor maior que o cache inteiro: não armazenar
+        if self.max_bytes is not None and entry.size > self.max_bytes:
+            self.stats["rejected"] += 1
+            return
+
+        self._cache[key] = entry
+        self._current_bytes += entry.size
+        self._schedule_expiry(key, entry.expires_at)
+        self._index(key, entry)
+
+    def _remove(self, key: str):
+        """Remove entrada e atualiza contabilidade de bytes e índices."""
+        entry = self._cache.pop(key)
+        self._current_bytes -= entry.size
+        self._unindex(key, entry)
+
+    def _index(self, key: str, entry: CacheEntry):
+        """Registra a chave nos índices de tags e prefixos."""
+        if entry.tags:
+            for tag in entry.tags:
+                self._tag_index.setdefault(tag, set()).add(key)
+
+        if self.index_prefixes:
+            for prefix in _key_prefixes(key):
+                self._prefix_index.setdefault(prefix, set()).add(key)
+
+    def _unindex(self, key: str, entry: CacheEntry):
+        """Remove a chave dos índices de tags e prefixos."""
+        if entry.tags:
+            for tag in entry.tags:
+                keys = self._tag_index.get(tag)
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del self._tag_index[tag]
+
+        if self.index_prefixes:
+            for prefix in _key_prefixes(key):
+                keys = self._prefix_index.get(prefix)
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del self._prefix_index[prefix]
+
+    def _schedule_expiry(self, key: str, expires_at: float):
+        """Registra expiração no heap, compactando itens obsoletos se necessário."""
+        heapq.heappush(self._expiry_heap, (expires_at, key))
+
+        # Sobrescritas e evictions deixam itens obsoletos no heap;
+        # reconstruir quando eles dominam mantém memória O(entradas vivas)
+        if len(self._expiry_heap) > 2 * len(self._cache) + 1024:
+            self._expiry_heap = [
+                (entry.expires_at, k) for k, entry in self._cache.items()
+            ]
+            heapq.heapify(self._expiry_heap)
+
+    def _evict_if_needed(self):
+        """Remove entradas LRU até respeitar os limites configurados."""
+        while self._cache and (
+            (self.max_entries is not None and len(self._cache) > self.max_entries) or
+            (self.max_bytes is not None and self._current_bytes > self.max_bytes)
+        ):
+            key, entry = self._cache.popitem(last=False)
+            self._current_bytes -= entry.size
+            self._unindex(key, entry)
+            self.stats["evictions"] += 1
 
     def __len__(self) -> int:
         """Retorna número de entradas no cache."""
         return len(self._cache)
+
+
+# ==================== Memoização ====================
+
+# Funções decoradas com @cached, por nome qualificado
+_cached_functions: Dict[str, Callable] = {}
+
+
+# Tipos de valor cuja repr identifica o conteúdo
+_VALUE_TYPES = (datetime.date, datetime.time, datetime.timedelta, decimal.Decimal, enum.Enum, uuid.UUID)
+
+
+def _key_default(obj: Any) -> str:
+    """
+    Serializa argumentos não-JSON para a chave do cache.
+
+    Raises:
+        TypeError: Se o objeto não tem representação estável (ex: ``self``
+            de um Toolkit sem ``__cache_key__``)
+    """
+    if isinstance(obj, (set, frozenset)):
+        return repr(sorted(obj, key=repr))
+    if hasattr(obj, "__cache_key__"):
+        return obj.__cache_key__()
+    if isinstance(obj, _VALUE_TYPES):
+        return repr(obj)
+    # id() é reaproveitado depois do GC: um objeto novo herdaria as entradas
+    # de outro, então objetos sem chave estável não podem entrar na chave
+    raise TypeError(
+        f"Cannot build a stable cache key from {type(obj).__qualname__}: "
+        "define __cache_key__ on it or pass key= to @cached"
+    )
+
+
+def make_cache_key(prefix: str, arguments: Dict[str, Any]) -> str:
+    """
+    Gera chave estável a partir dos argumentos de uma chamada.
+
+    Args:
+        prefix: Prefixo da chave (normalmente o nome da função)
+        arguments: Argumentos já associados aos parâmetros
+
+    Returns:
+        Chave no formato "prefix:sha1"
+    """
+    payload = json.dumps(arguments, sort_keys=True, default=_key_default, ensure_ascii=False)
+    return f"{prefix}:{hashlib.sha1(payload.encode('utf-8')).hexdigest()}"
+
+
+def cached(
+    ttl: int = 300,
+    max_entries: Optional[int] = 1024,
+    max_bytes: Optional[int] = None,
+    cache: Optional[SimpleCache] = None,
+    key_prefix: Optional[str] = None,
+    key: Optional[Callable[..., Any]] = None
+):
+    """
+    Decorator de memoização baseado em SimpleCache.
+
+    A chave é derivada dos argumentos associados à assinatura da função,
+    então ``f(1)`` e ``f(x=1)`` compartilham a entrada. Argumentos precisam
+    ser JSON, sets ou tipos de valor (datetime, Decimal, Enum, UUID); outros
+    objetos (ex: ``self`` de um Toolkit) precisam definir ``__cache_key__``,
+    senão a chamada levanta TypeError. Alternativamente, ``key`` recebe os
+    mesmos argumentos da função e retorna o que identifica a chamada.
+    Retornos None são cacheados no cache próprio do decorator (com
+    ``negative_ttl=ttl``); com ``cache=`` compartilhado, só se esse cache
+    tiver ``negative_ttl`` configurado, senão a função roda de novo.
+
+    Funciona em funções comuns, métodos de Toolkit AGNO, funções
+    coroutine e tools CrewAI (aplicar ``@cached`` abaixo de ``@tool``).
+    O wrapper preserva nome, docstring e assinatura.
+
+    Args:
+        ttl: Tempo de vida em segundos
+        max_entries: Número máximo de entradas por função (None = ilimitado)
+        max_bytes: Tamanho máximo estimado em bytes (None = ilimitado)
+        cache: SimpleCache compartilhado (cria um por função se None);
+            ``max_entries``/``max_bytes`` são ignorados e o cache de None
+            segue o ``negative_ttl`` dele
+        key_prefix: Prefixo das chaves (usa módulo.nome_qualificado se None)
+        key: Função (mesmos argumentos da decorada) que retorna a
+            identidade da chamada, ex: ``lambda self, product_id: product_id``
+
+    Returns:
+        Decorator function
+
+    Example:
+        @cached(ttl=3600)
+        def compare_plans(plan_a: str, plan_b: str) -> str:
+            ...
+
+        compare_plans.cache_info()  # hits, misses, latências
+    """
+    def decorator(func: Callable) -> Callable:
+        name = key_prefix or f"{func.__module__}.{func.__qualname__}"
+        store = cache if cache is not None else SimpleCache(
+            default_ttl=ttl,
+            max_entries=max_entries,
+            max_bytes=max_bytes,
+            negative_ttl=ttl
+        )
+        signature = inspect.signature(func)
+        stats_lock = threading.Lock()
+        stats = {
+            "hits": 0,
+            "misses": 0,
+            "hit_time": 0.0,
+            "miss_time": 0.0
+        }
+
+        def _key(args, kwargs) -> str:
+            if key is not None:
+                return make_cache_key(name, {"key": key(*args, **kwargs)})
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            return make_cache_key(name, bound.arguments)
+
+        def _record(loaded: bool, elapsed: float):
+            with stats_lock:
+                if loaded:
+                    stats["misses"] += 1
+                    stats["miss_time"] += elapsed
+                else:
+                    stats["hits"] += 1
+                    stats["hit_time"] += elapsed
+
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                loaded = []
+
+                async def loader():
+                    loaded.append(True)
+                    return await func(*args, **kwargs)
+
+                result = await store.aget_or_compute(_key(args, kwargs), loader, ttl=ttl)
+                _record(bool(loaded), time.perf_counter() - start)
+                return result
+        else:
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                loaded = []
+
+                def loader():
+                    loaded.append(True)
+                    return func(*args, **kwargs)
+
+                result = store.get_or_compute(_key(args, kwargs), loader, ttl=ttl)
+                _record(bool(loaded), time.perf_counter() - start)
+                return result
+
+        def cache_info() -> Dict[str, Any]:
+            """Estatísticas de hits, misses e latência média da função."""
+            with stats_lock:
+                hits, misses = stats["hits"], stats["misses"]
+                calls = hits + misses
+                return {
+                    "function": name,
+                    "hits": hits,
+                    "misses": misses,
+                    "hit_rate": hits / calls if calls > 0 else 0,
+                    "avg_hit_latency_ms": stats["hit_time"] / hits * 1000 if hits > 0 else 0,
+                    "avg_miss_latency_ms": stats["miss_time"] / misses * 1000 if misses > 0 else 0,
+                    "entries": len(store)
+                }
+
+        def cache_clear():
+            """Limpa entradas e estatísticas da função."""
+            if cache is not None:
+                store.invalidate_prefix(f"{name}:")
+            else:
+                store.clear()
+            with stats_lock:
+                for counter in stats:
+                    stats[counter] = 0
+
+        wrapper.cache = store
+        wrapper.cache_info = cache_info
+        wrapper.cache_clear = cache_clear
+        _cached_functions[name] = wrapper
+        return wrapper
+
+    return decorator
+
+
+def cached_function_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Retorna estatísticas de todas as funções decoradas com @cached.
+
+    Returns:
+        Dict {nome_da_função: cache_info()}
+    """
+    return {name: func.cache_info() for name, func in _cached_functions.items()}
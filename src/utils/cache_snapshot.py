@@ -0,0 +1,235 @@
+"""
+Snapshot binário de entradas de cache para warm-start entre deploys.
+
+Formato (little-endian):
+    MAGIC (8 bytes)
+    repetido por entrada:
+        expires_at (double, relógio de parede)
+        stale_at   (double, relógio de parede; 0 = sem TTL soft)
+        flags      (uint8; bit 0 = cache negativo)
+        key_len, value_len, tags_len (uint32)
+        key (utf-8) | value (pickle) | tags (utf-8, separadas por \\x1f)
+
+O leitor mapeia o arquivo em memória e indexa apenas cabeçalhos e chaves;
+valores só são desserializados quando a chave é acessada.
+"""
+
+import logging
+import mmap
+import os
+import pickle
+import struct
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+
+MAGIC = b"SCSNAP\x00\x01"
+FLAG_NEGATIVE = 1
+TAG_SEPARATOR = "\x1f"
+
+_HEADER = struct.Struct("<ddBIII")
+
+
+@dataclass
+class SnapshotRecord:
+    """Entrada lida de um snapshot (instantes no relógio de parede)."""
+    key: str
+    value: Any
+    expires_at: float
+    stale_at: Optional[float] = None
+    tags: Optional[Tuple[str, ...]] = None
+    negative: bool = False
+
+
+def write_snapshot(path: str, records: Iterable[SnapshotRecord]) -> int:
+    """
+    Grava snapshot de forma atômica (arquivo temporário + rename).
+
+    Valores que não podem ser serializados com pickle são ignorados.
+
+    Args:
+        path: Caminho do arquivo de snapshot
+        records: Entradas a gravar
+
+    Returns:
+        Número de entradas gravadas
+    """
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    written = 0
+
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        for record in records:
+            try:
+                value = b"" if record.negative else pickle.dumps(
+                    record.value, protocol=pickle.HIGHEST_PROTOCOL
+                )
+            except Exception as e:
+                logger.debug(f"Skipping unpicklable cache entry '{record.key}': {e}")
+                continue
+
+            key = record.key.encode("utf-8")
+            tags = TAG_SEPARATOR.join(record.tags).encode("utf-8") if record.tags else b""
+            f.write(_HEADER.pack(
+                record.expires_at,
+                record.stale_at or 0.0,
+                FLAG_NEGATIVE if record.negative else 0,
+                len(key),
+                len(value),
+                len(tags)
+            ))
+            f.write(key)
+            f.write(value)
+            f.write(tags)
+            written += 1
+
+    os.replace(tmp_path, path)
+    return written
+
+
+class SnapshotReader:
+    """
+    Leitor lazy de snapshot via mmap.
+
+    Na abertura, percorre só cabeçalhos e chaves e descarta entradas já
+    expiradas. ``pop`` desserializa o valor sob demanda.
+    """
+
+    def __init__(self, path: str):
+        """
+        Abre e indexa o snapshot.
+
+        Args:
+            path: Caminho do arquivo de snapshot
+
+        Raises:
+            ValueError: Se o arquivo não é um snapshot válido
+        """
+        self.path = path
+        self._file = open(path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+
+        if size < len(MAGIC):
+            self._file.close()
+            raise ValueError(f"Invalid cache snapshot: {path}")
+
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(f"Invalid cache snapshot: {path}")
+
+        # key -> (offset do valor, tamanho, expires_at, stale_at, tags, negative)
+        self._index: Dict[str, Tuple[int, int, float, Optional[float], Optional[Tuple[str, ...]], bool]] = {}
+        self.dropped = 0
+        self._scan(size)
+
+    def _scan(self, size: int):
+        """Indexa entradas ainda válidas."""
+        now = time.time()
+        buf = self._mmap
+        offset = len(MAGIC)
+
+        while offset + _HEADER.size <= size:
+            expires_at, stale_at, flags, key_len, value_len, tags_len = _HEADER.unpack_from(buf, offset)
+            offset += _HEADER.size
+
+            end = offset + key_len + value_len + tags_len
+            if end > size:
+                logger.warning(f"Truncated cache snapshot: {self.path}")
+                break
+
+            if expires_at <= now:
+                self.dropped += 1
+                offset = end
+                continue
+
+            key = buf[offset:offset + key_len].decode("utf-8")
+            value_offset = offset + key_len
+            tags_raw = buf[value_offset + value_len:end]
+            tags = tuple(tags_raw.decode("utf-8").split(TAG_SEPARATOR)) if tags_raw else None
+
+            self._index[key] = (
+                value_offset,
+                value_len,
+                expires_at,
+                stale_at or None,
+                tags,
+                bool(flags & FLAG_NEGATIVE)
+            )
+            offset = end
+
+    def pop(self, key: str) -> Optional[SnapshotRecord]:
+        """
+        Remove a chave do índice e retorna a entrada, se ainda válida.
+
+        Args:
+            key: Chave procurada
+
+        Returns:
+            SnapshotRecord ou None se ausente, expirada ou corrompida
+        """
+        record = self.read(key)
+        self._index.pop(key, None)
+        return record
+
+    def read(self, key: str) -> Optional[SnapshotRecord]:
+        """
+        Lê a entrada sem removê-la do índice.
+
+        Args:
+            key: Chave procurada
+
+        Returns:
+            SnapshotRecord ou None se ausente, expirada ou corrompida
+        """
+        item = self._index.get(key)
+        if item is None:
+            return None
+
+        value_offset, value_len, expires_at, stale_at, tags, negative = item
+        if expires_at <= time.time():
+            return None
+
+        value = None
+        if not negative:
+            try:
+                value = pickle.loads(self._mmap[value_offset:value_offset + value_len])
+            except Exception as e:
+                logger.warning(f"Failed to load cache snapshot entry '{key}': {e}")
+                return None
+
+        return SnapshotRecord(
+            key=key,
+            value=value,
+            expires_at=expires_at,
+            stale_at=stale_at,
+            tags=tags,
+            negative=negative
+        )
+
+    def discard(self, key: str):
+        """Descarta a chave sem carregá-la."""
+        self._index.pop(key, None)
+
+    def keys(self):
+        """Chaves ainda não carregadas."""
+        return self._index.keys()
+
+    def tagged(self, tag: str):
+        """Chaves ainda não carregadas com a tag."""
+        return [key for key, item in self._index.items() if item[4] and tag in item[4]]
+
+    def close(self):
+        """Libera o mmap e o arquivo."""
+        if not self._mmap.closed:
+            self._mmap.close()
+        if not self._file.closed:
+            self._file.close()
+
+    def __len__(self) -> int:
+        """Número de entradas ainda não carregadas."""
+        return len(self._index)
@@ -0,0 +1,116 @@
+"""
+Checkpoint de jobs em lote em arquivo JSONL append-only.
+
+Cada item concluído vira uma linha ``{"key": ..., "result": ...}``. Ao
+reabrir o arquivo, os itens já registrados são pulados, então um lote que
+caiu no meio recomeça de onde parou. Uma última linha truncada (queda no
+meio da escrita) é ignorada.
+"""
+
+import json
+import logging
+import os
+import threading
+from typing import Any, Dict, Optional
+
+
+logger = logging.getLogger(__name__)
+
+
+class BatchCheckpoint:
+    """
+    Registro dos itens já processados de um lote.
+
+    Example:
+        >>> with BatchCheckpoint("/tmp/reengajamento.jsonl") as checkpoint:
+        ...     for key, message in jobs:
+        ...         if key in checkpoint:
+        ...             continue
+        ...         checkpoint.record(key, process(message))
+    """
+
+    def __init__(self, path: str):
+        """
+        Abre (ou cria) o checkpoint e carrega os itens concluídos.
+
+        Args:
+            path: Caminho do arquivo JSONL
+        """
+        self.path = path
+        self._done: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+        needs_newline = False
+        if os.path.exists(path):
+            needs_newline = self._load()
+
+        self._file = open(path, "a", encoding="utf-8")
+        if needs_newline:
+            # Isola a linha truncada para não corromper o próximo registro
+            self._file.write("\n")
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._done
+
+    def __len__(self) -> int:
+        return len(self._done)
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Retorna o resultado registrado para ``key``.
+
+        Args:
+            key: Chave do item
+
+        Returns:
+            Resultado salvo ou None se o item não foi concluído
+        """
+        return self._done.get(key)
+
+    def record(self, key: str, result: Any):
+        """
+        Registra um item como concluído (grava e faz flush na hora).
+
+        Args:
+            key: Chave do item
+            result: Resultado serializável em JSON
+        """
+        line = json.dumps({"key": key, "result": result}, ensure_ascii=False, default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+            self._done[key] = result
+
+    def close(self):
+        """Fecha o arquivo."""
+        with self._lock:
+            self._file.close()
+
+    def __enter__(self) -> "BatchCheckpoint":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _load(self) -> bool:
+        """
+        Lê os itens concluídos do arquivo.
+
+        Returns:
+            True se o arquivo termina sem quebra de linha (escrita truncada)
+        """
+        raw = ""
+        with open(self.path, encoding="utf-8") as f:
+            for line_number, raw in enumerate(f, 1):
+                line = raw.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning(f"Skipping corrupt checkpoint line {line_number} in {self.path}")
+                    continue
+                self._done[entry["key"]] = entry.get("result")
+
+        logger.info(f"Checkpoint {self.path}: {len(self._done)} items already done")
+        return bool(raw) and not raw.endswith("\n")
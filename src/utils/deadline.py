@@ -0,0 +1,128 @@
+"""
+Deadline por requisição propagado via contextvars.
+
+Um turno do agente abre um ``deadline(segundos)``; retries, circuit breaker,
+clientes HTTP e buscas leem o tempo restante do contexto atual para reduzir
+seus timeouts e desistir de tentativas que não terminariam a tempo.
+
+O contexto é herdado por tasks asyncio e pode ser levado para threads com
+``contextvars.copy_context().run``.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+
+class DeadlineExceeded(TimeoutError):
+    """O orçamento de tempo da requisição acabou."""
+    pass
+
+
+class Deadline:
+    """Instante limite (relógio monotônico) de uma requisição."""
+
+    __slots__ = ("expires_at",)
+
+    def __init__(self, timeout: float):
+        """
+        Cria deadline a partir de agora.
+
+        Args:
+            timeout: Orçamento em segundos
+        """
+        self.expires_at = time.monotonic() + timeout
+
+    def remaining(self) -> float:
+        """Segundos restantes (negativo se já expirou)."""
+        return self.expires_at - time.monotonic()
+
+    def expired(self) -> bool:
+        """Verifica se o deadline já passou."""
+        return self.remaining() <= 0
+
+    def __repr__(self) -> str:
+        return f"Deadline(remaining={self.remaining():.3f}s)"
+
+
+_current_deadline: ContextVar[Optional[Deadline]] = ContextVar("deadline", default=None)
+
+
+@contextmanager
+def deadline(timeout: Optional[float]) -> Iterator[Optional[Deadline]]:
+    """
+    Define o deadline do contexto atual.
+
+    Deadlines aninhados nunca estendem o externo: vale o mais curto.
+    ``timeout=None`` mantém o deadline atual (se houver).
+
+    Args:
+        timeout: Orçamento em segundos
+
+    Yields:
+        Deadline em vigor
+    """
+    current = _current_deadline.get()
+    if timeout is None:
+        yield current
+        return
+
+    new = Deadline(timeout)
+    if current is not None and current.expires_at < new.expires_at:
+        new = current
+
+    token = _current_deadline.set(new)
+    try:
+        yield new
+    finally:
+        _current_deadline.reset(token)
+
+
+def current_deadline() -> Optional[Deadline]:
+    """Retorna o deadline do contexto atual, se houver."""
+    return _current_deadline.get()
+
+
+def remaining_time() -> Optional[float]:
+    """
+    Retorna os segundos restantes do deadline atual.
+
+    Returns:
+        Segundos restantes ou None se não há deadline
+    """
+    current = _current_deadline.get()
+    return current.remaining() if current is not None else None
+
+
+def check_deadline():
+    """
+    Levanta DeadlineExceeded se o deadline atual já passou.
+
+    Raises:
+        DeadlineExceeded: Se o orçamento acabou
+    """
+    current = _current_deadline.get()
+    if current is not None and current.expired():
+        raise DeadlineExceeded("Request deadline exceeded")
+
+
+def cap_timeout(timeout: Optional[float]) -> Optional[float]:
+    """
+    Limita um timeout local ao tempo restante do deadline.
+
+    Args:
+        timeout: Timeout da camada (None = sem limite próprio)
+
+    Returns:
+        O menor entre ``timeout`` e o tempo restante
+
+    Raises:
+        DeadlineExceeded: Se o orçamento acabou
+    """
+    remaining = remaining_time()
+    if remaining is None:
+        return timeout
+    if remaining <= 0:
+        raise DeadlineExceeded("Request deadline exceeded")
+    return remaining if timeout is None else min(timeout, remaining)
@@ -2,6 +2,22 @@
 Formatadores de dados.
 """
 
+import math
+import re
+from functools import lru_cache
+from typing import Any, Iterable, List, Optional, Sequence
+
+
+# Tudo que não é dígito (também usado por validators)
+NON_DIGITS = re.compile(r"[^0-9]+")
+
+# Pedaços usados pela contagem aproximada: palavras, números e pontuação
+_APPROX_PIECES = re.compile(r"[^\W\d_]+|\d+|[^\w\s]+")
+_WORD_BOUNDARY = re.compile(r"\s+")
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?…])\s+")
+
+DEFAULT_ENCODING = "cl100k_base"
+
 
 def format_currency(value: float, currency: str = "BRL") -> str:
     """
@@ -32,8 +48,20 @@ def format_phone(phone: str) -> str:
     Returns:
         Telefone formatado
     """
-    digits = ''.join(filter(str.isdigit, phone))
+    return format_digits(NON_DIGITS.sub("", phone), phone)
+
+
+def format_digits(digits: str, phone: str) -> str:
+    """
+    Formata dígitos já extraídos de ``phone`` (ver ``format_phone``).
+
+    Args:
+        digits: Apenas os dígitos do telefone
+        phone: Telefone original
 
+    Returns:
+        Telefone formatado, ou ``phone`` se não tiver 10-11 dígitos
+    """
     if len(digits) == 11:  # Celular com DDD
         return f"({digits[:2]}) {digits[2:7]}-{digits[7:]}"
     elif len(digits) == 10:  # Fixo com DDD
@@ -42,6 +70,49 @@ def format_phone(phone: str) -> str:
         return phone
 
 
+def format_phones(phones: Iterable[str]) -> Any:
+    """
+    Formata telefones brasileiros em lote.
+
+    Mesmas regras de ``format_phone``. Se ``phones`` é uma ``pandas.Series``,
+    usa operações vetorizadas de string e retorna uma Series; valores
+    ausentes (None/NaN) são mantidos.
+
+    Args:
+        phones: Iterável (ou Series) de telefones
+
+    Returns:
+        Lista (ou Series) de telefones formatados
+    """
+    if is_series(phones):
+        text = phones.astype("string")
+        digits = text.str.replace(r"[^0-9]+", "", regex=True)
+        formatted = (
+            digits
+            .str.replace(r"^(\d{2})(\d{5})(\d{4})$", r"(\1) \2-\3", regex=True)
+            .str.replace(r"^(\d{2})(\d{4})(\d{4})$", r"(\1) \2-\3", regex=True)
+        )
+        return formatted.where(digits.str.len().between(10, 11), text)
+
+    return [
+        format_phone(phone) if isinstance(phone, str) else phone
+        for phone in phones
+    ]
+
+
+def is_series(values: Any) -> bool:
+    """
+    Detecta pandas.Series sem importar pandas.
+
+    Args:
+        values: Valor qualquer
+
+    Returns:
+        True se ``values`` é uma Series (com acessor ``.str``)
+    """
+    return type(values).__name__ == "Series" and hasattr(values, "str")
+
+
 def truncate_text(text: str, max_length: int = 100, suffix: str = "...") -> str:
     """
     Trunca texto mantendo palavras completas.
@@ -59,3 +130,223 @@ def truncate_text(text: str, max_length: int = 100, suffix: str = "...") -> str:
 
     truncated = text[:max_length - len(suffix)].rsplit(' ', 1)[0]
     return truncated + suffix
+
+
+# ==================== Tokens ====================
+
+@lru_cache(maxsize=16)
+def _get_encoder(model: Optional[str] = None):
+    """
+    Retorna o encoder BPE do tiktoken para o modelo, se instalado.
+
+    Returns:
+        Encoding do tiktoken ou None (usa contagem aproximada)
+    """
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+
+    if model:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            pass
+    return tiktoken.get_encoding(DEFAULT_ENCODING)
+
+
+def _approximate_tokens(text: str) -> int:
+    """
+    Estimativa rápida sem tokenizer.
+
+    Cada palavra conta ~1 token a cada 4 letras (palavras em português
+    costumam virar 2+ tokens), números 1 a cada 3 dígitos e pontuação
+    1 a cada 2 caracteres.
+    """
+    total = 0
+    for piece in _APPROX_PIECES.findall(text):
+        if piece[0].isdigit():
+            total += math.ceil(len(piece) / 3)
+        elif piece[0].isalpha():
+            total += math.ceil(len(piece) / 4)
+        else:
+            total += math.ceil(len(piece) / 2)
+    return total
+
+
+@lru_cache(maxsize=4096)
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    """
+    Conta tokens do texto.
+
+    Usa o tokenizer BPE local (tiktoken) quando disponível e uma estimativa
+    aproximada caso contrário. Resultados ficam em cache, então strings
+    repetidas (instruções, chunks recuperados, histórico) só são contadas
+    uma vez.
+
+    Args:
+        text: Texto a contar
+        model: ID do modelo (escolhe o encoding; padrão cl100k_base)
+
+    Returns:
+        Número de tokens
+    """
+    return _count_tokens(text, model)
+
+
+def _count_tokens(text: str, model: Optional[str]) -> int:
+    """
+    Conta tokens sem passar pelo cache.
+
+    Usado para textos descartáveis (prefixos candidatos da busca binária,
+    junções intermediárias), que só expulsariam do cache as strings que
+    se repetem de verdade.
+    """
+    if not text:
+        return 0
+
+    encoder = _get_encoder(model)
+    if encoder is None:
+        return _approximate_tokens(text)
+    return len(encoder.encode(text, disallowed_special=()))
+
+
+def truncate_to_tokens(
+    text: str,
+    max_tokens: int,
+    model: Optional[str] = None,
+    suffix: str = "...",
+    boundary: str = "word"
+) -> str:
+    """
+    Trunca texto para caber em ``max_tokens``, cortando em fronteira.
+
+    Faz busca binária sobre as fronteiras (fim de frase ou de palavra), então
+    o resultado é o maior prefixo que cabe no orçamento, com o sufixo
+    incluído na conta. Cortes em fim de frase não levam sufixo; se nenhuma
+    frase inteira cabe, corta por palavra.
+
+    Args:
+        text: Texto a truncar
+        max_tokens: Orçamento de tokens
+        model: ID do modelo (para o tokenizer)
+        suffix: Sufixo adicionado quando o corte é no meio de uma frase
+        boundary: "sentence" ou "word"
+
+    Returns:
+        Texto com no máximo ``max_tokens`` tokens
+    """
+    if boundary not in ("word", "sentence"):
+        raise ValueError(f"Unknown boundary: {boundary}")
+
+    if count_tokens(text, model) <= max_tokens:
+        return text
+    if max_tokens <= 0:
+        return ""
+
+    if boundary == "sentence":
+        cut = _longest_fitting_prefix(text, _SENTENCE_BOUNDARY, max_tokens, model, "")
+        if cut:
+            return cut
+
+    cut = _longest_fitting_prefix(text, _WORD_BOUNDARY, max_tokens, model, suffix)
+    if cut:
+        return cut
+
+    # Nem a primeira palavra cabe: corte por caracteres
+    return _longest_fitting_chars(text, max_tokens, model)
+
+
+def pack_to_token_budget(
+    items: Sequence[str],
+    max_tokens: int,
+    model: Optional[str] = None,
+    separator: str = "\n\n",
+    keep: str = "first",
+    truncate_overflow: bool = True
+) -> List[str]:
+    """
+    Seleciona itens (chunks, saídas de tools, histórico) que cabem no orçamento.
+
+    Itens entram inteiros na ordem de prioridade; o primeiro que não cabe é
+    truncado (por frase/palavra) para ocupar o que sobrou, e os seguintes são
+    descartados. O texto final ``separator.join(resultado)`` é recontado e
+    nunca passa de ``max_tokens``.
+
+    Args:
+        items: Textos em ordem cronológica / de relevância
+        max_tokens: Orçamento de tokens
+        model: ID do modelo (para o tokenizer)
+        separator: Separador usado ao juntar os itens
+        keep: "first" prioriza os primeiros itens (ex: chunks por relevância);
+            "last" prioriza os últimos (ex: histórico recente)
+        truncate_overflow: Truncar o item que não cabe inteiro
+
+    Returns:
+        Itens selecionados, na ordem original
+    """
+    if keep not in ("first", "last"):
+        raise ValueError(f"Unknown keep mode: {keep}")
+
+    ordered = list(items) if keep == "first" else list(reversed(items))
+    separator_tokens = count_tokens(separator, model)
+    selected: List[str] = []
+    used = 0
+
+    for item in ordered:
+        cost = count_tokens(item, model) + (separator_tokens if selected else 0)
+        if used + cost <= max_tokens:
+            selected.append(item)
+            used += cost
+            continue
+
+        remaining = max_tokens - used - (separator_tokens if selected else 0)
+        if truncate_overflow and remaining > 0:
+            cut = truncate_to_tokens(item, remaining, model, suffix="", boundary="sentence")
+            if cut:
+                selected.append(cut)
+        break
+
+    if keep == "last":
+        selected.reverse()
+
+    # Fronteiras BPE podem juntar/separar tokens: garante o orçamento exato
+    while selected and _count_tokens(separator.join(selected), model) > max_tokens:
+        selected.pop(-1 if keep == "first" else 0)
+
+    return selected
+
+
+def _longest_fitting_prefix(
+    text: str,
+    boundary: "re.Pattern",
+    max_tokens: int,
+    model: Optional[str],
+    suffix: str
+) -> str:
+    """Maior prefixo terminado em ``boundary`` que cabe com o sufixo."""
+    cuts = [m.start() for m in boundary.finditer(text)]
+    low, high, best = 0, len(cuts) - 1, ""
+
+    while low <= high:
+        mid = (low + high) // 2
+        candidate = text[:cuts[mid]].rstrip() + suffix
+        if _count_tokens(candidate, model) <= max_tokens:
+            best = candidate
+            low = mid + 1
+        else:
+            high = mid - 1
+
+    return best
+
+
+def _longest_fitting_chars(text: str, max_tokens: int, model: Optional[str]) -> str:
+    """Maior prefixo (por caracteres) que cabe em ``max_tokens``."""
+    low, high = 0, len(text)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if _count_tokens(text[:mid], model) <= max_tokens:
+            low = mid
+        else:
+            high = mid - 1
+    return text[:low].rstrip()
@@ -0,0 +1,319 @@
+"""
+Rate limiter client-side para limites de RPM/TPM de provedores LLM.
+
+Dois token buckets (requisições e tokens por minuto) com fila FIFO: quem
+chega primeiro é atendido primeiro, e chamadas grandes não são furadas por
+chamadas pequenas. Em vez de falhar com 429 e tentar de novo, os chamadores
+esperam a vez. Hints de ``Retry-After`` pausam o limiter inteiro.
+"""
+
+import email.utils
+import inspect
+import logging
+import threading
+import time
+from functools import partial
+from typing import Any, Dict, Iterable, Optional
+
+from .deadline import cap_timeout
+from .wait_queue import WaitQueue
+
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estima tokens de um texto (~4 caracteres por token).
+
+    Args:
+        text: Texto do prompt
+
+    Returns:
+        Número aproximado de tokens (mínimo 1)
+    """
+    return max(1, len(text) // 4)
+
+
+def estimate_prompt_tokens(instructions: Iterable[str], tools: Iterable[Any] = ()) -> int:
+    """
+    Estima os tokens fixos do prompt: instruções e schemas das ferramentas.
+
+    O schema de cada ferramenta é montado a partir do nome, da assinatura e
+    da docstring dos métodos públicos do toolkit, então é o que conta aqui.
+
+    Args:
+        instructions: Instruções do agente
+        tools: Toolkits do agente
+
+    Returns:
+        Número aproximado de tokens enviados em toda chamada
+    """
+    parts = list(instructions)
+    for tool in tools:
+        for name, member in vars(type(tool)).items():
+            if name.startswith("_") or not callable(member):
+                continue
+            parts.append(f"{name}{inspect.signature(member)} {inspect.getdoc(member) or ''}")
+    return estimate_tokens("\n".join(parts))
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Interpreta o header ``Retry-After`` (segundos ou data HTTP).
+
+    Args:
+        value: Valor do header
+
+    Returns:
+        Segundos a esperar ou None se ausente/inválido
+    """
+    if not value:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+def retry_after_from_exception(error: BaseException) -> Optional[float]:
+    """
+    Extrai ``Retry-After`` de exceções de clientes HTTP (httpx, openai...).
+
+    Args:
+        error: Exceção levantada pela chamada
+
+    Returns:
+        Segundos a esperar ou None se a exceção não traz o hint
+    """
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if headers is None:
+        return None
+    return parse_retry_after(headers.get("retry-after"))
+
+
+class _Bucket:
+    """Token bucket com reposição contínua; pode ficar negativo após ajustes."""
+
+    __slots__ = ("capacity", "rate", "tokens")
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = self.capacity
+
+    def refill(self, elapsed: float):
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+
+    def wait_time(self, cost: float) -> float:
+        cost = min(cost, self.capacity)
+        if self.tokens >= cost:
+            return 0.0
+        return (cost - self.tokens) / self.rate
+
+
+class RateLimiter:
+    """
+    Limiter de requisições e tokens por minuto com fila justa.
+
+    ``acquire`` bloqueia a thread; ``aacquire`` é a versão async. As duas
+    compartilham a mesma fila e os mesmos buckets. Chamadas maiores que a
+    capacidade do bucket de tokens esperam o bucket encher e passam.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        name: str = "default"
+    ):
+        """
+        Inicializa limiter.
+
+        Args:
+            requests_per_minute: Limite de requisições por minuto (None = sem limite)
+            tokens_per_minute: Limite de tokens por minuto (None = sem limite)
+            name: Nome do limiter (modelo), usado em logs
+        """
+        self.name = name
+        self._requests = _Bucket(requests_per_minute) if requests_per_minute else None
+        self._tokens = _Bucket(tokens_per_minute) if tokens_per_minute else None
+        self._blocked_until = 0.0
+        self._last_refill = time.monotonic()
+        self._queue = WaitQueue()
+
+        self.stats = {
+            "acquired": 0,
+            "timeouts": 0,
+            "waited": 0,
+            "total_wait_time": 0.0,
+            "tokens": 0,
+            "retry_after_hints": 0
+        }
+
+    def acquire(self, tokens: int = 0, timeout: Optional[float] = None) -> bool:
+        """
+        Espera a vez e consome uma requisição e ``tokens`` tokens.
+
+        O tempo de espera é limitado pelo deadline atual, se houver.
+
+        Args:
+            tokens: Tokens estimados da chamada (prompt + resposta esperada)
+            timeout: Espera máxima em segundos (None = sem limite)
+
+        Returns:
+            True se adquiriu; False se o tempo acabou antes
+
+        Raises:
+            DeadlineExceeded: Se o deadline atual já passou
+        """
+        waited = self._queue.wait_turn(partial(self._try_consume, tokens), cap_timeout(timeout))
+        return self._finish_acquire(tokens, waited)
+
+    async def aacquire(self, tokens: int = 0, timeout: Optional[float] = None) -> bool:
+        """
+        Versão async de ``acquire`` (não bloqueia o event loop).
+
+        O primeiro da fila dorme até o bucket ter saldo; os demais esperam
+        ser acordados quando a fila anda.
+
+        Args:
+            tokens: Tokens estimados da chamada
+            timeout: Espera máxima em segundos (None = sem limite)
+
+        Returns:
+            True se adquiriu; False se o tempo acabou antes
+
+        Raises:
+            DeadlineExceeded: Se o deadline atual já passou
+        """
+        waited = await self._queue.await_turn(partial(self._try_consume, tokens), cap_timeout(timeout))
+        return self._finish_acquire(tokens, waited)
+
+    def record_usage(self, estimated_tokens: int, actual_tokens: int):
+        """
+        Corrige o bucket de tokens com o uso real reportado pelo provedor.
+
+        Args:
+            estimated_tokens: Tokens passados para ``acquire``
+            actual_tokens: Tokens efetivamente consumidos
+        """
+        if self._tokens is None:
+            return
+
+        with self._queue.lock:
+            # acquire nunca cobra mais que a capacidade do bucket
+            estimated_tokens = min(estimated_tokens, int(self._tokens.capacity))
+            self._tokens.tokens -= actual_tokens - estimated_tokens
+            self.stats["tokens"] += actual_tokens - estimated_tokens
+            self._queue.notify()
+
+    def pause(self, seconds: float):
+        """
+        Pausa o limiter (ex: após 429 com ``Retry-After``).
+
+        Args:
+            seconds: Segundos sem liberar chamadas
+        """
+        with self._queue.lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+            self.stats["retry_after_hints"] += 1
+        logger.warning(f"Rate limiter '{self.name}' paused for {seconds:.1f}s (Retry-After)")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Retorna métricas do limiter.
+
+        Returns:
+            Dict com contadores, fila atual e saldo dos buckets
+        """
+        with self._queue.lock:
+            self._refill(time.monotonic())
+            return {
+                "name": self.name,
+                "queued": len(self._queue),
+                "requests_available": self._requests.tokens if self._requests else None,
+                "tokens_available": self._tokens.tokens if self._tokens else None,
+                **self.stats
+            }
+
+    def _finish_acquire(self, tokens: int, waited: Optional[float]) -> bool:
+        """Atualiza métricas com o resultado da espera na fila."""
+        with self._queue.lock:
+            if waited is None:
+                self.stats["timeouts"] += 1
+                return False
+
+            self.stats["acquired"] += 1
+            self.stats["tokens"] += tokens
+            if waited > 0:
+                self.stats["waited"] += 1
+                self.stats["total_wait_time"] += waited
+            return True
+
+    def _try_consume(self, tokens: int, now: float) -> float:
+        """
+        Consome uma requisição e ``tokens`` se há saldo; chamar com o lock.
+
+        Returns:
+            0.0 se consumiu ou segundos até haver saldo
+        """
+        self._refill(now)
+        wait = self._blocked_until - now
+        if self._requests is not None:
+            wait = max(wait, self._requests.wait_time(1))
+        if self._tokens is not None and tokens:
+            wait = max(wait, self._tokens.wait_time(tokens))
+
+        if wait > 0:
+            return wait
+
+        if self._requests is not None:
+            self._requests.tokens -= 1
+        if self._tokens is not None and tokens:
+            self._tokens.tokens -= min(tokens, self._tokens.capacity)
+        return 0.0
+
+    def _refill(self, now: float):
+        """Repõe os buckets pelo tempo decorrido; chamar com o lock."""
+        elapsed = now - self._last_refill
+        self._last_refill = now
+        if self._requests is not None:
+            self._requests.refill(elapsed)
+        if self._tokens is not None:
+            self._tokens.refill(elapsed)
+
+
+# Registry de limiters por modelo, compartilhado entre agentes do processo
+_rate_limiters: Dict[str, RateLimiter] = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(model_id: str, **config) -> RateLimiter:
+    """
+    Retorna o limiter do modelo, criando-o na primeira chamada.
+
+    A configuração só é usada na criação; agentes que usam o mesmo modelo
+    compartilham a mesma instância (e o mesmo orçamento de RPM/TPM).
+
+    Args:
+        model_id: ID do modelo LLM
+        **config: Argumentos de ``RateLimiter``
+
+    Returns:
+        RateLimiter compartilhado
+    """
+    with _rate_limiters_lock:
+        limiter = _rate_limiters.get(model_id)
+        if limiter is None:
+            limiter = RateLimiter(name=model_id, **config)
+            _rate_limiters[model_id] = limiter
+        return limiter
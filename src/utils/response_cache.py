@@ -0,0 +1,329 @@
+"""
+Cache de respostas do agente: tier exato + tier semântico.
+
+O tier exato usa a mensagem normalizada (minúsculas, sem acentos nem
+pontuação, espaços colapsados). O tier semântico reaproveita a resposta de
+uma pergunta parecida quando a similaridade de cosseno entre os embeddings
+passa do limiar. Os dois tiers ficam dentro de um namespace (hash do modelo,
+das instruções e das ferramentas), então mudar o prompt nunca serve
+respostas antigas.
+
+O tier semântico é só um índice para chaves do tier exato (um SimpleCache):
+TTL, eviction e invalidação valem para os dois de uma vez. Ele é opt-in e
+exige um embedding de sentenças de verdade: similaridade léxica não separa
+"plano Premium" de "plano Básico" nem "tem API" de "não tem API".
+"""
+
+import hashlib
+import logging
+import operator
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from .cache import SimpleCache
+
+
+logger = logging.getLogger(__name__)
+
+# Vetor denso ou esparso ({índice: valor}), sempre com norma 1
+Vector = Union[Sequence[float], Dict[int, float]]
+Embedder = Callable[[str], Vector]
+
+_NON_WORD = re.compile(r"[^\w\s]+")
+_NUMBERS = re.compile(r"\d+")
+
+
+def normalize_message(message: str) -> str:
+    """
+    Normaliza a mensagem para a chave do cache.
+
+    Args:
+        message: Mensagem do usuário
+
+    Returns:
+        Texto em minúsculas, sem acentos, sem pontuação e com espaços colapsados
+    """
+    text = unicodedata.normalize("NFKD", message.lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return " ".join(_NON_WORD.sub(" ", text).split())
+
+
+def cache_namespace(model_id: str, instructions: Iterable[str], tools: Iterable[str]) -> str:
+    """
+    Hash do que, além da mensagem, determina a resposta do agente.
+
+    Args:
+        model_id: ID do modelo
+        instructions: Instruções do agente
+        tools: Nomes das ferramentas disponíveis
+
+    Returns:
+        Hash hexadecimal curto (16 caracteres)
+    """
+    digest = hashlib.sha256()
+    for part in (model_id, *instructions, "\0", *sorted(tools)):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\n")
+    return digest.hexdigest()[:16]
+
+
+def sentence_embedder(model_name: str = "paraphrase-multilingual-MiniLM-L12-v2") -> Optional[Embedder]:
+    """
+    Embedding de sentenças local com sentence-transformers, se instalado.
+
+    O modelo é carregado na primeira chamada.
+
+    Args:
+        model_name: Modelo do sentence-transformers
+
+    Returns:
+        Função texto -> vetor normalizado, ou None se a biblioteca não existe
+    """
+    try:
+        import sentence_transformers  # noqa: F401
+    except ImportError:
+        return None
+
+    model = None
+    lock = threading.Lock()
+
+    def embed(text: str) -> List[float]:
+        nonlocal model
+        with lock:
+            if model is None:
+                from sentence_transformers import SentenceTransformer
+                model = SentenceTransformer(model_name)
+        return model.encode(text, normalize_embeddings=True).tolist()
+
+    return embed
+
+
+def _dot(a: Vector, b: Vector) -> float:
+    """Produto interno (= cosseno para vetores normalizados)."""
+    if isinstance(a, dict):
+        if len(a) > len(b):
+            a, b = b, a
+        return sum(v * b.get(i, 0.0) for i, v in a.items())
+    return sum(map(operator.mul, a, b))
+
+
+class ResponseCache:
+    """
+    Cache de respostas com tier exato e semântico.
+
+    Pode ser compartilhado entre agentes: cada um usa o próprio namespace.
+
+    Example:
+        >>> cache = ResponseCache(ttl=3600, semantic=True, similarity_threshold=0.9)
+        >>> hit = cache.lookup(namespace, "Quanto custa o plano Pro?")
+        >>> if hit is None:
+        ...     cache.store(namespace, message, response)
+    """
+
+    def __init__(
+        self,
+        ttl: int = 3600,
+        max_entries: int = 10_000,
+        semantic: bool = False,
+        similarity_threshold: float = 0.9,
+        max_semantic_entries: int = 2_000,
+        embedder: Optional[Embedder] = None
+    ):
+        """
+        Inicializa cache.
+
+        Args:
+            ttl: Tempo de vida das respostas em segundos
+            max_entries: Número máximo de respostas (LRU)
+            semantic: Habilita o tier semântico (exige ``embedder`` ou
+                sentence-transformers instalado; sem eles fica desligado)
+            similarity_threshold: Cosseno mínimo para reaproveitar resposta
+            max_semantic_entries: Perguntas comparadas por namespace
+                (as mais recentes)
+            embedder: Função texto -> vetor normalizado (padrão:
+                ``sentence_embedder()``)
+        """
+        self.ttl = ttl
+        self.similarity_threshold = similarity_threshold
+        self.max_semantic_entries = max_semantic_entries
+        self.embedder = embedder
+        if semantic and self.embedder is None:
+            self.embedder = sentence_embedder()
+            if self.embedder is None:
+                logger.warning(
+                    "sentence-transformers not installed: semantic response cache disabled "
+                    "(only exact matches will be served)"
+                )
+        self.semantic = semantic and self.embedder is not None
+
+        self._exact = SimpleCache(default_ttl=ttl, max_entries=max_entries, index_prefixes=True)
+        # namespace -> {chave exata: (vetor, números da pergunta)}, mais antigas primeiro
+        self._semantic: Dict[str, OrderedDict] = {}
+        self._lock = threading.Lock()
+
+        self.stats = {
+            "exact_hits": 0,
+            "semantic_hits": 0,
+            "misses": 0,
+            "bypassed": 0,
+            "stores": 0,
+            "invalidations": 0
+        }
+
+    def lookup(self, namespace: str, message: str) -> Optional[Tuple[str, str]]:
+        """
+        Procura resposta para a mensagem.
+
+        Args:
+            namespace: Namespace do agente (``cache_namespace``)
+            message: Mensagem do usuário
+
+        Returns:
+            Tuple (resposta, tier "exact" ou "semantic") ou None se miss
+        """
+        normalized = normalize_message(message)
+        response = self._exact.get(self._key(namespace, normalized))
+        if response is not None:
+            self._count("exact_hits")
+            return response, "exact"
+
+        if self.semantic and normalized:
+            response = self._semantic_lookup(namespace, normalized)
+            if response is not None:
+                self._count("semantic_hits")
+                return response, "semantic"
+
+        self._count("misses")
+        return None
+
+    def store(self, namespace: str, message: str, response: str, ttl: Optional[int] = None):
+        """
+        Armazena resposta para a mensagem.
+
+        Args:
+            namespace: Namespace do agente
+            message: Mensagem do usuário
+            response: Resposta (já filtrada pelos guardrails)
+            ttl: TTL em segundos (usa o padrão se None)
+        """
+        normalized = normalize_message(message)
+        key = self._key(namespace, normalized)
+        self._exact.set(key, response, ttl=ttl or self.ttl)
+
+        if self.semantic and normalized:
+            vector = self.embedder(normalized)
+            numbers = _NUMBERS.findall(normalized)
+            with self._lock:
+                entries = self._semantic.get(namespace)
+                if entries is None:
+                    entries = self._semantic[namespace] = OrderedDict()
+                # Guardar de novo a mesma mensagem substitui a entrada antiga
+                entries.pop(key, None)
+                entries[key] = (vector, numbers)
+                if len(entries) > self.max_semantic_entries:
+                    entries.popitem(last=False)
+
+        self._count("stores")
+
+    def record_bypass(self):
+        """Conta uma requisição que não pôde usar o cache."""
+        self._count("bypassed")
+
+    def invalidate(self, namespace: Optional[str] = None, message: Optional[str] = None) -> int:
+        """
+        Remove respostas do cache (ex: após mudar preços ou o catálogo).
+
+        Args:
+            namespace: Só este namespace (None = todos)
+            message: Só esta mensagem (exige ``namespace``)
+
+        Returns:
+            Número de respostas removidas
+        """
+        if message is not None:
+            if namespace is None:
+                raise ValueError("namespace is required to invalidate a message")
+            key = self._key(namespace, normalize_message(message))
+            # delete_many não conta como hit/miss nas estatísticas do tier exato
+            removed = self._exact.delete_many((key,))
+            self._forget(namespace, key)
+        elif namespace is not None:
+            removed = self._exact.invalidate_prefix(f"{namespace}:")
+            with self._lock:
+                self._semantic.pop(namespace, None)
+        else:
+            removed = len(self._exact)
+            self._exact.clear()
+            with self._lock:
+                self._semantic.clear()
+
+        self._count("invalidations", removed)
+        logger.info(f"Response cache invalidated: {removed} entries")
+        return removed
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Retorna métricas do cache.
+
+        Returns:
+            Dict com contadores, hit rate e entradas armazenadas
+        """
+        with self._lock:
+            stats = dict(self.stats)
+            semantic_entries = sum(len(entries) for entries in self._semantic.values())
+
+        hits = stats["exact_hits"] + stats["semantic_hits"]
+        lookups = hits + stats["misses"]
+        return {
+            **stats,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "entries": len(self._exact),
+            "semantic_entries": semantic_entries
+        }
+
+    def _semantic_lookup(self, namespace: str, normalized: str) -> Optional[str]:
+        """Resposta da pergunta mais parecida acima do limiar, se houver."""
+        with self._lock:
+            entries = list(self._semantic.get(namespace, {}).items())
+        if not entries:
+            return None
+
+        vector = self.embedder(normalized)
+        numbers = _NUMBERS.findall(normalized)
+
+        # Perguntas com números diferentes ("10 usuários" vs "100 usuários")
+        # nunca compartilham resposta, por mais parecido que seja o texto
+        best_score, best_key = 0.0, None
+        for key, (stored_vector, stored_numbers) in entries:
+            if stored_numbers != numbers:
+                continue
+            score = _dot(vector, stored_vector)
+            if score > best_score:
+                best_score, best_key = score, key
+
+        if best_key is None or best_score < self.similarity_threshold:
+            return None
+
+        response = self._exact.get(best_key)
+        if response is None:
+            self._forget(namespace, best_key)
+        return response
+
+    def _forget(self, namespace: str, key: str):
+        """Remove uma chave do índice semântico (expirada ou invalidada)."""
+        with self._lock:
+            entries = self._semantic.get(namespace)
+            if entries is not None:
+                entries.pop(key, None)
+
+    def _count(self, stat: str, amount: int = 1):
+        with self._lock:
+            self.stats[stat] += amount
+
+    @staticmethod
+    def _key(namespace: str, normalized: str) -> str:
+        digest = hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+        return f"{namespace}:{digest}"
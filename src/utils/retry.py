@@ -1,30 +1,182 @@
 """
-Utilitários de retry com backoff exponencial.
+Utilitários de resiliência: retry com backoff, circuit breaker e hedged requests.
 """
 
+import asyncio
+import contextvars
+import inspect
+import random
+import threading
 import time
 import logging
-from typing import Callable, Any, List, Type
+from collections import deque
+from concurrent import futures
+from typing import Callable, Any, Dict, Iterator, List, Optional, Type
 from functools import wraps
 
+from .deadline import DeadlineExceeded, cap_timeout, check_deadline, remaining_time
+from .wait_queue import WaitQueue
+
 
 logger = logging.getLogger(__name__)
 
 
+class RetryBudget:
+    """
+    Orçamento global de retries (token bucket).
+
+    Cada chamada bem-sucedida deposita ``ratio`` tokens e cada retry
+    consome 1, então retries ficam limitados a ~``ratio`` das chamadas
+    recentes com sucesso. O bucket começa quase vazio (``initial_tokens``)
+    e ``min_retries_per_second`` é só um piso baixo para serviços de pouco
+    tráfego: a capacidade vem dos sucessos, então um processo recém-iniciado
+    contra um provedor fora do ar não dispara uma rajada de retries. Quando
+    o orçamento acaba, falhas são propagadas na hora em vez de aumentar a
+    carga sobre um provedor já degradado.
+
+    Compartilhe uma instância entre todas as chamadas a uma dependência.
+    """
+
+    def __init__(
+        self,
+        ratio: float = 0.1,
+        min_retries_per_second: float = 0.1,
+        max_tokens: float = 100.0,
+        initial_tokens: float = 1.0
+    ):
+        """
+        Inicializa orçamento.
+
+        Args:
+            ratio: Retries permitidos por chamada com sucesso (0.1 = 10%)
+            min_retries_per_second: Reposição mínima de tokens por segundo
+                (0.1 = um retry a cada 10s sem nenhum sucesso)
+            max_tokens: Máximo de tokens acumulados (limita rajadas)
+            initial_tokens: Tokens no início (limitado a ``max_tokens``)
+        """
+        self.ratio = ratio
+        self.min_retries_per_second = min_retries_per_second
+        self.max_tokens = max_tokens
+        self._tokens = min(initial_tokens, max_tokens)
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+        self.stats = {
+            "successes": 0,
+            "retries_allowed": 0,
+            "retries_rejected": 0
+        }
+
+    def record_success(self):
+        """Deposita tokens referentes a uma chamada bem-sucedida."""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+            self.stats["successes"] += 1
+
+    def try_acquire(self) -> bool:
+        """
+        Tenta consumir um token para um retry.
+
+        Returns:
+            True se o retry é permitido
+        """
+        with self._lock:
+            self._refill()
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                self.stats["retries_allowed"] += 1
+                return True
+
+            self.stats["retries_rejected"] += 1
+            return False
+
+    @property
+    def available(self) -> float:
+        """Tokens disponíveis no momento."""
+        with self._lock:
+            self._refill()
+            return self._tokens
+
+    def _refill(self):
+        """Repõe tokens pelo tempo decorrido; chamar com o lock."""
+        now = time.monotonic()
+        elapsed = now - self._last_refill
+        self._last_refill = now
+        self._tokens = min(self.max_tokens, self._tokens + elapsed * self.min_retries_per_second)
+
+
+def backoff_delays(
+    initial_delay: float = 1.0,
+    backoff_factor: float = 2.0,
+    jitter: Optional[str] = None,
+    max_delay: Optional[float] = None
+) -> Iterator[float]:
+    """
+    Gera a sequência de delays entre tentativas.
+
+    Args:
+        initial_delay: Delay inicial em segundos
+        backoff_factor: Fator de multiplicação do delay
+        jitter: None (determinístico), "full" (uniforme entre 0 e o delay
+            exponencial) ou "decorrelated" (uniforme entre o delay inicial e
+            3x o delay anterior)
+        max_delay: Teto para cada delay (None = sem teto)
+
+    Yields:
+        Delay em segundos para cada retry
+    """
+    if jitter not in (None, "full", "decorrelated"):
+        raise ValueError(f"Unknown jitter mode: {jitter}")
+
+    cap = max_delay if max_delay is not None else float("inf")
+    base = initial_delay
+    previous = initial_delay
+
+    while True:
+        if jitter == "full":
+            yield random.uniform(0, min(cap, base))
+        elif jitter == "decorrelated":
+            previous = min(cap, random.uniform(initial_delay, previous * 3))
+            yield previous
+        else:
+            yield min(cap, base)
+        base *= backoff_factor
+
+
 def retry_with_backoff(
     max_retries: int = 3,
     initial_delay: float = 1.0,
     backoff_factor: float = 2.0,
-    exceptions: List[Type[Exception]] = None
+    exceptions: List[Type[Exception]] = None,
+    jitter: Optional[str] = "full",
+    max_delay: Optional[float] = None,
+    budget: Optional[RetryBudget] = None
 ):
     """
     Decorator para retry com backoff exponencial.
 
+    Funções coroutine são detectadas automaticamente: o wrapper vira uma
+    coroutine que espera com ``asyncio.sleep`` (sem bloquear o event loop)
+    e propaga ``CancelledError`` imediatamente, inclusive durante o backoff.
+
+    Por padrão usa full jitter, então workers que falham juntos não tentam
+    de novo em sincronia; ``jitter=None`` dá delays determinísticos
+    (``initial_delay * backoff_factor ** n``). Com ``budget``, cada retry consome do orçamento
+    compartilhado; sem saldo, a exceção é propagada sem novo retry.
+
+    Dentro de um ``deadline`` (ver ``src.utils.deadline``), retries cujo
+    backoff passaria do tempo restante não são feitos, e
+    ``DeadlineExceeded`` nunca é repetida.
+
     Args:
         max_retries: Número máximo de tentativas
         initial_delay: Delay inicial em segundos
         backoff_factor: Fator de multiplicação do delay
         exceptions: Lista de exceções que devem causar retry
+        jitter: "full" (padrão), "decorrelated" ou None (ver ``backoff_delays``)
+        max_delay: Teto para cada delay em segundos
+        budget: RetryBudget compartilhado (opcional)
 
     Returns:
         Decorator function
@@ -32,33 +184,86 @@ def retry_with_backoff(
     if exceptions is None:
         exceptions = [Exception]
 
+    retry_on = tuple(exceptions)
+
+    def _on_failure(func: Callable, attempt: int, delay: float, e: Exception) -> bool:
+        """Loga a falha; retorna True se deve tentar de novo."""
+        if attempt == max_retries:
+            logger.error(
+                f"Failed after {max_retries} retries: {func.__name__}",
+                exc_info=True
+            )
+            return False
+
+        if isinstance(e, DeadlineExceeded):
+            return False
+
+        remaining = remaining_time()
+        if remaining is not None and delay >= remaining:
+            logger.warning(
+                f"Attempt {attempt + 1}/{max_retries} failed for {func.__name__}: {e}. "
+                f"Not retrying, only {max(remaining, 0):.2f}s left before deadline"
+            )
+            return False
+
+        if budget is not None and not budget.try_acquire():
+            logger.warning(
+                f"Retry budget exhausted for {func.__name__}: {e}. Not retrying"
+            )
+            return False
+
+        logger.warning(
+            f"Attempt {attempt + 1}/{max_retries} failed for {func.__name__}: {e}. "
+            f"Retrying in {delay:.2f}s..."
+        )
+        return True
+
+    def _on_success():
+        if budget is not None:
+            budget.record_success()
+
     def decorator(func: Callable) -> Callable:
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs) -> Any:
+                delays = backoff_delays(initial_delay, backoff_factor, jitter, max_delay)
+
+                for attempt in range(max_retries + 1):
+                    delay = next(delays)
+                    check_deadline()
+                    try:
+                        result = await func(*args, **kwargs)
+                        _on_success()
+                        return result
+
+                    except retry_on as e:
+                        if not _on_failure(func, attempt, delay, e):
+                            raise
+
+                    await asyncio.sleep(delay)
+
+            return async_wrapper
+
         @wraps(func)
         def wrapper(*args, **kwargs) -> Any:
-            delay = initial_delay
+            delays = backoff_delays(initial_delay, backoff_factor, jitter, max_delay)
             last_exception = None
 
             for attempt in range(max_retries + 1):
+                delay = next(delays)
+                check_deadline()
                 try:
-                    return func(*args, **kwargs)
+                    result = func(*args, **kwargs)
+                    _on_success()
+                    return result
 
-                except tuple(exceptions) as e:
+                except retry_on as e:
                     last_exception = e
 
-                    if attempt == max_retries:
-                        logger.error(
-                            f"Failed after {max_retries} retries: {func.__name__}",
-                            exc_info=True
-                        )
+                    if not _on_failure(func, attempt, delay, e):
                         raise
 
-                    logger.warning(
-                        f"Attempt {attempt + 1}/{max_retries} failed for {func.__name__}: {e}. "
-                        f"Retrying in {delay}s..."
-                    )
-
                     time.sleep(delay)
-                    delay *= backoff_factor
 
             # Should never reach here, but just in case
             raise last_exception
@@ -67,59 +272,956 @@ def retry_with_backoff(
     return decorator
 
 
+class CircuitBreakerOpenError(Exception):
+    """Chamada rejeitada porque o circuit breaker está OPEN."""
+    pass
+
+
+class _SlidingWindow:
+    """
+    Janela deslizante de resultados de chamadas.
+
+    ``kind="count"`` guarda as últimas ``size`` chamadas; ``kind="time"``
+    guarda as chamadas dos últimos ``size`` segundos. Os totais são
+    mantidos incrementalmente, então registrar e consultar é O(1) amortizado.
+    """
+
+    def __init__(self, kind: str, size: float):
+        if kind not in ("count", "time"):
+            raise ValueError(f"Unknown window type: {kind}")
+
+        self.kind = kind
+        self.size = size
+        self._outcomes: deque = deque()  # (instante, falhou, lenta)
+        self.calls = 0
+        self.failures = 0
+        self.slow_calls = 0
+
+    def record(self, failed: bool, slow: bool, now: float):
+        """Registra o resultado de uma chamada."""
+        self._outcomes.append((now, failed, slow))
+        self.calls += 1
+        self.failures += failed
+        self.slow_calls += slow
+        self.prune(now)
+
+    def prune(self, now: float):
+        """Remove resultados que saíram da janela."""
+        outcomes = self._outcomes
+        if self.kind == "count":
+            while len(outcomes) > self.size:
+                self._drop_oldest()
+        else:
+            horizon = now - self.size
+            while outcomes and outcomes[0][0] <= horizon:
+                self._drop_oldest()
+
+    def reset(self):
+        """Esvazia a janela."""
+        self._outcomes.clear()
+        self.calls = self.failures = self.slow_calls = 0
+
+    def _drop_oldest(self):
+        _, failed, slow = self._outcomes.popleft()
+        self.calls -= 1
+        self.failures -= failed
+        self.slow_calls -= slow
+
+
 class CircuitBreaker:
     """
-    Implementação simples de Circuit Breaker pattern.
+    Circuit Breaker com janela deslizante.
 
     Estados:
     - CLOSED: Normal, permite chamadas
     - OPEN: Muitas falhas, bloqueia chamadas
     - HALF_OPEN: Testando recuperação
+
+    Falhas são contadas só dentro da janela (últimas N chamadas ou últimos
+    N segundos), então falhas esparsas não acumulam até abrir o circuito.
+    O circuito abre quando a janela tem ``failure_threshold`` falhas ou,
+    se configurado, quando a taxa de falhas ou de chamadas lentas passa do
+    limite depois de ``minimum_calls`` chamadas. Em HALF_OPEN, só
+    ``success_threshold`` chamadas de teste são liberadas por vez.
+
+    ``call`` aceita funções comuns e coroutine; ``acall`` é a versão
+    explícita para código async. As duas compartilham o mesmo estado, e
+    todas as transições acontecem sob um lock. Em HALF_OPEN, só o resultado
+    das chamadas de teste decide o estado: chamadas liberadas antes de o
+    circuito abrir que terminam depois não fecham nem reabrem o circuito.
+    Chamadas feitas com o deadline já expirado são rejeitadas antes de
+    chegar à dependência, e ``DeadlineExceeded`` não conta como falha dela.
     """
 
     def __init__(
         self,
         failure_threshold: int = 5,
         success_threshold: int = 2,
-        timeout: float = 60.0
+        timeout: float = 60.0,
+        window_size: float = 100,
+        window_type: str = "count",
+        failure_rate_threshold: Optional[float] = None,
+        minimum_calls: int = 10,
+        slow_call_duration: Optional[float] = None,
+        slow_call_rate_threshold: float = 1.0,
+        name: str = "default"
     ):
+        """
+        Inicializa circuit breaker.
+
+        Args:
+            failure_threshold: Falhas na janela que abrem o circuito
+            success_threshold: Sucessos em HALF_OPEN para fechar o circuito
+            timeout: Segundos em OPEN antes de testar recuperação
+            window_size: Chamadas ("count") ou segundos ("time") na janela
+            window_type: "count" ou "time"
+            failure_rate_threshold: Taxa de falhas (0-1) que abre o circuito
+                (None = só ``failure_threshold``)
+            minimum_calls: Chamadas na janela antes de avaliar taxas
+            slow_call_duration: Duração em segundos a partir da qual a
+                chamada é lenta (None = não mede)
+            slow_call_rate_threshold: Taxa de chamadas lentas que abre o circuito
+            name: Nome da dependência (usado em logs e no registry)
+        """
+        self.name = name
         self.failure_threshold = failure_threshold
         self.success_threshold = success_threshold
         self.timeout = timeout
-        self.failure_count = 0
+        self.failure_rate_threshold = failure_rate_threshold
+        self.minimum_calls = minimum_calls
+        self.slow_call_duration = slow_call_duration
+        self.slow_call_rate_threshold = slow_call_rate_threshold
         self.success_count = 0
         self.last_failure_time = None
         self.state = "CLOSED"
 
+        self._window = _SlidingWindow(window_type, window_size)
+        self._opened_at = 0.0
+        self._half_open_in_flight = 0
+        # Incrementa a cada entrada em HALF_OPEN; identifica as chamadas de teste
+        self._probe_generation = 0
+        self._lock = threading.Lock()
+
+        self.stats = {
+            "calls": 0,
+            "failures": 0,
+            "slow_calls": 0,
+            "rejected": 0,
+            "opened": 0
+        }
+
+    @property
+    def failure_count(self) -> int:
+        """Falhas dentro da janela atual."""
+        with self._lock:
+            self._window.prune(time.monotonic())
+            return self._window.failures
+
+    @failure_count.setter
+    def failure_count(self, value: int):
+        """Substitui as falhas da janela (ex: ``breaker.failure_count = 0`` zera o contador)."""
+        if value < 0:
+            raise ValueError("failure_count must be >= 0")
+
+        with self._lock:
+            now = time.monotonic()
+            self._window.reset()
+            for _ in range(value):
+                self._window.record(True, False, now)
+
     def call(self, func: Callable, *args, **kwargs) -> Any:
-        """Executa função através do circuit breaker."""
-        if self.state == "OPEN":
-            if time.time() - self.last_failure_time >= self.timeout:
-                logger.info("Circuit breaker transitioning to HALF_OPEN")
-                self.state = "HALF_OPEN"
-                self.success_count = 0
-            else:
-                raise Exception("Circuit breaker is OPEN")
+        """
+        Executa função através do circuit breaker.
+
+        Se ``func`` é uma função coroutine, retorna a coroutine de ``acall``.
+        """
+        if inspect.iscoroutinefunction(func):
+            return self.acall(func, *args, **kwargs)
+
+        check_deadline()
+        probe = self._before_call()
+        start = time.monotonic()
 
         try:
             result = func(*args, **kwargs)
+        except DeadlineExceeded:
+            self._release(probe)
+            raise
+        except Exception:
+            self._on_failure(start, probe)
+            raise
+        except BaseException:
+            self._release(probe)
+            raise
+
+        self._on_success(start, probe)
+        return result
+
+    async def acall(self, func: Callable, *args, **kwargs) -> Any:
+        """Executa função coroutine através do circuit breaker."""
+        check_deadline()
+        probe = self._before_call()
+        start = time.monotonic()
+
+        try:
+            result = await func(*args, **kwargs)
+        except (asyncio.CancelledError, DeadlineExceeded):
+            # Cancelamento e fim do orçamento não são falhas da dependência
+            self._release(probe)
+            raise
+        except Exception:
+            self._on_failure(start, probe)
+            raise
+
+        self._on_success(start, probe)
+        return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Retorna estado e métricas da janela atual.
 
-            # Sucesso
+        Returns:
+            Dict com estado, contadores e taxas
+        """
+        with self._lock:
+            window = self._window
+            window.prune(time.monotonic())
+            return {
+                "name": self.name,
+                "state": self.state,
+                "window_calls": window.calls,
+                "window_failures": window.failures,
+                "window_slow_calls": window.slow_calls,
+                "failure_rate": window.failures / window.calls if window.calls else 0.0,
+                **self.stats
+            }
+
+    def _before_call(self) -> Optional[int]:
+        """
+        Verifica se a chamada é permitida, transicionando OPEN → HALF_OPEN.
+
+        Returns:
+            Geração do HALF_OPEN se a chamada é de teste, None caso contrário
+        """
+        probe = None
+        with self._lock:
+            if self.state == "OPEN":
+                if time.monotonic() - self._opened_at < self.timeout:
+                    self.stats["rejected"] += 1
+                    raise CircuitBreakerOpenError(f"Circuit breaker '{self.name}' is OPEN")
+
+                logger.info(f"Circuit breaker '{self.name}' transitioning to HALF_OPEN")
+                self.state = "HALF_OPEN"
+                self.success_count = 0
+                self._half_open_in_flight = 0
+                self._probe_generation += 1
+
+            if self.state == "HALF_OPEN":
+                if self._half_open_in_flight >= self.success_threshold:
+                    self.stats["rejected"] += 1
+                    raise CircuitBreakerOpenError(
+                        f"Circuit breaker '{self.name}' is HALF_OPEN and testing recovery"
+                    )
+                self._half_open_in_flight += 1
+                probe = self._probe_generation
+
+            self.stats["calls"] += 1
+        return probe
+
+    def _release(self, probe: Optional[int]):
+        """Devolve a vaga de teste de uma chamada sem resultado."""
+        with self._lock:
+            self._settle_probe(probe)
+
+    def _settle_probe(self, probe: Optional[int]) -> bool:
+        """
+        Libera a vaga da chamada de teste do HALF_OPEN atual; chamar com o lock.
+
+        Returns:
+            True se a chamada é um teste do HALF_OPEN atual
+        """
+        if probe is None or self.state != "HALF_OPEN" or probe != self._probe_generation:
+            return False
+        self._half_open_in_flight -= 1
+        return True
+
+    def _on_success(self, start: float, probe: Optional[int] = None):
+        """Registra sucesso."""
+        now = time.monotonic()
+        slow = self._is_slow(start, now)
+
+        with self._lock:
             if self.state == "HALF_OPEN":
+                self.stats["slow_calls"] += slow
+                if not self._settle_probe(probe):
+                    return
+                if slow:
+                    self._trip(now)
+                    return
+
                 self.success_count += 1
                 if self.success_count >= self.success_threshold:
-                    logger.info("Circuit breaker transitioning to CLOSED")
+                    logger.info(f"Circuit breaker '{self.name}' transitioning to CLOSED")
                     self.state = "CLOSED"
-                    self.failure_count = 0
+                    self._window.reset()
+                return
+
+            self.stats["slow_calls"] += slow
+            self._record(False, slow, now)
 
-            return result
+    def _on_failure(self, start: float, probe: Optional[int] = None):
+        """Registra falha."""
+        now = time.monotonic()
+        slow = self._is_slow(start, now)
 
-        except Exception as e:
-            self.failure_count += 1
+        with self._lock:
+            self.stats["failures"] += 1
+            self.stats["slow_calls"] += slow
             self.last_failure_time = time.time()
 
-            if self.failure_count >= self.failure_threshold:
-                logger.warning("Circuit breaker transitioning to OPEN")
-                self.state = "OPEN"
+            if self.state == "HALF_OPEN":
+                if self._settle_probe(probe):
+                    self._trip(now)
+                return
+
+            self._record(True, slow, now)
+
+    def _is_slow(self, start: float, now: float) -> bool:
+        return self.slow_call_duration is not None and now - start >= self.slow_call_duration
+
+    def _record(self, failed: bool, slow: bool, now: float):
+        """Registra resultado em CLOSED e abre o circuito se preciso; chamar com o lock."""
+        if self.state != "CLOSED":
+            return
+
+        window = self._window
+        window.record(failed, slow, now)
+
+        if window.failures >= self.failure_threshold:
+            self._trip(now)
+            return
+
+        if window.calls < self.minimum_calls:
+            return
+
+        if (
+            self.failure_rate_threshold is not None
+            and window.failures / window.calls >= self.failure_rate_threshold
+        ):
+            self._trip(now)
+        elif (
+            self.slow_call_duration is not None
+            and window.slow_calls / window.calls >= self.slow_call_rate_threshold
+        ):
+            self._trip(now)
+
+    def _trip(self, now: float):
+        """Abre o circuito; chamar com o lock."""
+        logger.warning(f"Circuit breaker '{self.name}' transitioning to OPEN")
+        self.state = "OPEN"
+        self._opened_at = now
+        self._window.reset()
+        self.stats["opened"] += 1
+
+
+# Registry de breakers por dependência (modelo LLM, endpoint do CRM, vector store...)
+_circuit_breakers: Dict[str, CircuitBreaker] = {}
+_circuit_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(name: str, **config) -> CircuitBreaker:
+    """
+    Retorna o circuit breaker da dependência, criando-o na primeira chamada.
+
+    A configuração só é usada na criação; chamadas seguintes com o mesmo
+    nome retornam a mesma instância.
+
+    Args:
+        name: Chave da dependência (ex: "llm:gpt-4o", "crm:/leads")
+        **config: Argumentos de ``CircuitBreaker``
+
+    Returns:
+        CircuitBreaker compartilhado
+    """
+    with _circuit_breakers_lock:
+        breaker = _circuit_breakers.get(name)
+        if breaker is None:
+            breaker = CircuitBreaker(name=name, **config)
+            _circuit_breakers[name] = breaker
+        return breaker
+
+
+def circuit_breaker_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Retorna estatísticas de todos os circuit breakers registrados.
+
+    Returns:
+        Dict nome -> estatísticas
+    """
+    with _circuit_breakers_lock:
+        breakers = list(_circuit_breakers.values())
+    return {breaker.name: breaker.get_stats() for breaker in breakers}
+
+
+class _LatencyTracker:
+    """Latências recentes de uma chave, com percentil recalculado sob demanda."""
+
+    __slots__ = ("samples", "_sorted", "_dirty")
+
+    def __init__(self, window: int):
+        self.samples: deque = deque(maxlen=window)
+        self._sorted: List[float] = []
+        self._dirty = False
+
+    def add(self, latency: float):
+        self.samples.append(latency)
+        self._dirty = True
+
+    def percentile(self, p: float) -> float:
+        if self._dirty:
+            self._sorted = sorted(self.samples)
+            self._dirty = False
+        index = min(len(self._sorted) - 1, int(len(self._sorted) * p / 100))
+        return self._sorted[index]
 
-            raise e
+
+class Hedger:
+    """
+    Hedged requests para chamadas idempotentes.
+
+    Dispara a chamada e, se ela passar do percentil ``percentile`` das
+    latências recentes da mesma chave, dispara uma segunda tentativa. O
+    primeiro resultado com sucesso vence e a outra tentativa é cancelada
+    (tasks asyncio são canceladas de fato; em threads o cancelamento só
+    evita iniciar a tentativa, e o resultado atrasado é descartado).
+
+    ``max_hedge_rate`` limita a fração de chamadas que geram hedge, para
+    que uma degradação geral do upstream não dobre a carga sobre ele.
+
+    O hedge não é disparado se o deadline atual terminaria antes dele, e
+    as threads herdam o contexto (deadline incluso) de quem chamou.
+
+    Use somente com operações idempotentes (leituras, buscas, embeddings).
+    """
+
+    def __init__(
+        self,
+        percentile: float = 95.0,
+        max_hedge_rate: float = 0.1,
+        min_samples: int = 20,
+        min_delay: float = 0.0,
+        window: int = 256,
+        max_workers: int = 32
+    ):
+        """
+        Inicializa hedger.
+
+        Args:
+            percentile: Percentil de latência que dispara o hedge
+            max_hedge_rate: Fração máxima de chamadas com hedge (0-1)
+            min_samples: Amostras por chave antes de começar a fazer hedge
+            min_delay: Espera mínima em segundos antes do hedge
+            window: Latências recentes mantidas por chave
+            max_workers: Threads do pool usado pelas chamadas síncronas
+        """
+        self.percentile = percentile
+        self.max_hedge_rate = max_hedge_rate
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.window = window
+        self.max_workers = max_workers
+
+        self._trackers: Dict[str, _LatencyTracker] = {}
+        self._lock = threading.Lock()
+        self._executor = None
+
+        self.stats = {
+            "calls": 0,
+            "hedges": 0,
+            "hedge_wins": 0,
+            "primary_wins": 0,
+            "rate_limited": 0
+        }
+
+    def hedge_delay(self, key: str) -> Optional[float]:
+        """
+        Retorna quanto esperar antes do hedge para a chave.
+
+        Args:
+            key: Chave da operação (ex: "crm:get_customer")
+
+        Returns:
+            Delay em segundos ou None se ainda não há amostras suficientes
+        """
+        with self._lock:
+            tracker = self._trackers.get(key)
+            if tracker is None or len(tracker.samples) < self.min_samples:
+                return None
+            return max(self.min_delay, tracker.percentile(self.percentile))
+
+    def call(self, key: str, func: Callable, *args, **kwargs) -> Any:
+        """
+        Executa ``func`` com hedge, usando um pool de threads.
+
+        Se ``func`` é uma função coroutine, retorna a coroutine de ``acall``.
+
+        Args:
+            key: Chave da operação para o histórico de latência
+            func: Função idempotente
+            *args, **kwargs: Argumentos de ``func``
+
+        Returns:
+            Resultado da primeira tentativa bem-sucedida
+        """
+        if inspect.iscoroutinefunction(func):
+            return self.acall(key, func, *args, **kwargs)
+
+        delay = self._start_call(key)
+        executor = self._get_executor()
+        start = time.monotonic()
+        primary = executor.submit(contextvars.copy_context().run, func, *args, **kwargs)
+
+        if delay is None:
+            return self._finish(key, start, primary.result(), hedged=False)
+
+        done, _ = futures.wait([primary], timeout=delay)
+        if done or not self._allow_hedge():
+            return self._finish(key, start, primary.result(), hedged=False)
+
+        backup = executor.submit(contextvars.copy_context().run, func, *args, **kwargs)
+        pending = {primary, backup}
+        error = None
+
+        while pending:
+            done, pending = futures.wait(pending, return_when=futures.FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    for loser in pending:
+                        loser.cancel()
+                    return self._finish(key, start, future.result(), hedged=future is backup)
+                error = future.exception()
+
+        raise error
+
+    async def acall(self, key: str, func: Callable, *args, **kwargs) -> Any:
+        """
+        Executa a função coroutine ``func`` com hedge.
+
+        Args:
+            key: Chave da operação para o histórico de latência
+            func: Função coroutine idempotente
+            *args, **kwargs: Argumentos de ``func``
+
+        Returns:
+            Resultado da primeira tentativa bem-sucedida
+        """
+        delay = self._start_call(key)
+        start = time.monotonic()
+        primary = asyncio.ensure_future(func(*args, **kwargs))
+
+        if delay is None:
+            return self._finish(key, start, await primary, hedged=False)
+
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+            if done or not self._allow_hedge():
+                return self._finish(key, start, await primary, hedged=False)
+
+            backup = asyncio.ensure_future(func(*args, **kwargs))
+        except BaseException:
+            primary.cancel()
+            raise
+
+        pending = {primary, backup}
+        error = None
+
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if not task.cancelled() and task.exception() is None:
+                        return self._finish(key, start, task.result(), hedged=task is backup)
+                    error = task.exception() if not task.cancelled() else asyncio.CancelledError()
+        finally:
+            for task in pending:
+                task.cancel()
+
+        raise error
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Retorna métricas de hedge.
+
+        Returns:
+            Dict com contadores, taxa de hedge e taxa de vitória do hedge
+        """
+        with self._lock:
+            stats = dict(self.stats)
+        stats["hedge_rate"] = stats["hedges"] / stats["calls"] if stats["calls"] else 0.0
+        stats["hedge_win_rate"] = stats["hedge_wins"] / stats["hedges"] if stats["hedges"] else 0.0
+        return stats
+
+    def shutdown(self):
+        """Encerra o pool de threads das chamadas síncronas."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _start_call(self, key: str) -> Optional[float]:
+        with self._lock:
+            self.stats["calls"] += 1
+
+        delay = self.hedge_delay(key)
+        remaining = remaining_time()
+        if delay is not None and remaining is not None and delay >= remaining:
+            return None
+        return delay
+
+    def _allow_hedge(self) -> bool:
+        """Reserva um hedge se a taxa ainda está abaixo do limite."""
+        with self._lock:
+            if self.stats["hedges"] + 1 > self.max_hedge_rate * self.stats["calls"]:
+                self.stats["rate_limited"] += 1
+                return False
+            self.stats["hedges"] += 1
+            return True
+
+    def _finish(self, key: str, start: float, result: Any, hedged: bool) -> Any:
+        """Registra a latência observada e quem venceu."""
+        latency = time.monotonic() - start
+        with self._lock:
+            tracker = self._trackers.get(key)
+            if tracker is None:
+                tracker = self._trackers[key] = _LatencyTracker(self.window)
+            tracker.add(latency)
+            self.stats["hedge_wins" if hedged else "primary_wins"] += 1
+        return result
+
+    def _get_executor(self) -> futures.ThreadPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = futures.ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix="hedge"
+                    )
+        return self._executor
+
+
+def hedged(
+    key: Optional[str] = None,
+    hedger: Optional[Hedger] = None,
+    **config
+):
+    """
+    Decorator que executa a função através de um ``Hedger``.
+
+    Funções coroutine são detectadas automaticamente.
+
+    Args:
+        key: Chave do histórico de latência (padrão: nome qualificado da função)
+        hedger: Hedger compartilhado (padrão: um novo, com ``**config``)
+        **config: Argumentos de ``Hedger``
+
+    Returns:
+        Decorator function
+    """
+    def decorator(func: Callable) -> Callable:
+        instance = hedger if hedger is not None else Hedger(**config)
+        name = key or func.__qualname__
+
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs) -> Any:
+                return await instance.acall(name, func, *args, **kwargs)
+
+            async_wrapper.hedger = instance
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs) -> Any:
+            return instance.call(name, func, *args, **kwargs)
+
+        wrapper.hedger = instance
+        return wrapper
+    return decorator
+
+
+class ConcurrencyLimitExceeded(Exception):
+    """Chamada não conseguiu vaga no limiter de concorrência a tempo."""
+    pass
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Limite de chamadas simultâneas ajustado por AIMD.
+
+    Enquanto a latência fica perto da mínima observada recentemente e o
+    limite está sendo usado, ele cresce ~1 a cada ``limit`` sucessos
+    (aumento aditivo). Erros e timeouts multiplicam o limite por
+    ``backoff_ratio`` (redução multiplicativa), no máximo uma vez por
+    rodada: falhas de chamadas iniciadas antes da última redução são
+    ignoradas.
+
+    Quem não consegue vaga espera numa fila FIFO (compartilhada entre
+    ``call`` e ``acall``) por até ``max_wait`` segundos, limitado pelo
+    deadline atual.
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 10,
+        min_limit: int = 1,
+        max_limit: int = 200,
+        backoff_ratio: float = 0.5,
+        latency_tolerance: float = 2.0,
+        latency_window: int = 200,
+        max_wait: Optional[float] = None,
+        exceptions: List[Type[Exception]] = None,
+        name: str = "default"
+    ):
+        """
+        Inicializa limiter.
+
+        Args:
+            initial_limit: Limite inicial de chamadas simultâneas
+            min_limit: Limite mínimo
+            max_limit: Limite máximo
+            backoff_ratio: Fator aplicado ao limite em erros/timeouts
+            latency_tolerance: Múltiplo da latência mínima ainda considerado
+                saudável (acima disso o limite para de crescer)
+            latency_window: Latências recentes usadas para a mínima
+            max_wait: Espera máxima por uma vaga em segundos (None = sem limite)
+            exceptions: Exceções que contam como sobrecarga do upstream
+            name: Nome da dependência (usado em logs e no registry)
+        """
+        self.name = name
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff_ratio = backoff_ratio
+        self.latency_tolerance = latency_tolerance
+        self.max_wait = max_wait
+        self.exceptions = tuple(exceptions) if exceptions else (Exception,)
+
+        self._limit = float(max(min_limit, min(initial_limit, max_limit)))
+        self._in_flight = 0
+        self._latencies: deque = deque(maxlen=latency_window)
+        self._last_decrease = 0.0
+        self._queue = WaitQueue()
+
+        self.stats = {
+            "calls": 0,
+            "errors": 0,
+            "rejected": 0,
+            "increases": 0,
+            "decreases": 0
+        }
+
+    @property
+    def limit(self) -> int:
+        """Limite atual de chamadas simultâneas."""
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        """Chamadas em andamento."""
+        return self._in_flight
+
+    @property
+    def queue_depth(self) -> int:
+        """Chamadas esperando vaga."""
+        return len(self._queue)
+
+    def call(self, func: Callable, *args, **kwargs) -> Any:
+        """
+        Executa função dentro do limite de concorrência.
+
+        Se ``func`` é uma função coroutine, retorna a coroutine de ``acall``.
+
+        Raises:
+            ConcurrencyLimitExceeded: Se não houve vaga dentro de ``max_wait``
+        """
+        if inspect.iscoroutinefunction(func):
+            return self.acall(func, *args, **kwargs)
+
+        self._acquire()
+        start = time.monotonic()
+
+        try:
+            result = func(*args, **kwargs)
+        except DeadlineExceeded:
+            self._release(start, None)
+            raise
+        except self.exceptions:
+            self._release(start, False)
+            raise
+        except BaseException:
+            self._release(start, None)
+            raise
+
+        self._release(start, True)
+        return result
+
+    async def acall(self, func: Callable, *args, **kwargs) -> Any:
+        """Executa função coroutine dentro do limite de concorrência."""
+        await self._aacquire()
+        start = time.monotonic()
+
+        try:
+            result = await func(*args, **kwargs)
+        except (asyncio.CancelledError, DeadlineExceeded):
+            self._release(start, None)
+            raise
+        except self.exceptions:
+            self._release(start, False)
+            raise
+        except BaseException:
+            self._release(start, None)
+            raise
+
+        self._release(start, True)
+        return result
+
+    def iterate(self, func: Callable, *args, **kwargs) -> Iterator:
+        """
+        Consome o iterável retornado por ``func`` (ex: stream do modelo)
+        dentro do limite de concorrência.
+
+        A vaga é ocupada no primeiro ``next`` e só é liberada quando o
+        iterável termina, falha ou é fechado (``close``). Fechar o gerador
+        também fecha o iterável de ``func``.
+
+        Raises:
+            ConcurrencyLimitExceeded: Se não houve vaga dentro de ``max_wait``
+        """
+        self._acquire()
+        start = time.monotonic()
+
+        try:
+            yield from func(*args, **kwargs)
+        except DeadlineExceeded:
+            self._release(start, None)
+            raise
+        except self.exceptions:
+            self._release(start, False)
+            raise
+        except BaseException:
+            self._release(start, None)
+            raise
+
+        self._release(start, True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Retorna limite atual, ocupação e contadores.
+
+        Returns:
+            Dict com métricas do limiter
+        """
+        with self._queue.lock:
+            return {
+                "name": self.name,
+                "limit": int(self._limit),
+                "in_flight": self._in_flight,
+                "queue_depth": len(self._queue),
+                "min_latency": min(self._latencies) if self._latencies else None,
+                **self.stats
+            }
+
+    def _acquire(self):
+        """Espera vaga (bloqueando a thread)."""
+        if self._queue.wait_turn(self._try_enter, cap_timeout(self.max_wait)) is None:
+            self._reject()
+
+    async def _aacquire(self):
+        """Espera vaga sem bloquear o event loop."""
+        if await self._queue.await_turn(self._try_enter, cap_timeout(self.max_wait)) is None:
+            self._reject()
+
+    def _try_enter(self, now: float) -> Optional[float]:
+        """Ocupa uma vaga se há uma livre; chamar com o lock (0.0 = entrou)."""
+        if self._in_flight >= int(self._limit):
+            return None
+        self._in_flight += 1
+        self.stats["calls"] += 1
+        return 0.0
+
+    def _reject(self):
+        """Levanta o erro de espera esgotada."""
+        with self._queue.lock:
+            self.stats["rejected"] += 1
+            message = (
+                f"Concurrency limiter '{self.name}' is full "
+                f"(limit={int(self._limit)}, queued={len(self._queue)})"
+            )
+        check_deadline()
+        raise ConcurrencyLimitExceeded(message)
+
+    def _release(self, start: float, success: Optional[bool]):
+        """
+        Libera a vaga e ajusta o limite.
+
+        Args:
+            start: Instante de início da chamada
+            success: True (sucesso), False (erro do upstream) ou None
+                (cancelamento/deadline, não afeta o limite)
+        """
+        now = time.monotonic()
+
+        with self._queue.lock:
+            self._in_flight -= 1
+
+            if success:
+                latency = now - start
+                self._latencies.append(latency)
+                saturated = self._in_flight + 1 >= self._limit / 2
+                if saturated and latency <= min(self._latencies) * self.latency_tolerance:
+                    self._increase()
+            elif success is False:
+                self.stats["errors"] += 1
+                if start >= self._last_decrease:
+                    self._decrease(now)
+
+            self._queue.notify()
+
+    def _increase(self):
+        """Aumento aditivo: +1 a cada ``limit`` sucessos; chamar com o lock."""
+        before = int(self._limit)
+        self._limit = min(self.max_limit, self._limit + 1.0 / self._limit)
+        if int(self._limit) > before:
+            self.stats["increases"] += 1
+
+    def _decrease(self, now: float):
+        """Redução multiplicativa; chamar com o lock."""
+        self._limit = max(self.min_limit, self._limit * self.backoff_ratio)
+        self._last_decrease = now
+        self.stats["decreases"] += 1
+        logger.warning(
+            f"Concurrency limiter '{self.name}' reduced to {int(self._limit)} after upstream error"
+        )
+
+
+# Registry de limiters por dependência
+_concurrency_limiters: Dict[str, AdaptiveConcurrencyLimiter] = {}
+_concurrency_limiters_lock = threading.Lock()
+
+
+def get_concurrency_limiter(name: str, **config) -> AdaptiveConcurrencyLimiter:
+    """
+    Retorna o limiter de concorrência da dependência, criando-o se preciso.
+
+    A configuração só é usada na criação.
+
+    Args:
+        name: Chave da dependência (ex: "llm:gpt-4o", "crm")
+        **config: Argumentos de ``AdaptiveConcurrencyLimiter``
+
+    Returns:
+        AdaptiveConcurrencyLimiter compartilhado
+    """
+    with _concurrency_limiters_lock:
+        limiter = _concurrency_limiters.get(name)
+        if limiter is None:
+            limiter = AdaptiveConcurrencyLimiter(name=name, **config)
+            _concurrency_limiters[name] = limiter
+        return limiter
@@ -0,0 +1,529 @@
+"""
+Cache em dois níveis: SimpleCache em processo (L1) + backend compartilhado (L2).
+
+O L2 é compartilhado entre workers do mesmo host (arquivo SQLite) ou entre
+hosts (Redis). Leituras são read-through e escritas write-through; cada
+escrita ou remoção publica uma invalidação que os outros workers aplicam
+no seu L1.
+
+Os valores do L2 são serializados com pickle: quem consegue escrever no
+arquivo SQLite ou no Redis consegue executar código nos workers. Use um
+arquivo num diretório privado (o padrão) e um Redis acessível só pela
+aplicação.
+"""
+
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .cache import SimpleCache, _clock
+
+
+logger = logging.getLogger(__name__)
+
+# Resultado de operação no L2 que falhou
+_L2_ERROR = object()
+
+
+def default_cache_path(filename: str = "agent_cache.db") -> str:
+    """
+    Caminho padrão dos arquivos SQLite locais (L2 do cache, ledger de
+    tokens), num diretório privado do usuário.
+
+    Usa ``$XDG_CACHE_HOME/agentes-ia`` (ou ``~/.cache/agentes-ia``) com
+    permissão 0o700, para que outros usuários do host não possam gravar
+    valores (pickle) que os workers vão carregar nem adulterar uso e custo.
+
+    Args:
+        filename: Nome do arquivo SQLite
+
+    Returns:
+        Caminho absoluto do arquivo
+
+    Raises:
+        PermissionError: Se o diretório existe e pertence a outro usuário
+    """
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    directory = os.path.join(base, "agentes-ia")
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    os.chmod(directory, 0o700)
+    return os.path.join(directory, filename)
+
+
+class SQLiteCacheBackend:
+    """
+    Backend L2 em arquivo SQLite, compartilhável entre processos do mesmo host.
+
+    Usa WAL para permitir leituras concorrentes e uma conexão por thread.
+    Expirações usam o relógio de parede, pois o relógio monotônico não é
+    comparável entre processos.
+
+    Valores são gravados com pickle: o arquivo só pode ser gravável por
+    processos confiáveis (nunca um caminho em ``/tmp`` compartilhado).
+    """
+
+    def __init__(self, db_path: Optional[str] = None, timeout: float = 5.0):
+        """
+        Inicializa backend.
+
+        Args:
+            db_path: Caminho do arquivo SQLite (padrão: ``default_cache_path()``,
+                num diretório privado do usuário)
+            timeout: Tempo máximo de espera por lock do banco em segundos
+        """
+        self.db_path = db_path if db_path is not None else default_cache_path()
+        self.timeout = timeout
+        self._local = threading.local()
+
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache_entries ("
+            " key TEXT PRIMARY KEY,"
+            " value BLOB NOT NULL,"
+            " expires_at REAL NOT NULL)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache_invalidations ("
+            " seq INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " key TEXT NOT NULL,"
+            " origin TEXT NOT NULL,"
+            " created_at REAL NOT NULL)"
+        )
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        """Retorna a conexão da thread atual."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=self.timeout)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        """
+        Busca valor no L2.
+
+        Returns:
+            Tuple (valor, ttl_restante) ou None se ausente/expirado
+        """
+        row = self._conn().execute(
+            "SELECT value, expires_at FROM cache_entries WHERE key = ?",
+            (key,)
+        ).fetchone()
+        if row is None:
+            return None
+
+        remaining = row[1] - time.time()
+        if remaining <= 0:
+            return None
+
+        return pickle.loads(row[0]), remaining
+
+    def set(self, key: str, value: Any, ttl: float):
+        """Armazena valor no L2."""
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO cache_entries (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), time.time() + ttl)
+        )
+        conn.commit()
+
+    def delete(self, key: str):
+        """Remove valor do L2."""
+        conn = self._conn()
+        conn.execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+        conn.commit()
+
+    def publish_invalidation(self, key: str, origin: str):
+        """Registra invalidação para os L1 dos outros workers."""
+        conn = self._conn()
+        conn.execute(
+            "INSERT INTO cache_invalidations (key, origin, created_at) VALUES (?, ?, ?)",
+            (key, origin, time.time())
+        )
+        conn.commit()
+
+    def poll_invalidations(self, after: Any, origin: str) -> Tuple[List[str], Any]:
+        """
+        Lê invalidações publicadas por outros workers.
+
+        Args:
+            after: Cursor retornado pela chamada anterior (None = apenas novas)
+            origin: Identificador do worker (suas invalidações são ignoradas)
+
+        Returns:
+            Tuple (chaves_invalidadas, novo_cursor)
+        """
+        conn = self._conn()
+        if after is None:
+            row = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM cache_invalidations").fetchone()
+            return [], row[0]
+
+        rows = conn.execute(
+            "SELECT seq, key, origin FROM cache_invalidations WHERE seq > ? ORDER BY seq",
+            (after,)
+        ).fetchall()
+        if not rows:
+            return [], after
+
+        keys = [key for _, key, row_origin in rows if row_origin != origin]
+        return keys, rows[-1][0]
+
+    def cleanup(self, invalidation_retention: float = 3600.0) -> int:
+        """
+        Remove entradas expiradas e invalidações antigas.
+
+        Returns:
+            Número de entradas removidas
+        """
+        now = time.time()
+        conn = self._conn()
+        removed = conn.execute(
+            "DELETE FROM cache_entries WHERE expires_at <= ?", (now,)
+        ).rowcount
+        conn.execute(
+            "DELETE FROM cache_invalidations WHERE created_at <= ?",
+            (now - invalidation_retention,)
+        )
+        conn.commit()
+        return removed
+
+
+class RedisCacheBackend:
+    """
+    Backend L2 em Redis (ou servidor compatível com o protocolo).
+
+    Invalidações usam um stream Redis lido por cursor, com a mesma
+    interface de polling do backend SQLite. Requer ``pip install redis``.
+    """
+
+    def __init__(
+        self,
+        url: Optional[str] = None,
+        prefix: str = "agent_cache:",
+        stream_maxlen: int = 100_000
+    ):
+        """
+        Inicializa backend.
+
+        Args:
+            url: URL do Redis (usa REDIS_URL se None)
+            prefix: Prefixo aplicado às chaves
+            stream_maxlen: Tamanho máximo aproximado do stream de invalidações
+        """
+        try:
+            import redis
+        except ImportError as e:
+            raise ImportError("RedisCacheBackend requer o pacote 'redis': pip install redis") from e
+
+        self.prefix = prefix
+        self.stream_maxlen = stream_maxlen
+        self._stream = f"{prefix}invalidations"
+        self._client = redis.Redis.from_url(url or os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        """Busca valor e TTL restante no L2."""
+        pipe = self._client.pipeline()
+        pipe.get(self.prefix + key)
+        pipe.pttl(self.prefix + key)
+        raw, pttl = pipe.execute()
+        if raw is None or pttl is None or pttl <= 0:
+            return None
+        return pickle.loads(raw), pttl / 1000
+
+    def set(self, key: str, value: Any, ttl: float):
+        """Armazena valor no L2."""
+        self._client.set(
+            self.prefix + key,
+            pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL),
+            px=max(1, int(ttl * 1000))
+        )
+
+    def delete(self, key: str):
+        """Remove valor do L2."""
+        self._client.delete(self.prefix + key)
+
+    def publish_invalidation(self, key: str, origin: str):
+        """Registra invalidação no stream."""
+        self._client.xadd(
+            self._stream,
+            {"key": key, "origin": origin},
+            maxlen=self.stream_maxlen,
+            approximate=True
+        )
+
+    def poll_invalidations(self, after: Any, origin: str) -> Tuple[List[str], Any]:
+        """Lê invalidações de outros workers a partir do cursor."""
+        if after is None:
+            return [], self._last_stream_id()
+
+        result = self._client.xread({self._stream: after}, count=10_000)
+        if not result:
+            return [], after
+
+        entries = result[0][1]
+        keys = [
+            fields[b"key"].decode()
+            for _, fields in entries
+            if fields[b"origin"].decode() != origin
+        ]
+        return keys, entries[-1][0]
+
+    def _last_stream_id(self) -> Any:
+        """Retorna o ID da última invalidação publicada."""
+        last = self._client.xrevrange(self._stream, count=1)
+        return last[0][0] if last else "0-0"
+
+    def cleanup(self, invalidation_retention: float = 3600.0) -> int:
+        """Redis expira entradas sozinho; nada a fazer."""
+        return 0
+
+
+class TieredCache:
+    """
+    Cache L1 (SimpleCache em processo) + L2 compartilhado.
+
+    - Leitura: L1 → L2 → loader; hits no L2 populam o L1 com o TTL restante
+    - Escrita: grava no L1 e no L2 e publica invalidação
+    - Invalidações de outros workers são aplicadas no L1 a cada
+      ``invalidation_poll_interval`` segundos, na próxima operação
+
+    Falhas do L2 são logadas e o cache degrada para L1 apenas.
+    """
+
+    def __init__(
+        self,
+        backend: Any,
+        l1: Optional[SimpleCache] = None,
+        default_ttl: int = 300,
+        l1_ttl: Optional[int] = None,
+        invalidation_poll_interval: float = 1.0
+    ):
+        """
+        Inicializa cache em dois níveis.
+
+        Args:
+            backend: Backend L2 (SQLiteCacheBackend, RedisCacheBackend ou compatível)
+            l1: SimpleCache local (cria um ilimitado se None)
+            default_ttl: TTL padrão em segundos
+            l1_ttl: TTL máximo no L1 (limita staleness entre polls; None = sem limite)
+            invalidation_poll_interval: Intervalo mínimo entre leituras de invalidações
+        """
+        self.backend = backend
+        self.l1 = l1 if l1 is not None else SimpleCache(default_ttl=default_ttl)
+        self.default_ttl = default_ttl
+        self.l1_ttl = l1_ttl
+        self.invalidation_poll_interval = invalidation_poll_interval
+
+        self.stats = {
+            "l1_hits": 0,
+            "l2_hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "l2_writes": 0,
+            "l2_errors": 0,
+            "invalidations_sent": 0,
+            "invalidations_received": 0
+        }
+        self._stats_lock = threading.Lock()
+
+        # Cursor de invalidações: começa no fim do log (L1 nasce vazio)
+        self._origin = uuid.uuid4().hex
+        self._poll_lock = threading.Lock()
+        self._last_poll = _clock()
+        result = self._safe_l2(lambda: backend.poll_invalidations(None, self._origin))
+        self._cursor = None if result is _L2_ERROR else result[1]
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Recupera valor (L1, depois L2).
+
+        Args:
+            key: Chave do cache
+
+        Returns:
+            Valor se existe em algum nível, None caso contrário
+        """
+        self._maybe_poll_invalidations()
+
+        value = self.l1.get(key)
+        if value is not None:
+            self._incr("l1_hits")
+            return value
+
+        found = self._read_l2(key)
+        if found is None:
+            self._incr("misses")
+            return None
+
+        self._incr("l2_hits")
+        return found
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None):
+        """
+        Armazena valor no L1 e no L2 (write-through) e invalida os outros L1.
+
+        Args:
+            key: Chave do cache
+            value: Valor a armazenar
+            ttl: Tempo de vida em segundos (usa default se None)
+        """
+        if ttl is None:
+            ttl = self.default_ttl
+
+        self.l1.set(key, value, self._l1_ttl(ttl))
+        self._write_l2(key, value, ttl)
+
+    def delete(self, key: str):
+        """Remove valor dos dois níveis e invalida os outros L1."""
+        self.l1.delete(key)
+        if self._safe_l2(lambda: self.backend.delete(key)) is not _L2_ERROR:
+            self._publish_invalidation(key)
+
+    def get_or_compute(
+        self,
+        key: str,
+        loader: Callable[[], Any],
+        ttl: Optional[int] = None
+    ) -> Any:
+        """
+        Retorna valor de L1/L2 ou calcula com ``loader``.
+
+        O single-flight do L1 garante que apenas um chamador por chave no
+        processo consulta o L2 e executa o loader; os que esperaram por ele
+        são contados em ``coalesced``, não como hits no L1.
+
+        Args:
+            key: Chave do cache
+            loader: Função sem argumentos que produz o valor
+            ttl: Tempo de vida em segundos (usa default se None)
+
+        Returns:
+            Valor em cache ou recém-calculado
+        """
+        if ttl is None:
+            ttl = self.default_ttl
+
+        self._maybe_poll_invalidations()
+        # Sem entrada no L1 agora: se o próprio load não rodar, o valor veio
+        # do load de outro chamador (single-flight)
+        in_l1 = self.l1._lookup(key, record_stats=False) is not None
+        tier = {"source": "l1" if in_l1 else "coalesced"}
+
+        def _load():
+            found = self._read_l2(key, populate_l1=False)
+            if found is not None:
+                tier["source"] = "l2"
+                return found
+
+            tier["source"] = "loader"
+            value = loader()
+            if value is not None:
+                self._write_l2(key, value, ttl)
+            return value
+
+        value = self.l1.get_or_compute(key, _load, ttl=self._l1_ttl(ttl))
+        self._incr({
+            "l1": "l1_hits",
+            "l2": "l2_hits",
+            "loader": "misses",
+            "coalesced": "coalesced"
+        }[tier["source"]])
+        return value
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Retorna métricas por nível.
+
+        Returns:
+            Dict com hits por nível, hit rates e estatísticas do L1
+            (``coalesced`` conta como lookup, mas não como hit)
+        """
+        lookups = (
+            self.stats["l1_hits"] + self.stats["l2_hits"]
+            + self.stats["misses"] + self.stats["coalesced"]
+        )
+        return {
+            **self.stats,
+            "l1_hit_rate": self.stats["l1_hits"] / lookups if lookups > 0 else 0,
+            "l2_hit_rate": self.stats["l2_hits"] / lookups if lookups > 0 else 0,
+            "hit_rate": (
+                (self.stats["l1_hits"] + self.stats["l2_hits"]) / lookups
+                if lookups > 0 else 0
+            ),
+            "l1": self.l1.get_stats()
+        }
+
+    def _l1_ttl(self, ttl: float) -> float:
+        """TTL efetivo no L1."""
+        return ttl if self.l1_ttl is None else min(ttl, self.l1_ttl)
+
+    def _read_l2(self, key: str, populate_l1: bool = True) -> Optional[Any]:
+        """Lê do L2 e, opcionalmente, popula o L1 com o TTL restante."""
+        found = self._safe_l2(lambda: self.backend.get(key))
+        if found is None or found is _L2_ERROR:
+            return None
+
+        value, remaining = found
+        if populate_l1:
+            self.l1.set(key, value, self._l1_ttl(remaining))
+        return value
+
+    def _write_l2(self, key: str, value: Any, ttl: float):
+        """Grava no L2 e publica invalidação para os outros workers."""
+        if self._safe_l2(lambda: self.backend.set(key, value, ttl)) is _L2_ERROR:
+            return
+        self._incr("l2_writes")
+        self._publish_invalidation(key)
+
+    def _publish_invalidation(self, key: str):
+        """Publica invalidação da chave."""
+        result = self._safe_l2(lambda: self.backend.publish_invalidation(key, self._origin))
+        if result is not _L2_ERROR:
+            self._incr("invalidations_sent")
+
+    def _maybe_poll_invalidations(self):
+        """Aplica no L1 as invalidações publicadas por outros workers."""
+        now = _clock()
+        if now - self._last_poll < self.invalidation_poll_interval:
+            return
+        if not self._poll_lock.acquire(blocking=False):
+            return
+
+        try:
+            self._last_poll = now
+            result = self._safe_l2(
+                lambda: self.backend.poll_invalidations(self._cursor, self._origin)
+            )
+            if result is _L2_ERROR:
+                return
+
+            keys, self._cursor = result
+            for key in keys:
+                self.l1.delete(key)
+            if keys:
+                with self._stats_lock:
+                    self.stats["invalidations_received"] += len(keys)
+        finally:
+            self._poll_lock.release()
+
+    def _safe_l2(self, operation: Callable[[], Any]) -> Any:
+        """Executa operação no L2; em caso de falha loga e retorna _L2_ERROR."""
+        try:
+            return operation()
+        except Exception as e:
+            self._incr("l2_errors")
+            logger.warning(f"L2 cache operation failed: {e}")
+            return _L2_ERROR
+
+    def _incr(self, counter: str):
+        """Incrementa contador de métrica."""
+        with self._stats_lock:
+            self.stats[counter] += 1
@@ -0,0 +1,370 @@
+"""
+Ledger de tokens e custo por sessão, usuário e agente.
+
+Cada execução do agente soma seus tokens (prompt, completion e cacheados)
+em rollups diários no SQLite: uma linha por (dia, escopo, id, modelo). As
+consultas de top consumidores e totais diários leem só os rollups, nunca
+eventos brutos, então o custo delas não cresce com o número de execuções.
+"""
+
+import sqlite3
+import threading
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional
+
+from .tiered_cache import default_cache_path
+
+
+@dataclass(frozen=True)
+class ModelPricing:
+    """Preço de um modelo em USD por 1M de tokens."""
+    input: float
+    output: float
+    cached_input: Optional[float] = None
+
+
+# Preços de referência (USD / 1M tokens). Confira a tabela do provedor e
+# passe ``pricing=...`` ao ledger para valores negociados ou modelos novos.
+DEFAULT_PRICING: Dict[str, ModelPricing] = {
+    "gpt-4": ModelPricing(input=30.0, output=60.0),
+    "gpt-4-turbo": ModelPricing(input=10.0, output=30.0),
+    "gpt-4o": ModelPricing(input=2.5, output=10.0, cached_input=1.25),
+    "gpt-4o-mini": ModelPricing(input=0.15, output=0.6, cached_input=0.075),
+    "gpt-3.5-turbo": ModelPricing(input=0.5, output=1.5),
+}
+
+
+@dataclass
+class TokenUsage:
+    """Tokens consumidos por uma execução."""
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+
+def _metric(metrics: Any, *names: str) -> int:
+    """Lê a primeira métrica presente (dict ou objeto; listas são somadas)."""
+    for name in names:
+        value = metrics.get(name) if isinstance(metrics, dict) else getattr(metrics, name, None)
+        if isinstance(value, (list, tuple)):
+            value = sum(v for v in value if v)
+        if value:
+            return int(value)
+    return 0
+
+
+def usage_from_metrics(metrics: Any) -> TokenUsage:
+    """
+    Extrai o uso de tokens das métricas de uma execução do AGNO.
+
+    Aceita o objeto ``Metrics`` (``input_tokens``/``output_tokens``/
+    ``cache_read_tokens``) e o dict de listas de versões anteriores
+    (``prompt_tokens``/``completion_tokens``/``cached_tokens``).
+
+    Args:
+        metrics: ``response.metrics`` (ou None)
+
+    Returns:
+        TokenUsage (zerado se não há métricas)
+    """
+    if not metrics:
+        return TokenUsage()
+
+    return TokenUsage(
+        prompt_tokens=_metric(metrics, "input_tokens", "prompt_tokens"),
+        completion_tokens=_metric(metrics, "output_tokens", "completion_tokens"),
+        cached_tokens=_metric(metrics, "cache_read_tokens", "cached_tokens")
+    )
+
+
+def find_pricing(model: str, pricing: Optional[Dict[str, ModelPricing]] = None) -> Optional[ModelPricing]:
+    """
+    Encontra o preço do modelo pelo maior prefixo conhecido.
+
+    ``gpt-4o-mini-2024-07-18`` usa o preço de ``gpt-4o-mini``.
+
+    Args:
+        model: ID do modelo
+        pricing: Tabela de preços (padrão: ``DEFAULT_PRICING``)
+
+    Returns:
+        ModelPricing ou None se o modelo não está na tabela
+    """
+    table = DEFAULT_PRICING if pricing is None else pricing
+    matches = [name for name in table if model.startswith(name)]
+    return table[max(matches, key=len)] if matches else None
+
+
+def price_usage(
+    model: str,
+    usage: TokenUsage,
+    pricing: Optional[Dict[str, ModelPricing]] = None
+) -> float:
+    """
+    Calcula o custo em USD de uma execução.
+
+    Tokens cacheados fazem parte dos tokens de prompt e são cobrados pelo
+    preço de ``cached_input`` quando o modelo tem um.
+
+    Args:
+        model: ID do modelo
+        usage: Tokens consumidos
+        pricing: Tabela de preços (padrão: ``DEFAULT_PRICING``)
+
+    Returns:
+        Custo em USD (0.0 para modelos sem preço)
+    """
+    price = find_pricing(model, pricing)
+    if price is None:
+        return 0.0
+
+    cached = min(usage.cached_tokens, usage.prompt_tokens) if price.cached_input is not None else 0
+    cost = (
+        (usage.prompt_tokens - cached) * price.input
+        + cached * (price.cached_input or 0.0)
+        + usage.completion_tokens * price.output
+    )
+    return cost / 1_000_000
+
+
+_SCOPES = ("session", "user", "agent")
+# Agregados explícitos: as colunas da tabela têm os mesmos nomes dos aliases
+# do SELECT e, no ORDER BY, o SQLite resolveria a expressão pelas colunas da
+# tabela (valor de uma linha qualquer do grupo), não pelas somas
+_ORDER_COLUMNS = {
+    "cost": "SUM(cost)",
+    "tokens": "SUM(prompt_tokens) + SUM(completion_tokens)",
+    "runs": "SUM(runs)",
+}
+
+
+class TokenLedger:
+    """
+    Rollups diários de tokens e custo em SQLite.
+
+    Cada ``record`` faz uma transação com um upsert por escopo (sessão,
+    usuário e agente). Usa WAL e uma conexão por thread, então pode ser
+    compartilhado entre agentes, threads e processos do mesmo host.
+
+    Example:
+        >>> ledger = TokenLedger()  # ~/.cache/agentes-ia/agent_token_ledger.db
+        >>> ledger.record("vendas", "s1", "u1", "gpt-4o", TokenUsage(1200, 300))
+        >>> ledger.top_consumers("user", n=5)
+        >>> ledger.daily_totals(agent="vendas")
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        pricing: Optional[Dict[str, ModelPricing]] = None,
+        timeout: float = 5.0
+    ):
+        """
+        Inicializa ledger.
+
+        Args:
+            db_path: Caminho do arquivo SQLite (padrão: diretório privado
+                do usuário, ver ``default_cache_path``)
+            pricing: Tabela de preços por modelo (padrão: ``DEFAULT_PRICING``)
+            timeout: Tempo máximo de espera por lock do banco em segundos
+        """
+        self.db_path = db_path or default_cache_path("agent_token_ledger.db")
+        self.pricing = DEFAULT_PRICING if pricing is None else pricing
+        self.timeout = timeout
+        self._local = threading.local()
+
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS usage_rollups ("
+            " day TEXT NOT NULL,"
+            " scope TEXT NOT NULL,"
+            " scope_id TEXT NOT NULL,"
+            " model TEXT NOT NULL,"
+            " runs INTEGER NOT NULL,"
+            " prompt_tokens INTEGER NOT NULL,"
+            " completion_tokens INTEGER NOT NULL,"
+            " cached_tokens INTEGER NOT NULL,"
+            " cost REAL NOT NULL,"
+            " PRIMARY KEY (scope, day, scope_id, model))"
+        )
+        conn.commit()
+
+    def record(
+        self,
+        agent: str,
+        session_id: Optional[str],
+        user_id: Optional[str],
+        model: str,
+        usage: TokenUsage,
+        day: Optional[date] = None
+    ) -> float:
+        """
+        Soma o uso de uma execução nos rollups.
+
+        Args:
+            agent: Nome do agente
+            session_id: ID da sessão (opcional)
+            user_id: ID do usuário (opcional)
+            model: ID do modelo
+            usage: Tokens consumidos
+            day: Dia do rollup (padrão: hoje, UTC)
+
+        Returns:
+            Custo da execução em USD
+        """
+        cost = price_usage(model, usage, self.pricing)
+        day_key = (day or datetime.utcnow().date()).isoformat()
+        values = (usage.prompt_tokens, usage.completion_tokens, usage.cached_tokens, cost)
+
+        rows = [
+            (day_key, scope, scope_id, model, *values)
+            for scope, scope_id in (("session", session_id), ("user", user_id), ("agent", agent))
+            if scope_id
+        ]
+
+        conn = self._conn()
+        with conn:
+            conn.executemany(
+                "INSERT INTO usage_rollups"
+                " (day, scope, scope_id, model, runs, prompt_tokens, completion_tokens, cached_tokens, cost)"
+                " VALUES (?, ?, ?, ?, 1, ?, ?, ?, ?)"
+                " ON CONFLICT (scope, day, scope_id, model) DO UPDATE SET"
+                " runs = runs + 1,"
+                " prompt_tokens = prompt_tokens + excluded.prompt_tokens,"
+                " completion_tokens = completion_tokens + excluded.completion_tokens,"
+                " cached_tokens = cached_tokens + excluded.cached_tokens,"
+                " cost = cost + excluded.cost",
+                rows
+            )
+        return cost
+
+    def top_consumers(
+        self,
+        scope: str = "user",
+        n: int = 10,
+        since: Optional[date] = None,
+        until: Optional[date] = None,
+        by: str = "cost"
+    ) -> List[Dict[str, Any]]:
+        """
+        Retorna os maiores consumidores do período.
+
+        Args:
+            scope: "session", "user" ou "agent"
+            n: Quantidade de resultados
+            since: Primeiro dia (inclusive; None = desde o início)
+            until: Último dia (inclusive; None = até hoje)
+            by: Ordenação: "cost", "tokens" ou "runs"
+
+        Returns:
+            Lista de dicts com id, runs, tokens e custo, do maior para o menor
+        """
+        if scope not in _SCOPES:
+            raise ValueError(f"scope must be one of {_SCOPES}")
+        if by not in _ORDER_COLUMNS:
+            raise ValueError(f"by must be one of {tuple(_ORDER_COLUMNS)}")
+
+        where, params = self._period(since, until)
+        rows = self._conn().execute(
+            "SELECT scope_id, SUM(runs) AS runs, SUM(prompt_tokens) AS prompt_tokens,"
+            " SUM(completion_tokens) AS completion_tokens, SUM(cached_tokens) AS cached_tokens,"
+            " SUM(cost) AS cost"
+            f" FROM usage_rollups WHERE scope = ?{where}"
+            f" GROUP BY scope_id ORDER BY {_ORDER_COLUMNS[by]} DESC LIMIT ?",
+            (scope, *params, n)
+        ).fetchall()
+
+        return [
+            {"id": row[0], **self._totals(row[1:])}
+            for row in rows
+        ]
+
+    def daily_totals(
+        self,
+        agent: Optional[str] = None,
+        since: Optional[date] = None,
+        until: Optional[date] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Retorna os totais por dia (todos os agentes ou um só).
+
+        Args:
+            agent: Nome do agente (None = todos)
+            since: Primeiro dia (inclusive)
+            until: Último dia (inclusive)
+
+        Returns:
+            Lista de dicts com dia, runs, tokens e custo, em ordem cronológica
+        """
+        where, params = self._period(since, until)
+        if agent is not None:
+            where += " AND scope_id = ?"
+            params.append(agent)
+
+        rows = self._conn().execute(
+            "SELECT day, SUM(runs), SUM(prompt_tokens), SUM(completion_tokens),"
+            " SUM(cached_tokens), SUM(cost)"
+            f" FROM usage_rollups WHERE scope = 'agent'{where}"
+            " GROUP BY day ORDER BY day",
+            params
+        ).fetchall()
+
+        return [{"day": row[0], **self._totals(row[1:])} for row in rows]
+
+    def usage_for(self, scope: str, scope_id: str) -> Dict[str, Any]:
+        """
+        Retorna o total acumulado de uma sessão, usuário ou agente.
+
+        Args:
+            scope: "session", "user" ou "agent"
+            scope_id: ID no escopo
+
+        Returns:
+            Dict com runs, tokens e custo (zerado se nunca consumiu)
+        """
+        row = self._conn().execute(
+            "SELECT SUM(runs), SUM(prompt_tokens), SUM(completion_tokens),"
+            " SUM(cached_tokens), SUM(cost)"
+            " FROM usage_rollups WHERE scope = ? AND scope_id = ?",
+            (scope, scope_id)
+        ).fetchone()
+        return self._totals(row)
+
+    @staticmethod
+    def _period(since: Optional[date], until: Optional[date]):
+        """Filtro de período sobre a coluna ``day``."""
+        where, params = "", []
+        if since is not None:
+            where += " AND day >= ?"
+            params.append(since.isoformat())
+        if until is not None:
+            where += " AND day <= ?"
+            params.append(until.isoformat())
+        return where, params
+
+    @staticmethod
+    def _totals(row) -> Dict[str, Any]:
+        runs, prompt, completion, cached, cost = (v or 0 for v in row)
+        return {
+            "runs": runs,
+            "prompt_tokens": prompt,
+            "completion_tokens": completion,
+            "cached_tokens": cached,
+            "total_tokens": prompt + completion,
+            "cost": round(cost, 6)
+        }
+
+    def _conn(self) -> sqlite3.Connection:
+        """Retorna a conexão da thread atual."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=self.timeout)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
@@ -2,8 +2,17 @@
 Validadores de input para agentes de IA.
 """
 
+import csv
 import re
-from typing import Tuple
+from dataclasses import dataclass
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .formatters import NON_DIGITS, format_digits, format_phones, is_series
+
+
+EMAIL_PATTERN = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
+_EMAIL_RE = re.compile(EMAIL_PATTERN)
 
 
 def validate_email(email: str) -> bool:
@@ -16,8 +25,7 @@ def validate_email(email: str) -> bool:
     Returns:
         True se válido, False caso contrário
     """
-    pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    return bool(re.match(pattern, email))
+    return _EMAIL_RE.match(email) is not None
 
 
 def validate_phone(phone: str) -> bool:
@@ -30,10 +38,312 @@ def validate_phone(phone: str) -> bool:
     Returns:
         True se válido (10-11 dígitos), False caso contrário
     """
-    digits = ''.join(filter(str.isdigit, phone))
+    digits = NON_DIGITS.sub("", phone)
     return len(digits) >= 10 and len(digits) <= 11
 
 
+def normalize_emails(emails: Iterable[str]) -> Any:
+    """
+    Normaliza emails em lote (sem espaços nas pontas, minúsculas).
+
+    Args:
+        emails: Iterável (ou pandas.Series) de emails
+
+    Returns:
+        Lista (ou Series) de emails normalizados; valores ausentes viram ""
+    """
+    if is_series(emails):
+        return emails.astype("string").fillna("").str.strip().str.lower()
+
+    return [email.strip().lower() if isinstance(email, str) else "" for email in emails]
+
+
+def validate_emails(emails: Iterable[str]) -> Any:
+    """
+    Valida emails em lote com as regras de ``validate_email``.
+
+    Com ``pandas.Series``, usa ``str.match`` vetorizado e retorna uma Series
+    booleana (máscara) com o mesmo índice.
+
+    Args:
+        emails: Iterável (ou Series) de emails
+
+    Returns:
+        Lista (ou Series) de booleanos; valores ausentes são inválidos
+    """
+    if is_series(emails):
+        return emails.astype("string").str.match(EMAIL_PATTERN).fillna(False).astype(bool)
+
+    match = _EMAIL_RE.match
+    return [isinstance(email, str) and match(email) is not None for email in emails]
+
+
+def validate_phones(phones: Iterable[str]) -> Any:
+    """
+    Valida telefones brasileiros em lote (10-11 dígitos).
+
+    Args:
+        phones: Iterável (ou pandas.Series) de telefones
+
+    Returns:
+        Lista (ou Series) de booleanos; valores ausentes são inválidos
+    """
+    if is_series(phones):
+        digits = phones.astype("string").str.replace(r"[^0-9]+", "", regex=True)
+        return digits.str.len().between(10, 11).fillna(False).astype(bool)
+
+    strip = NON_DIGITS.sub
+    return [
+        isinstance(phone, str) and 10 <= len(strip("", phone)) <= 11
+        for phone in phones
+    ]
+
+
+@dataclass
+class ContactBatch:
+    """Bloco de contatos validados e normalizados."""
+    emails: Any
+    email_valid: Any
+    phones: Any
+    phone_valid: Any
+
+    def __len__(self) -> int:
+        return len(self.emails)
+
+
+def validate_contacts(
+    emails: Iterable[str],
+    phones: Iterable[str],
+    chunk_size: int = 100_000
+) -> Iterator[ContactBatch]:
+    """
+    Valida e normaliza colunas de email e telefone em blocos.
+
+    Processa ``chunk_size`` linhas por vez, então colunas grandes (ou
+    geradores lendo de arquivo) não precisam caber inteiras em memória.
+    Emails são normalizados antes da validação; telefones são validados
+    como vieram e formatados com ``format_phone``.
+
+    Args:
+        emails: Iterável de emails
+        phones: Iterável de telefones (mesmo comprimento)
+        chunk_size: Linhas por bloco
+
+    Yields:
+        ContactBatch com máscaras de validade e valores normalizados
+    """
+    email_iter = iter(emails)
+    phone_iter = iter(phones)
+
+    while True:
+        email_chunk = list(islice(email_iter, chunk_size))
+        phone_chunk = list(islice(phone_iter, chunk_size))
+        if not email_chunk and not phone_chunk:
+            return
+        if len(email_chunk) != len(phone_chunk):
+            raise ValueError("emails and phones must have the same length")
+
+        # Dígitos extraídos uma vez por telefone, para validar e formatar
+        strip = NON_DIGITS.sub
+        digits = [strip("", phone) if isinstance(phone, str) else "" for phone in phone_chunk]
+
+        normalized = normalize_emails(email_chunk)
+        yield ContactBatch(
+            emails=normalized,
+            email_valid=validate_emails(normalized),
+            phones=[
+                format_digits(d, phone) if isinstance(phone, str) else phone
+                for d, phone in zip(digits, phone_chunk)
+            ],
+            phone_valid=[10 <= len(d) <= 11 for d in digits]
+        )
+
+
+def validate_contacts_csv(
+    path: str,
+    email_column: str = "email",
+    phone_column: str = "phone",
+    chunk_size: int = 100_000,
+    encoding: str = "utf-8"
+) -> Iterator[ContactBatch]:
+    """
+    Valida contatos de um CSV de leads em streaming.
+
+    Usa ``pandas.read_csv(chunksize=...)`` e operações vetorizadas quando
+    pandas está instalado; caso contrário, lê com o módulo ``csv``.
+
+    Args:
+        path: Caminho do CSV
+        email_column: Nome da coluna de email
+        phone_column: Nome da coluna de telefone
+        chunk_size: Linhas por bloco
+        encoding: Encoding do arquivo
+
+    Yields:
+        ContactBatch por bloco (Series com pandas, listas sem)
+    """
+    try:
+        import pandas as pd
+    except ImportError:
+        pd = None
+
+    if pd is not None:
+        reader = pd.read_csv(
+            path,
+            usecols=[email_column, phone_column],
+            dtype="string",
+            chunksize=chunk_size,
+            encoding=encoding
+        )
+        for frame in reader:
+            emails = normalize_emails(frame[email_column])
+            phones = frame[phone_column]
+            yield ContactBatch(
+                emails=emails,
+                email_valid=validate_emails(emails),
+                phones=format_phones(phones),
+                phone_valid=validate_phones(phones)
+            )
+        return
+
+    with open(path, newline="", encoding=encoding) as f:
+        rows = csv.DictReader(f)
+        columns = rows.fieldnames or []
+        if email_column not in columns or phone_column not in columns:
+            raise ValueError(f"CSV must have '{email_column}' and '{phone_column}' columns")
+
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                return
+            yield from validate_contacts(
+                [row[email_column] for row in chunk],
+                [row[phone_column] for row in chunk],
+                chunk_size=chunk_size
+            )
+
+
+# Regras do scanner. Cada grupo é compilado numa alternação com grupos
+# nomeados (case-insensitive, espaços variáveis via \s+), então cada texto é
+# percorrido uma vez por grupo. Injection e sanitização ficam em scanners
+# separados: numa alternação só, um match de sanitização (ex: ``<script ...>``)
+# consumiria uma frase de injection dentro dele. Nenhuma regra tem
+# quantificadores aninhados nem ``.*``, o que mantém o custo linear no
+# tamanho do texto.
+INJECTION_RULES: Dict[str, str] = {
+    "ignore_instructions": r"\bignore\s+(?:all\s+)?previous(?:\s+instructions?)?",
+    "disregard": r"\bdisregard\s+(?:all|previous)\b",
+    "forget": r"\bforget\s+everything",
+    "role_change": r"\byou\s+are\s+now",
+    "new_instructions": r"\bnew\s+instructions?:",
+}
+
+SANITIZE_RULES: Dict[str, str] = {
+    "script_open": r"<script[^<>]*>",     # XSS (bloco removido até o fechamento)
+    "script_close": r"</script\s*>",
+    "javascript_url": r"javascript:",      # XSS
+    "event_handler": r"\bon\w+\s*=",      # Event handlers
+}
+
+# Literais que toda ocorrência contém (em minúsculas). Textos sem nenhum
+# deles, o caso comum, nem passam pelo regex.
+_INJECTION_ANCHORS = ("ignore", "disregard", "forget", "you", "new")
+_SANITIZE_ANCHORS = ("<script", "</script", "javascript:", "=")
+
+
+def _compile_rules(rules: Dict[str, str]) -> "re.Pattern":
+    """Compila as regras numa alternação com um grupo nomeado por regra."""
+    return re.compile(
+        "|".join(f"(?P<{name}>{pattern})" for name, pattern in rules.items()),
+        re.IGNORECASE
+    )
+
+
+_INJECTION_SCANNER = _compile_rules(INJECTION_RULES)
+_SANITIZE_SCANNER = _compile_rules(SANITIZE_RULES)
+
+
+def _has_anchor(text: str, anchors: Tuple[str, ...]) -> bool:
+    """Prefiltro barato: algum literal obrigatório aparece no texto?"""
+    lowered = text.lower()
+    return any(anchor in lowered for anchor in anchors)
+
+
+def scan_text(text: str) -> List[Tuple[str, int, int]]:
+    """
+    Percorre o texto e retorna todas as regras encontradas.
+
+    Matches de injection e de sanitização podem se sobrepor (ex: frase de
+    injection dentro de uma tag ``<script>``); ambos são reportados.
+
+    Args:
+        text: Texto a verificar
+
+    Returns:
+        Lista (regra, início, fim) ordenada pela posição no texto
+    """
+    matches = []
+    for scanner, anchors in (
+        (_INJECTION_SCANNER, _INJECTION_ANCHORS),
+        (_SANITIZE_SCANNER, _SANITIZE_ANCHORS),
+    ):
+        if _has_anchor(text, anchors):
+            matches.extend((m.lastgroup, m.start(), m.end()) for m in scanner.finditer(text))
+    return sorted(matches, key=lambda match: (match[1], match[2]))
+
+
+def find_injection_rules(text: str) -> List[str]:
+    """
+    Retorna as regras de prompt injection presentes no texto.
+
+    Args:
+        text: Texto a verificar
+
+    Returns:
+        Nomes das regras (sem repetição), na ordem da primeira ocorrência
+    """
+    if not _has_anchor(text, _INJECTION_ANCHORS):
+        return []
+
+    found: Dict[str, None] = {}
+    for m in _INJECTION_SCANNER.finditer(text):
+        found[m.lastgroup] = None
+    return list(found)
+
+
+def _strip_dangerous(text: str, start: int = 0, strip_scripts: bool = True) -> str:
+    """Remove trechos perigosos a partir de ``start`` numa passada."""
+    parts = []
+    pos = start
+    script_start = None
+
+    for m in _SANITIZE_SCANNER.finditer(text, start):
+        rule = m.lastgroup
+
+        if script_start is not None:
+            if rule == "script_close":
+                script_start = None
+                pos = m.end()
+            continue
+
+        if rule == "script_open" and strip_scripts:
+            parts.append(text[pos:m.start()])
+            script_start = pos = m.start()
+        elif rule in ("javascript_url", "event_handler"):
+            parts.append(text[pos:m.start()])
+            pos = m.end()
+
+    if script_start is not None:
+        # <script> sem fechamento: mantém a tag e limpa o resto do texto
+        tag_end = _SANITIZE_SCANNER.match(text, script_start).end()
+        parts.append(text[script_start:tag_end])
+        parts.append(_strip_dangerous(text, tag_end, strip_scripts=False))
+        return "".join(parts)
+
+    parts.append(text[pos:])
+    return "".join(parts)
+
+
 def sanitize_input(text: str, max_length: int = 2000) -> str:
     """
     Sanitiza input do usuário.
@@ -51,15 +361,9 @@ def sanitize_input(text: str, max_length: int = 2000) -> str:
     # Limitar tamanho
     text = text[:max_length]
 
-    # Remover caracteres potencialmente perigosos
-    dangerous_patterns = [
-        r'<script.*?>.*?</script>',  # XSS
-        r'javascript:',              # XSS
-        r'on\w+\s*=',               # Event handlers
-    ]
-
-    for pattern in dangerous_patterns:
-        text = re.sub(pattern, '', text, flags=re.IGNORECASE)
+    # Remover blocos <script>, URLs javascript: e event handlers (uma passada)
+    if _has_anchor(text, _SANITIZE_ANCHORS):
+        text = _strip_dangerous(text)
 
     return text.strip()
 
@@ -72,20 +376,100 @@ def check_prompt_injection(text: str) -> Tuple[bool, str]:
         text: Texto a verificar
 
     Returns:
-        Tuple (is_injection, reason)
-    """
-    injection_patterns = [
-        (r'ignore\s+(all\s+)?previous\s+instructions?', 'ignore_instructions'),
-        (r'disregard\s+(all\s+)?previous', 'disregard'),
-        (r'forget\s+everything', 'forget'),
-        (r'you\s+are\s+now', 'role_change'),
-        (r'new\s+instructions?:', 'new_instructions'),
-    ]
+        Tuple (is_injection, reason) com a primeira regra encontrada no texto
+    """
+    rules = find_injection_rules(text)
+    if rules:
+        return True, rules[0]
 
-    text_lower = text.lower()
+    return False, ""
 
-    for pattern, reason in injection_patterns:
-        if re.search(pattern, text_lower):
-            return True, reason
 
-    return False, ""
+# Dados sensíveis que não podem sair nas respostas do agente
+SENSITIVE_RULES: Dict[str, str] = {
+    "cpf": r"\d{3}\.\d{3}\.\d{3}-\d{2}",
+    "cnpj": r"\d{2}\.\d{3}\.\d{3}/\d{4}-\d{2}",
+    "credit_card": r"\d{4}[- ]?\d{4}[- ]?\d{4}[- ]?\d{4}",
+}
+
+_SENSITIVE_SCANNER = re.compile(
+    "|".join(f"(?P<{name}>{pattern})" for name, pattern in SENSITIVE_RULES.items())
+)
+
+# Maior ocorrência possível (cartão com separadores: 19 caracteres)
+_SENSITIVE_MAX_LENGTH = 19
+
+
+def find_sensitive_data(text: str) -> List[str]:
+    """
+    Retorna os tipos de dado sensível (CPF, CNPJ, cartão) presentes no texto.
+
+    Args:
+        text: Texto a verificar
+
+    Returns:
+        Nomes das regras (sem repetição), na ordem da primeira ocorrência
+    """
+    found: Dict[str, None] = {}
+    for m in _SENSITIVE_SCANNER.finditer(text):
+        found[m.lastgroup] = None
+    return list(found)
+
+
+class StreamingSensitiveScanner:
+    """
+    Detecta dados sensíveis em texto que chega em pedaços (streaming).
+
+    Segura os últimos caracteres de cada pedaço (uma ocorrência menos um)
+    para que um CPF partido entre dois chunks ainda seja detectado antes
+    de qualquer parte dele ser liberada. Cada caractere é verificado no
+    máximo duas vezes, independente do tamanho da resposta.
+
+    Example:
+        >>> scanner = StreamingSensitiveScanner()
+        >>> for chunk in chunks:
+        ...     print(scanner.feed(chunk), end="")
+        ...     if scanner.detected:
+        ...         break
+        >>> print(scanner.flush())
+    """
+
+    def __init__(self):
+        """Inicializa scanner sem texto pendente."""
+        self._carry = _SENSITIVE_MAX_LENGTH - 1
+        self._pending = ""
+        self.detected: Optional[str] = None
+
+    def feed(self, chunk: str) -> str:
+        """
+        Adiciona um pedaço e retorna o texto já seguro para emitir.
+
+        Args:
+            chunk: Próximo pedaço da resposta
+
+        Returns:
+            Texto liberado ("" se nada pode sair ainda ou se houve detecção)
+        """
+        if self.detected:
+            return ""
+
+        buffer = self._pending + chunk
+        m = _SENSITIVE_SCANNER.search(buffer)
+        if m:
+            self.detected = m.lastgroup
+            self._pending = ""
+            return ""
+
+        cut = max(0, len(buffer) - self._carry)
+        self._pending = buffer[cut:]
+        return buffer[:cut]
+
+    def flush(self) -> str:
+        """
+        Libera o texto retido no fim da resposta.
+
+        Returns:
+            Texto pendente ("" se houve detecção)
+        """
+        pending, self._pending = self._pending, ""
+        return "" if self.detected else pending
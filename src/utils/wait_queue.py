@@ -0,0 +1,177 @@
+"""
+Fila FIFO de espera compartilhada por threads e coroutines.
+
+Base do ``RateLimiter`` e do ``AdaptiveConcurrencyLimiter``: quem chega
+primeiro é atendido primeiro, e só o primeiro da fila tenta entrar. Threads
+dormem numa Condition; coroutines dormem num future resolvido via
+``call_soon_threadsafe``, então o event loop nunca é bloqueado nem faz
+polling. O lock da fila é o lock do limiter: o estado do limiter (buckets,
+vagas) é protegido por ele.
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Optional, Tuple
+
+
+# Chamada com o lock, só para o primeiro da fila: 0.0 se entrou, segundos
+# até valer a pena tentar de novo, ou None para esperar o próximo notify
+Attempt = Callable[[float], Optional[float]]
+
+
+def _wake(future: asyncio.Future):
+    """Acorda um waiter async (roda no loop dele)."""
+    if not future.done():
+        future.set_result(None)
+
+
+class WaitQueue:
+    """
+    Fila FIFO de espera com versões bloqueante e async.
+
+    Example:
+        >>> queue = WaitQueue()
+        >>> waited = queue.wait_turn(lambda now: 0.0 if has_slot() else None, timeout=5)
+        >>> if waited is None:
+        ...     raise TimeoutError()
+    """
+
+    def __init__(self):
+        self.lock = threading.Condition(threading.Lock())
+        self._waiters: deque = deque()
+        # ticket -> (loop, future) dos waiters async, acordados por notify
+        self._async_waiters: Dict[object, Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = {}
+
+    def __len__(self) -> int:
+        """Chamadores esperando a vez."""
+        return len(self._waiters)
+
+    @property
+    def async_waiting(self) -> int:
+        """Waiters async com future registrado (dormindo)."""
+        return len(self._async_waiters)
+
+    def wait_turn(self, attempt: Attempt, timeout: Optional[float] = None) -> Optional[float]:
+        """
+        Espera a vez bloqueando a thread.
+
+        Args:
+            attempt: Tentativa de entrar (ver ``Attempt``)
+            timeout: Espera máxima em segundos (None = sem limite)
+
+        Returns:
+            Segundos de espera (0.0 se entrou de primeira) ou None se o
+            tempo acabou antes
+        """
+        start = time.monotonic()
+        ticket = object()
+        blocked = False
+
+        with self.lock:
+            self._waiters.append(ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    wait = self._attempt(ticket, attempt, now)
+                    if wait == 0.0:
+                        return now - start if blocked else 0.0
+
+                    wait = self._cap(wait, timeout, now - start)
+                    if wait is not None and wait <= 0:
+                        return None
+
+                    blocked = True
+                    self.lock.wait(wait)
+            finally:
+                self._leave(ticket)
+
+    async def await_turn(self, attempt: Attempt, timeout: Optional[float] = None) -> Optional[float]:
+        """
+        Versão async de ``wait_turn`` (não bloqueia o event loop).
+
+        O primeiro da fila dorme até a espera devolvida por ``attempt``; os
+        demais dormem até ``notify`` acordá-los.
+
+        Args:
+            attempt: Tentativa de entrar (ver ``Attempt``)
+            timeout: Espera máxima em segundos (None = sem limite)
+
+        Returns:
+            Segundos de espera (0.0 se entrou de primeira) ou None se o
+            tempo acabou antes
+        """
+        start = time.monotonic()
+        loop = asyncio.get_running_loop()
+        ticket = object()
+        blocked = False
+
+        with self.lock:
+            self._waiters.append(ticket)
+        try:
+            while True:
+                with self.lock:
+                    now = time.monotonic()
+                    wait = self._attempt(ticket, attempt, now)
+                    if wait == 0.0:
+                        return now - start if blocked else 0.0
+
+                    wait = self._cap(wait, timeout, now - start)
+                    if wait is not None and wait <= 0:
+                        return None
+
+                    wakeup = loop.create_future()
+                    self._async_waiters[ticket] = (loop, wakeup)
+
+                blocked = True
+                try:
+                    await asyncio.wait_for(wakeup, wait)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            with self.lock:
+                self._async_waiters.pop(ticket, None)
+                self._leave(ticket)
+
+    def notify(self):
+        """
+        Acorda quem espera para tentar de novo; chamar com o lock.
+
+        Threads são acordadas pela Condition. Entre os waiters async, só o
+        primeiro da fila pode entrar, então só ele é acordado; ao entrar
+        (ou desistir), ele sai da fila e acorda o próximo.
+        """
+        self.lock.notify_all()
+        if not self._waiters:
+            return
+        waiter = self._async_waiters.get(self._waiters[0])
+        if waiter is not None:
+            loop, wakeup = waiter
+            try:
+                loop.call_soon_threadsafe(_wake, wakeup)
+            except RuntimeError:
+                # Loop já fechado: o waiter não existe mais
+                pass
+
+    def _attempt(self, ticket: object, attempt: Attempt, now: float) -> Optional[float]:
+        """Tenta entrar se ``ticket`` é o primeiro da fila; chamar com o lock."""
+        if self._waiters[0] is not ticket:
+            return None
+        return attempt(now)
+
+    @staticmethod
+    def _cap(wait: Optional[float], timeout: Optional[float], elapsed: float) -> Optional[float]:
+        """Limita a espera ao que resta do timeout (<= 0 = esgotado)."""
+        if timeout is None:
+            return wait
+        left = timeout - elapsed
+        return left if wait is None else min(wait, left)
+
+    def _leave(self, ticket: object):
+        """Sai da fila e acorda o próximo; chamar com o lock."""
+        try:
+            self._waiters.remove(ticket)
+        except ValueError:
+            pass
+        self.notify()
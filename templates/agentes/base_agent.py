@@ -13,9 +13,13 @@ com suporte nativo a:
 - Guardrails e validações
 """
 
-from typing import Dict, List, Any, Optional
+from typing import Dict, Iterable, Iterator, List, Any, Callable, Optional, Union
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from datetime import datetime
+import asyncio
 import logging
+import threading
+import time
 
 # Imports do AGNO framework
 from agno.agent import Agent
@@ -23,6 +27,28 @@ from agno.models.openai import OpenAIChat
 from agno.db.sqlite import SqliteDb
 from agno.tools.toolkit import Toolkit
 
+# Utilitários compartilhados (src/utils): execute com a raiz do repositório
+# no PYTHONPATH (ver templates/README.md)
+from src.utils import deadline, DeadlineExceeded, get_rate_limiter
+from src.utils.deadline import Deadline, check_deadline, remaining_time
+from src.utils.checkpoint import BatchCheckpoint
+from src.utils.cache import SimpleCache
+from src.utils.rate_limit import estimate_prompt_tokens, estimate_tokens, retry_after_from_exception
+from src.utils.response_cache import ResponseCache, cache_namespace
+from src.utils.retry import get_concurrency_limiter
+from src.utils.token_ledger import TokenLedger, price_usage, usage_from_metrics
+from src.utils.validators import (
+    StreamingSensitiveScanner,
+    find_injection_rules,
+    find_sensitive_data,
+)
+
+
+GUARDRAIL_REFUSAL = (
+    "Desculpe, não posso compartilhar informações sensíveis. "
+    "Como posso ajudar de outra forma?"
+)
+
 
 # ==================== Exemplo 1: Agente Simples ====================
 
@@ -248,6 +274,14 @@ class ProductionAgent:
     - Validação de input/output
     - Guardrails
     - Error handling robusto
+    - Deadline por requisição (propagado para retries, circuit breakers,
+      clientes HTTP e buscas via ``src.utils.deadline``)
+    - Rate limit de RPM/TPM compartilhado por modelo
+    - ``aprocess`` async para servir muitas conversas em paralelo
+    - ``process_stream`` com guardrails incrementais e métrica de TTFT
+    - ``process_many`` para lotes com paralelismo limitado e checkpoint
+    - Cache de respostas opcional (exato + semântico) para perguntas repetidas
+    - Tokens e custo por execução, com ledger opcional por sessão/usuário
     """
 
     def __init__(
@@ -256,7 +290,14 @@ class ProductionAgent:
         model_id: str = "gpt-4",
         db_path: str = "/tmp/agno_production.db",
         tools: Optional[List[Toolkit]] = None,
-        logger: Optional[logging.Logger] = None
+        logger: Optional[logging.Logger] = None,
+        request_timeout: Optional[float] = 120.0,
+        requests_per_minute: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None,
+        max_completion_tokens: int = 1024,
+        max_in_flight: Optional[int] = None,
+        response_cache: Optional[ResponseCache] = None,
+        token_ledger: Optional[TokenLedger] = None
     ):
         """
         Inicializa agente de produção.
@@ -267,16 +308,52 @@ class ProductionAgent:
             db_path: Caminho para banco de dados SQLite
             tools: Lista de toolkits (opcional)
             logger: Logger customizado (opcional)
+            request_timeout: Orçamento em segundos de cada chamada a
+                ``process``/``aprocess`` (None = sem deadline)
+            requests_per_minute: Limite de RPM do modelo (opcional)
+            tokens_per_minute: Limite de TPM do modelo (opcional)
+            max_completion_tokens: Teto de tokens da resposta (passado ao
+                modelo e reservado no limite de TPM)
+            max_in_flight: Teto de chamadas simultâneas ao modelo,
+                compartilhado por todos os agentes do processo (opcional;
+                reduzido por AIMD quando o provedor devolve erros)
+            response_cache: Cache de respostas (opcional; pode ser
+                compartilhado entre agentes)
+            token_ledger: Ledger de tokens/custo por sessão, usuário e
+                agente (opcional; pode ser compartilhado entre agentes)
         """
         self.agent_name = agent_name
+        self.model_id = model_id
+        self.request_timeout = request_timeout
+        self.max_completion_tokens = max_completion_tokens
+        self.token_ledger = token_ledger
+
+        # Limiter compartilhado por todos os agentes do mesmo modelo
+        self.rate_limiter = None
+        if requests_per_minute or tokens_per_minute:
+            self.rate_limiter = get_rate_limiter(
+                model_id,
+                requests_per_minute=requests_per_minute,
+                tokens_per_minute=tokens_per_minute
+            )
+
+        # Teto de chamadas simultâneas, também compartilhado por modelo
+        self.concurrency_limiter = None
+        if max_in_flight:
+            self.concurrency_limiter = get_concurrency_limiter(
+                f"model:{model_id}",
+                initial_limit=max_in_flight,
+                max_limit=max_in_flight
+            )
         self.logger = logger or self._setup_logger()
 
         # Criar agente AGNO
+        instructions = self._load_instructions()
         self.agent = Agent(
             name=agent_name,
-            model=OpenAIChat(id=model_id),
+            model=OpenAIChat(id=model_id, max_tokens=max_completion_tokens),
             description=f"Agente de produção: {agent_name}",
-            instructions=self._load_instructions(),
+            instructions=instructions,
             tools=tools or [],
             storage=SqliteDb(
                 table_name=f"{agent_name}_sessions",
@@ -288,15 +365,37 @@ class ProductionAgent:
             markdown=True
         )
 
-        # Estatísticas
+        # Estatísticas (atualizadas também pelas threads de process_many)
+        self._stats_lock = threading.Lock()
         self.stats = {
             "total_interactions": 0,
             "successful_interactions": 0,
             "failed_interactions": 0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "cached_tokens": 0,
             "total_tokens": 0,
-            "total_processing_time": 0.0
+            "total_cost": 0.0,
+            "total_processing_time": 0.0,
+            "streamed_interactions": 0,
+            "total_ttft": 0.0
         }
 
+        # Cache de respostas: namespace muda junto com modelo, prompt e tools
+        self.response_cache = response_cache
+        self._cache_namespace = cache_namespace(
+            model_id,
+            instructions,
+            [getattr(tool, "name", type(tool).__name__) for tool in tools or []]
+        )
+        # Sessões com histórico ou contexto próprio (não usam o cache)
+        self._personalized_sessions = SimpleCache(default_ttl=24 * 3600, max_entries=100_000)
+
+        # Estimativa de TPM: prompt fixo (instruções + tools) e, por sessão,
+        # os tokens reais do último turno (o histórico entra no próximo prompt)
+        self._prompt_tokens = estimate_prompt_tokens(instructions, tools or [])
+        self._session_tokens = SimpleCache(default_ttl=24 * 3600, max_entries=100_000)
+
         self.logger.info(f"Production agent '{agent_name}' initialized")
 
     def _setup_logger(self) -> logging.Logger:
@@ -345,20 +444,11 @@ class ProductionAgent:
         if len(message) > 10000:
             return False, "Mensagem muito longa (máximo 10.000 caracteres)"
 
-        # Detectar possível prompt injection
-        malicious_patterns = [
-            "ignore previous instructions",
-            "ignore all previous",
-            "disregard all",
-            "forget everything",
-            "you are now"
-        ]
-
-        message_lower = message.lower()
-        for pattern in malicious_patterns:
-            if pattern in message_lower:
-                self.logger.warning(f"Potential prompt injection detected: {pattern}")
-                return False, "Input contém padrões não permitidos"
+        # Detectar possível prompt injection (scanner compilado, uma passada)
+        rules = find_injection_rules(message)
+        if rules:
+            self.logger.warning(f"Potential prompt injection detected: {', '.join(rules)}")
+            return False, "Input contém padrões não permitidos"
 
         return True, None
 
@@ -372,22 +462,10 @@ class ProductionAgent:
         Returns:
             Tuple (resposta_filtrada, passou_guardrails)
         """
-        # Verificar informações sensíveis (exemplo simples)
-        sensitive_patterns = [
-            r'\d{3}\.\d{3}\.\d{3}-\d{2}',  # CPF
-            r'\d{2}\.\d{3}\.\d{3}/\d{4}-\d{2}',  # CNPJ
-            r'\d{4}[- ]?\d{4}[- ]?\d{4}[- ]?\d{4}',  # Cartão de crédito
-        ]
-
-        import re
-        for pattern in sensitive_patterns:
-            if re.search(pattern, response):
-                self.logger.warning("Sensitive information detected in response")
-                return (
-                    "Desculpe, não posso compartilhar informações sensíveis. "
-                    "Como posso ajudar de outra forma?",
-                    False
-                )
+        # Verificar informações sensíveis (CPF, CNPJ, cartão)
+        if find_sensitive_data(response):
+            self.logger.warning("Sensitive information detected in response")
+            return GUARDRAIL_REFUSAL, False
 
         return response, True
 
@@ -395,15 +473,21 @@ class ProductionAgent:
         self,
         message: str,
         session_id: Optional[str] = None,
-        user_id: Optional[str] = None
+        user_id: Optional[str] = None,
+        timeout: Optional[float] = None
     ) -> Dict[str, Any]:
         """
         Processa mensagem do usuário e retorna resposta.
 
+        O turno inteiro roda dentro de um deadline; ferramentas e clientes
+        chamados pelo agente reduzem seus timeouts ao tempo restante.
+
         Args:
             message: Mensagem do usuário
             session_id: ID da sessão (opcional, será gerado se não fornecido)
             user_id: ID do usuário (opcional)
+            timeout: Orçamento desta chamada em segundos
+                (padrão: ``request_timeout``)
 
         Returns:
             Dict com resposta e metadados
@@ -411,72 +495,640 @@ class ProductionAgent:
         start_time = datetime.utcnow()
 
         try:
-            # 1. Validar input
-            is_valid, error_msg = self.validate_input(message)
-            if not is_valid:
-                self.stats["failed_interactions"] += 1
-                return {
-                    "success": False,
-                    "error": error_msg,
-                    "response": f"Erro: {error_msg}"
-                }
-
-            # 2. Preparar contexto de sessão
-            if not session_id:
-                session_id = f"session_{datetime.utcnow().strftime('%Y%m%d%H%M%S')}"
-
-            # 3. Executar agente AGNO
+            # 1-2. Validar input e preparar sessão
+            error, session_id = self._prepare(message, session_id)
+            if error:
+                return error
+
+            # Perguntas repetidas saem do cache, sem chamar o LLM
+            cached, use_cache = self._cached_result(message, session_id, user_id, start_time)
+            if cached:
+                return cached
+
+            # 3. Executar agente AGNO dentro do orçamento da requisição
             # No AGNO, usamos run() ou print_response() para processar
-            response = self.agent.run(
+            budget = timeout if timeout is not None else self.request_timeout
+            with deadline(budget):
+                reserved = self._wait_rate_limit(message, session_id)
+                response = self._run_model(
+                    self.agent.run,
+                    message,
+                    session_id=session_id,
+                    stream=False  # Set True para streaming
+                )
+
+            # 4-9. Guardrails, métricas, log e resposta
+            result = self._finish(response, session_id, user_id, start_time, reserved)
+            self._store_result(message, result, use_cache)
+            return result
+
+        except DeadlineExceeded:
+            return self._timeout_result(session_id, user_id)
+
+        except Exception as e:
+            return self._error_result(e)
+
+    async def aprocess(
+        self,
+        message: str,
+        session_id: Optional[str] = None,
+        user_id: Optional[str] = None,
+        timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Versão async de ``process``, usando ``agent.arun``.
+
+        Enquanto espera o LLM, o event loop atende outras conversas, então
+        um único processo mantém centenas de turnos em andamento. Validação,
+        guardrails e estatísticas são CPU-bound e curtos (scanner compilado,
+        sem I/O), e rodam direto no loop. O deadline é aplicado de fato: a
+        chamada ao modelo é cancelada quando o orçamento acaba.
+
+        Args:
+            message: Mensagem do usuário
+            session_id: ID da sessão (opcional, será gerado se não fornecido)
+            user_id: ID do usuário (opcional)
+            timeout: Orçamento desta chamada em segundos
+                (padrão: ``request_timeout``)
+
+        Returns:
+            Dict com resposta e metadados (mesmo formato de ``process``)
+        """
+        start_time = datetime.utcnow()
+
+        try:
+            error, session_id = self._prepare(message, session_id)
+            if error:
+                return error
+
+            # Embedding do tier semântico roda fora do event loop
+            cached, use_cache = None, False
+            if self.response_cache is not None:
+                cached, use_cache = await asyncio.to_thread(
+                    self._cached_result, message, session_id, user_id, start_time
+                )
+            if cached:
+                return cached
+
+            budget = timeout if timeout is not None else self.request_timeout
+            with deadline(budget):
+                reserved = await self._await_rate_limit(message, session_id)
+                response = await self._run_model(self._arun_with_deadline, message, session_id)
+
+            if self.token_ledger is not None:
+                # Gravação no ledger (SQLite) fora do event loop
+                result = await asyncio.to_thread(
+                    self._finish, response, session_id, user_id, start_time, reserved
+                )
+            else:
+                result = self._finish(response, session_id, user_id, start_time, reserved)
+            if use_cache:
+                await asyncio.to_thread(self._store_result, message, result, use_cache)
+            return result
+
+        except DeadlineExceeded:
+            return self._timeout_result(session_id, user_id)
+
+        except Exception as e:
+            return self._error_result(e)
+
+    def process_stream(
+        self,
+        message: str,
+        session_id: Optional[str] = None,
+        user_id: Optional[str] = None,
+        timeout: Optional[float] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Processa mensagem em streaming, liberando a resposta em pedaços.
+
+        Os guardrails rodam de forma incremental: o scanner segura só o
+        final de cada pedaço (o suficiente para um CPF/CNPJ/cartão partido
+        entre chunks) e libera o resto na hora. Se um dado sensível aparece,
+        o stream do modelo é interrompido e a recusa padrão é emitida no
+        lugar do restante.
+
+        Eventos emitidos:
+            ``{"type": "chunk", "content": str}`` para cada pedaço liberado;
+            ``{"type": "done", ...}`` no fim, com o mesmo formato de
+            ``process`` (``metadata`` inclui ``ttft_ms``).
+
+        Args:
+            message: Mensagem do usuário
+            session_id: ID da sessão (opcional, será gerado se não fornecido)
+            user_id: ID do usuário (opcional)
+            timeout: Orçamento desta chamada em segundos
+                (padrão: ``request_timeout``)
+
+        Yields:
+            Eventos de chunk seguidos de um evento final
+        """
+        start_time = datetime.utcnow()
+        start = time.perf_counter()
+        stream = None
+
+        try:
+            error, session_id = self._prepare(message, session_id)
+            if error:
+                yield {"type": "done", **error}
+                return
+            self._note_session_turn(session_id)
+
+            # O deadline é reaplicado a cada leitura do stream, e não mantido
+            # aberto entre yields, para não vazar para o contexto de quem consome
+            budget = timeout if timeout is not None else self.request_timeout
+            request_deadline = Deadline(budget) if budget is not None else None
+
+            def pull(step):
+                remaining = request_deadline.remaining() if request_deadline else None
+                with deadline(remaining):
+                    check_deadline()
+                    return step()
+
+            reserved = pull(lambda: self._wait_rate_limit(message, session_id))
+            # Com limiter, a vaga é ocupada na primeira leitura e liberada
+            # quando o stream termina ou é fechado
+            stream = pull(lambda: self._stream_model(
+                self.agent.run,
                 message,
                 session_id=session_id,
-                stream=False  # Set True para streaming
-            )
+                stream=True
+            ))
+
+            scanner = StreamingSensitiveScanner()
+            parts: List[str] = []
+            ttft = None
+            metrics = None
+
+            while True:
+                event = pull(lambda: next(stream, None))
+                if event is None:
+                    break
+
+                # Métricas de tokens chegam no(s) último(s) evento(s)
+                metrics = getattr(event, "metrics", None) or metrics
+
+                # Eventos sem texto (tool calls, status) são ignorados
+                text = getattr(event, "content", event)
+                if not isinstance(text, str) or not text:
+                    continue
+
+                if ttft is None:
+                    ttft = time.perf_counter() - start
+
+                safe = scanner.feed(text)
+                if scanner.detected:
+                    break
+                if safe:
+                    parts.append(safe)
+                    yield {"type": "chunk", "content": safe}
+
+            passed_guardrails = scanner.detected is None
+            tail = scanner.flush() if passed_guardrails else GUARDRAIL_REFUSAL
+            if not passed_guardrails:
+                self.logger.warning(
+                    f"Sensitive information detected in stream ({scanner.detected})"
+                )
+            if tail:
+                parts.append(tail)
+                yield {"type": "chunk", "content": tail}
 
-            # 4. Extrair resposta
-            # response pode ser RunResponse object
-            response_text = str(response.content) if hasattr(response, 'content') else str(response)
+            ttft_ms = ttft * 1000 if ttft is not None else None
+            if ttft is not None:
+                self._count(streamed_interactions=1, total_ttft=ttft)
 
-            # 5. Aplicar guardrails
-            filtered_response, passed_guardrails = self.apply_guardrails(response_text)
+            # Se o stream foi interrompido, só há métricas parciais (ou nenhuma)
+            usage = self._record_usage(metrics, session_id, user_id, reserved)
 
-            # 6. Calcular métricas
-            processing_time = (datetime.utcnow() - start_time).total_seconds()
+            yield {"type": "done", **self._success_result(
+                "".join(parts), passed_guardrails, session_id, user_id, start_time,
+                ttft_ms=ttft_ms,
+                usage=usage
+            )}
 
-            # 7. Atualizar estatísticas
-            self.stats["total_interactions"] += 1
-            self.stats["successful_interactions"] += 1
-            self.stats["total_processing_time"] += processing_time
+        except DeadlineExceeded:
+            yield {"type": "done", **self._timeout_result(session_id, user_id)}
 
-            # 8. Log da interação
-            self.logger.info(
-                f"Interaction processed - Session: {session_id}, "
-                f"User: {user_id or 'anonymous'}, "
-                f"Time: {processing_time:.2f}s"
-            )
+        except Exception as e:
+            yield {"type": "done", **self._error_result(e)}
 
-            # 9. Retornar resposta
-            return {
-                "success": True,
-                "response": filtered_response,
-                "session_id": session_id,
-                "metadata": {
-                    "processing_time_ms": processing_time * 1000,
-                    "passed_guardrails": passed_guardrails,
-                    "user_id": user_id,
-                    "timestamp": start_time.isoformat()
-                }
-            }
+        finally:
+            # Interrompe a geração no modelo se o stream não foi até o fim
+            close = getattr(stream, "close", None)
+            if close is not None:
+                close()
 
-        except Exception as e:
-            self.logger.error(f"Error processing message: {e}", exc_info=True)
-            self.stats["failed_interactions"] += 1
+    def process_many(
+        self,
+        messages: Iterable[Union[str, Dict[str, Any]]],
+        concurrency: int = 8,
+        checkpoint_path: Optional[str] = None,
+        timeout: Optional[float] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Processa um lote de mensagens em paralelo, em streaming.
+
+        No máximo ``concurrency`` mensagens ficam em andamento; a entrada é
+        lida sob demanda, então geradores com milhões de itens não são
+        carregados inteiros. O teto de chamadas simultâneas ao modelo
+        (``max_in_flight``) continua valendo entre todos os lotes e agentes
+        do processo.
+
+        Com ``checkpoint_path``, cada resultado bem-sucedido é gravado assim
+        que termina; rodar de novo com o mesmo arquivo pula os itens já
+        concluídos (falhas são reprocessadas). Sem ``id`` nos itens, a chave
+        é a posição no lote, então a entrada precisa vir na mesma ordem.
+
+        Args:
+            messages: Strings ou dicts com ``message`` e, opcionalmente,
+                ``id``, ``session_id`` e ``user_id``
+            concurrency: Mensagens processadas em paralelo (threads)
+            checkpoint_path: Arquivo JSONL de checkpoint (opcional)
+            timeout: Orçamento de cada mensagem em segundos
+                (padrão: ``request_timeout``)
+
+        Yields:
+            Resultado de ``process`` com o campo ``id``, na ordem em que
+            terminam
+        """
+        if concurrency < 1:
+            raise ValueError("concurrency must be >= 1")
+
+        checkpoint = BatchCheckpoint(checkpoint_path) if checkpoint_path else None
+        skipped = 0
+
+        def jobs() -> Iterator[Dict[str, Any]]:
+            nonlocal skipped
+            for index, item in enumerate(messages):
+                job = {"message": item} if isinstance(item, str) else dict(item)
+                job["id"] = str(job.get("id", index))
+                if checkpoint is not None and job["id"] in checkpoint:
+                    skipped += 1
+                    continue
+                yield job
+
+        pending: Dict[Future, str] = {}
+        pool = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix=f"{self.agent_name}-batch")
+        job_iter = jobs()
+
+        def submit_next() -> bool:
+            job = next(job_iter, None)
+            if job is None:
+                return False
+            future = pool.submit(
+                self.process,
+                job["message"],
+                session_id=job.get("session_id"),
+                user_id=job.get("user_id"),
+                timeout=timeout
+            )
+            pending[future] = job["id"]
+            return True
+
+        try:
+            while len(pending) < concurrency and submit_next():
+                pass
+
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    result = {"id": pending.pop(future), **future.result()}
+                    if checkpoint is not None and result["success"]:
+                        checkpoint.record(result["id"], result)
+                    yield result
+
+                while len(pending) < concurrency and submit_next():
+                    pass
+        finally:
+            # Consumidor parou no meio: descarta o que não começou
+            pool.shutdown(wait=True, cancel_futures=True)
+            if checkpoint is not None:
+                checkpoint.close()
+            if skipped:
+                self.logger.info(f"Batch resumed: {skipped} items already in checkpoint")
+
+    def _prepare(
+        self,
+        message: str,
+        session_id: Optional[str]
+    ) -> tuple[Optional[Dict[str, Any]], str]:
+        """
+        Valida o input e garante um session_id.
 
+        Returns:
+            Tuple (resposta_de_erro ou None, session_id)
+        """
+        is_valid, error_msg = self.validate_input(message)
+        if not is_valid:
+            self._count(failed_interactions=1)
             return {
                 "success": False,
-                "error": str(e),
-                "response": "Desculpe, ocorreu um erro ao processar sua mensagem. Tente novamente."
+                "error": error_msg,
+                "response": f"Erro: {error_msg}"
+            }, session_id
+
+        if not session_id:
+            session_id = f"session_{datetime.utcnow().strftime('%Y%m%d%H%M%S%f')}"
+
+        return None, session_id
+
+    def _finish(
+        self,
+        response: Any,
+        session_id: str,
+        user_id: Optional[str],
+        start_time: datetime,
+        reserved_tokens: int = 0
+    ) -> Dict[str, Any]:
+        """Aplica guardrails, atualiza métricas e monta a resposta."""
+        # Extrair resposta (response pode ser RunResponse object)
+        response_text = str(response.content) if hasattr(response, 'content') else str(response)
+
+        # Aplicar guardrails
+        filtered_response, passed_guardrails = self.apply_guardrails(response_text)
+
+        # Contabilizar tokens e custo da execução
+        usage = self._record_usage(
+            getattr(response, "metrics", None), session_id, user_id, reserved_tokens
+        )
+
+        return self._success_result(
+            filtered_response, passed_guardrails, session_id, user_id, start_time,
+            usage=usage
+        )
+
+    def _record_usage(
+        self,
+        metrics: Any,
+        session_id: str,
+        user_id: Optional[str],
+        reserved_tokens: int = 0
+    ) -> Dict[str, Any]:
+        """
+        Soma os tokens da execução nas estatísticas e no ledger.
+
+        Com rate limiter, troca a estimativa cobrada do TPM pelo uso real.
+
+        Args:
+            metrics: ``response.metrics`` da execução do AGNO
+            session_id: ID da sessão
+            user_id: ID do usuário (opcional)
+            reserved_tokens: Tokens estimados cobrados do limiter
+
+        Returns:
+            Dict com tokens de prompt, completion, cacheados e custo em USD
+        """
+        usage = usage_from_metrics(metrics)
+
+        # Sem métricas (stream interrompido), a estimativa fica cobrada
+        if self.rate_limiter is not None and usage.total_tokens:
+            self._session_tokens.set(session_id, usage.total_tokens)
+            if reserved_tokens:
+                self.rate_limiter.record_usage(reserved_tokens, usage.total_tokens)
+
+        if self.token_ledger is not None:
+            cost = self.token_ledger.record(
+                self.agent_name, session_id, user_id, self.model_id, usage
+            )
+        else:
+            cost = price_usage(self.model_id, usage)
+
+        self._count(
+            prompt_tokens=usage.prompt_tokens,
+            completion_tokens=usage.completion_tokens,
+            cached_tokens=usage.cached_tokens,
+            total_tokens=usage.total_tokens,
+            total_cost=cost
+        )
+
+        return {
+            "prompt_tokens": usage.prompt_tokens,
+            "completion_tokens": usage.completion_tokens,
+            "cached_tokens": usage.cached_tokens,
+            "cost": cost
+        }
+
+    def _success_result(
+        self,
+        response_text: str,
+        passed_guardrails: bool,
+        session_id: str,
+        user_id: Optional[str],
+        start_time: datetime,
+        **metadata: Any
+    ) -> Dict[str, Any]:
+        """Atualiza métricas, registra log e monta a resposta de sucesso."""
+        # Calcular métricas e atualizar estatísticas
+        processing_time = (datetime.utcnow() - start_time).total_seconds()
+        self._count(
+            total_interactions=1,
+            successful_interactions=1,
+            total_processing_time=processing_time
+        )
+
+        # Log da interação
+        self.logger.info(
+            f"Interaction processed - Session: {session_id}, "
+            f"User: {user_id or 'anonymous'}, "
+            f"Time: {processing_time:.2f}s"
+        )
+
+        return {
+            "success": True,
+            "response": response_text,
+            "session_id": session_id,
+            "metadata": {
+                "processing_time_ms": processing_time * 1000,
+                "passed_guardrails": passed_guardrails,
+                "user_id": user_id,
+                "timestamp": start_time.isoformat(),
+                **metadata
             }
+        }
+
+    def _cached_result(
+        self,
+        message: str,
+        session_id: str,
+        user_id: Optional[str],
+        start_time: datetime
+    ) -> tuple[Optional[Dict[str, Any]], bool]:
+        """
+        Consulta o cache de respostas e registra o turno da sessão.
+
+        Returns:
+            Tuple (resposta do cache ou None, se o turno pode usar o cache)
+        """
+        if self.response_cache is None:
+            return None, False
+
+        personalized = self._is_personalized(session_id, user_id)
+        self._note_session_turn(session_id)
+        if personalized:
+            self.response_cache.record_bypass()
+            return None, False
+
+        hit = self.response_cache.lookup(self._cache_namespace, message)
+        if hit is None:
+            return None, True
+
+        response_text, tier = hit
+        self.logger.info(f"Response cache hit ({tier}) - Session: {session_id}")
+        return self._success_result(
+            response_text, True, session_id, user_id, start_time, cache=tier
+        ), True
+
+    def _store_result(self, message: str, result: Dict[str, Any], use_cache: bool):
+        """Guarda no cache respostas que passaram nos guardrails."""
+        if use_cache and result["success"] and result["metadata"]["passed_guardrails"]:
+            self.response_cache.store(self._cache_namespace, message, result["response"])
+
+    def _is_personalized(self, session_id: str, user_id: Optional[str]) -> bool:
+        """
+        Indica se a resposta depende de contexto da sessão.
+
+        Por padrão, qualquer sessão que já teve um turno (o histórico entra
+        no prompt) ou marcada com ``mark_personalized``. Sobrescreva para
+        regras próprias (ex: agentes que usam dados do usuário no prompt).
+        """
+        return self._personalized_sessions.get(session_id) is not None
+
+    def _note_session_turn(self, session_id: str):
+        """Registra que a sessão tem histórico (próximos turnos não usam cache)."""
+        if self.response_cache is not None:
+            self._personalized_sessions.set(session_id, True)
+
+    def mark_personalized(self, session_id: str):
+        """
+        Marca sessão com contexto personalizado (ex: dados do CRM no prompt).
+
+        Args:
+            session_id: ID da sessão
+        """
+        self._personalized_sessions.set(session_id, True)
+
+    def invalidate_response_cache(self, message: Optional[str] = None) -> int:
+        """
+        Remove respostas deste agente do cache (ex: após mudar preços).
+
+        Args:
+            message: Só a resposta desta mensagem (None = todas do agente)
+
+        Returns:
+            Número de respostas removidas
+        """
+        if self.response_cache is None:
+            return 0
+        return self.response_cache.invalidate(namespace=self._cache_namespace, message=message)
+
+    def _timeout_result(self, session_id: Optional[str], user_id: Optional[str]) -> Dict[str, Any]:
+        """Resposta para turnos que estouraram o deadline."""
+        self.logger.warning(
+            f"Request deadline exceeded - Session: {session_id}, "
+            f"User: {user_id or 'anonymous'}"
+        )
+        self._count(failed_interactions=1)
+
+        return {
+            "success": False,
+            "error": "timeout",
+            "response": "Desculpe, sua solicitação demorou mais que o esperado. Tente novamente."
+        }
+
+    def _error_result(self, error: Exception) -> Dict[str, Any]:
+        """Resposta para erros inesperados."""
+        self.logger.error(f"Error processing message: {error}", exc_info=True)
+        self._count(failed_interactions=1)
+        self._handle_rate_limit_error(error)
+
+        return {
+            "success": False,
+            "error": str(error),
+            "response": "Desculpe, ocorreu um erro ao processar sua mensagem. Tente novamente."
+        }
+
+    def _run_model(self, func: Callable, *args, **kwargs) -> Any:
+        """
+        Chama o modelo respeitando o limite de chamadas simultâneas do modelo.
+
+        Para funções coroutine, retorna a coroutine a ser aguardada.
+        """
+        if self.concurrency_limiter is None:
+            return func(*args, **kwargs)
+        return self.concurrency_limiter.call(func, *args, **kwargs)
+
+    def _stream_model(self, func: Callable, *args, **kwargs) -> Iterator:
+        """
+        Abre o stream do modelo respeitando o limite de chamadas simultâneas.
+
+        A vaga fica ocupada enquanto o stream é consumido.
+        """
+        if self.concurrency_limiter is None:
+            return iter(func(*args, **kwargs))
+        return self.concurrency_limiter.iterate(func, *args, **kwargs)
+
+    async def _arun_with_deadline(self, message: str, session_id: str) -> Any:
+        """Executa ``agent.arun`` cancelando a chamada quando o deadline acaba."""
+        try:
+            return await asyncio.wait_for(
+                self.agent.arun(message, session_id=session_id, stream=False),
+                timeout=remaining_time()
+            )
+        except asyncio.TimeoutError:
+            raise DeadlineExceeded("Request deadline exceeded")
+
+    def _estimate_request_tokens(self, message: str, session_id: str) -> int:
+        """
+        Estima os tokens da chamada: prompt completo + teto da resposta.
+
+        O prompt é o do último turno da sessão (instruções, tools e
+        histórico, pelo uso real) ou, no primeiro turno, instruções e tools.
+        """
+        context = self._session_tokens.get(session_id) or self._prompt_tokens
+        return context + estimate_tokens(message) + self.max_completion_tokens
+
+    def _wait_rate_limit(self, message: str, session_id: str) -> int:
+        """
+        Espera a vez no rate limiter do modelo (limitado pelo deadline).
+
+        Returns:
+            Tokens estimados cobrados do limiter (0 sem limiter)
+
+        Raises:
+            DeadlineExceeded: Se a espera passaria do deadline da requisição
+        """
+        if self.rate_limiter is None:
+            return 0
+
+        tokens = self._estimate_request_tokens(message, session_id)
+        if not self.rate_limiter.acquire(tokens):
+            raise DeadlineExceeded("Rate limit wait exceeded request deadline")
+        return tokens
+
+    async def _await_rate_limit(self, message: str, session_id: str) -> int:
+        """Versão async de ``_wait_rate_limit`` (não bloqueia o event loop)."""
+        if self.rate_limiter is None:
+            return 0
+
+        tokens = self._estimate_request_tokens(message, session_id)
+        if not await self.rate_limiter.aacquire(tokens):
+            raise DeadlineExceeded("Rate limit wait exceeded request deadline")
+        return tokens
+
+    def _handle_rate_limit_error(self, error: Exception):
+        """Pausa o limiter do modelo se o provedor devolveu Retry-After."""
+        if self.rate_limiter is None:
+            return
+
+        retry_after = retry_after_from_exception(error)
+        if retry_after is not None:
+            self.rate_limiter.pause(retry_after)
+
+    def _count(self, **amounts: float):
+        """Soma valores nas estatísticas (thread-safe)."""
+        with self._stats_lock:
+            for stat, amount in amounts.items():
+                self.stats[stat] += amount
 
     def get_stats(self) -> Dict[str, Any]:
         """
@@ -485,28 +1137,34 @@ class ProductionAgent:
         Returns:
             Dict com métricas
         """
-        total = self.stats["total_interactions"]
+        with self._stats_lock:
+            stats = dict(self.stats)
+
+        total = stats["total_interactions"]
         return {
-            **self.stats,
+            **stats,
             "success_rate": (
-                self.stats["successful_interactions"] / total
+                stats["successful_interactions"] / total
                 if total > 0 else 0
             ),
             "avg_processing_time": (
-                self.stats["total_processing_time"] / total
+                stats["total_processing_time"] / total
                 if total > 0 else 0
+            ),
+            "avg_ttft": (
+                stats["total_ttft"] / stats["streamed_interactions"]
+                if stats["streamed_interactions"] > 0 else 0
+            ),
+            "response_cache": (
+                self.response_cache.get_stats() if self.response_cache is not None else None
             )
         }
 
     def reset_stats(self):
         """Reseta estatísticas do agente."""
-        self.stats = {
-            "total_interactions": 0,
-            "successful_interactions": 0,
-            "failed_interactions": 0,
-            "total_tokens": 0,
-            "total_processing_time": 0.0
-        }
+        with self._stats_lock:
+            for stat, value in self.stats.items():
+                self.stats[stat] = type(value)()
         self.logger.info("Stats reset")
 
 
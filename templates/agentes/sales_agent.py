@@ -14,6 +14,7 @@ Funcionalidades:
 """
 
 from typing import Dict, List, Any, Optional
+import hashlib
 import json
 from datetime import datetime
 import logging
@@ -24,6 +25,13 @@ from agno.models.openai import OpenAIChat
 from agno.db.sqlite import SqliteDb
 from agno.tools.toolkit import Toolkit
 
+# Utilitários compartilhados (src/utils): execute com a raiz do repositório
+# no PYTHONPATH (ver templates/README.md)
+from src.utils import cached, DeadlineExceeded, get_rate_limiter
+from src.utils.cache import SimpleCache
+from src.utils.rate_limit import estimate_prompt_tokens, estimate_tokens, retry_after_from_exception
+from src.utils.token_ledger import usage_from_metrics
+
 
 # ==================== Sales Toolkit ====================
 
@@ -54,6 +62,29 @@ class SalesToolkit(Toolkit):
         self.crm_client = crm_client
         self.logger = logging.getLogger("SalesToolkit")
 
+    @property
+    def product_catalog(self) -> List[Dict[str, Any]]:
+        """Catálogo de produtos."""
+        return self._product_catalog
+
+    @product_catalog.setter
+    def product_catalog(self, catalog: List[Dict[str, Any]]):
+        """
+        Troca o catálogo e recalcula o digest usado nas chaves do @cached.
+
+        Após editar o catálogo in-place, reatribua-o
+        (``toolkit.product_catalog = toolkit.product_catalog``) para que
+        detalhes antigos não sejam servidos do cache.
+        """
+        # Chave do @cached: toolkits com o mesmo catálogo compartilham entradas
+        catalog_json = json.dumps(catalog, sort_keys=True, default=str)
+        self._catalog_digest = hashlib.sha1(catalog_json.encode("utf-8")).hexdigest()
+        self._product_catalog = catalog
+
+    def __cache_key__(self) -> str:
+        """Identifica o toolkit nas chaves do @cached (pelo catálogo)."""
+        return f"SalesToolkit:{self._catalog_digest}"
+
     def search_products(
         self,
         query: str,
@@ -107,6 +138,7 @@ class SalesToolkit(Toolkit):
             self.logger.error(f"Error searching products: {e}")
             return json.dumps({"success": False, "error": str(e)})
 
+    @cached(ttl=600, max_entries=512)
     def get_product_details(self, product_id: str) -> str:
         """
         Obtém detalhes completos de um produto específico.
@@ -522,7 +554,10 @@ class SalesAgent:
         db_path: str = "/tmp/sales_agent.db",
         product_catalog: Optional[List[Dict[str, Any]]] = None,
         crm_client: Optional[Any] = None,
-        logger: Optional[logging.Logger] = None
+        logger: Optional[logging.Logger] = None,
+        requests_per_minute: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None,
+        max_completion_tokens: int = 1024
     ):
         """
         Inicializa Sales Agent.
@@ -533,8 +568,22 @@ class SalesAgent:
             product_catalog: Catálogo de produtos customizado (opcional)
             crm_client: Cliente CRM para integração (opcional)
             logger: Logger customizado (opcional)
+            requests_per_minute: Limite de RPM do modelo (opcional)
+            tokens_per_minute: Limite de TPM do modelo (opcional)
+            max_completion_tokens: Teto de tokens da resposta (passado ao
+                modelo e reservado no limite de TPM)
         """
         self.logger = logger or self._setup_logger()
+        self.max_completion_tokens = max_completion_tokens
+
+        # Limiter por modelo, compartilhado com outros agentes (ex: ProductionAgent)
+        self.rate_limiter = None
+        if requests_per_minute or tokens_per_minute:
+            self.rate_limiter = get_rate_limiter(
+                model_id,
+                requests_per_minute=requests_per_minute,
+                tokens_per_minute=tokens_per_minute
+            )
 
         # Criar toolkit de vendas
         self.sales_toolkit = SalesToolkit(
@@ -543,11 +592,12 @@ class SalesAgent:
         )
 
         # Criar agente AGNO
+        instructions = self._get_instructions()
         self.agent = Agent(
             name="sales_agent",
-            model=OpenAIChat(id=model_id),
+            model=OpenAIChat(id=model_id, max_tokens=max_completion_tokens),
             description="Assistente comercial especializado em vendas B2B",
-            instructions=self._get_instructions(),
+            instructions=instructions,
             tools=[self.sales_toolkit],
             storage=SqliteDb(
                 table_name="sales_conversations",
@@ -559,6 +609,10 @@ class SalesAgent:
             markdown=True
         )
 
+        # Estimativa de TPM: prompt fixo e tokens reais do último turno da sessão
+        self._prompt_tokens = estimate_prompt_tokens(instructions, [self.sales_toolkit])
+        self._session_tokens = SimpleCache(default_ttl=24 * 3600, max_entries=100_000)
+
         # Estatísticas
         self.stats = {
             "total_conversations": 0,
@@ -693,6 +747,14 @@ class SalesAgent:
             if not session_id:
                 session_id = f"session_{datetime.utcnow().strftime('%Y%m%d%H%M%S%f')}"
 
+            # Esperar a vez no rate limiter do modelo (prompt completo + resposta)
+            reserved = 0
+            if self.rate_limiter is not None:
+                context = self._session_tokens.get(session_id) or self._prompt_tokens
+                reserved = context + estimate_tokens(message) + self.max_completion_tokens
+                if not self.rate_limiter.acquire(reserved):
+                    raise DeadlineExceeded("Rate limit wait exceeded request deadline")
+
             # Processar com AGNO
             response = self.agent.run(
                 message,
@@ -700,6 +762,12 @@ class SalesAgent:
                 stream=False
             )
 
+            # Trocar a estimativa cobrada do TPM pelo uso real
+            usage = usage_from_metrics(getattr(response, "metrics", None))
+            if self.rate_limiter is not None and usage.total_tokens:
+                self._session_tokens.set(session_id, usage.total_tokens)
+                self.rate_limiter.record_usage(reserved, usage.total_tokens)
+
             # Extrair resposta
             response_text = str(response.content) if hasattr(response, 'content') else str(response)
 
@@ -735,9 +803,21 @@ class SalesAgent:
                 }
             }
 
+        except DeadlineExceeded:
+            self.logger.warning(f"Rate limit wait exceeded deadline - Session: {session_id}")
+            return {
+                "success": False,
+                "error": "timeout",
+                "response": "Desculpe, estamos com muitas conversas agora. Tente novamente em instantes."
+            }
+
         except Exception as e:
             self.logger.error(f"Error processing message: {e}", exc_info=True)
 
+            retry_after = retry_after_from_exception(e)
+            if retry_after is not None and self.rate_limiter is not None:
+                self.rate_limiter.pause(retry_after)
+
             return {
                 "success": False,
                 "error": str(e),
@@ -2,10 +2,37 @@
 Fixtures compartilhadas para testes.
 """
 
+import asyncio
+import importlib.util
+import logging
+import sys
+import threading
+import time
+from pathlib import Path
+from types import ModuleType
+
 import pytest
 from unittest.mock import Mock
 
 
+TEMPLATES_DIR = Path(__file__).resolve().parents[1] / "templates" / "agentes"
+BASE_AGENT_PATH = TEMPLATES_DIR / "base_agent.py"
+SALES_AGENT_PATH = TEMPLATES_DIR / "sales_agent.py"
+
+
+MARKERS = {
+    "integration": "testes de integração com serviços externos (tests/integration)",
+    "e2e": "fluxos completos de conversa (tests/e2e)",
+    "performance": "benchmarks de tests/performance (pule com -m 'not performance')",
+}
+
+
+def pytest_configure(config):
+    """Registra os markers do projeto (necessário com ``--strict-markers``)."""
+    for name, description in MARKERS.items():
+        config.addinivalue_line("markers", f"{name}: {description}")
+
+
 @pytest.fixture
 def mock_llm_client():
     """Mock do cliente LLM."""
@@ -47,3 +74,149 @@ def agent_config():
         "max_tokens": 500,
         "max_input_length": 2000
     }
+
+
+class StubMetrics:
+    """Métricas no formato do AGNO (``input_tokens``/``output_tokens``)."""
+
+    def __init__(self, input_tokens: int, output_tokens: int):
+        self.input_tokens = input_tokens
+        self.output_tokens = output_tokens
+        self.cache_read_tokens = 0
+
+
+class StubResponse:
+    """Resposta (ou evento de stream) do agente stub."""
+
+    def __init__(self, content: str):
+        self.content = content
+        self.metrics = StubMetrics(len(content) // 4 + 50, len(content) // 4)
+
+
+class StubModelAgent:
+    """
+    Substituto de ``agno.agent.Agent``: ecoa a mensagem após ``latency``.
+
+    Conta chamadas e o pico de chamadas simultâneas ao "modelo".
+    """
+
+    latency = 0.0
+
+    def __init__(self, **config):
+        self.config = config
+        self.calls = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._lock = threading.Lock()
+
+    def run(self, message, session_id=None, stream=False):
+        if stream:
+            return self._stream(f"eco: {message}")
+        self._enter()
+        try:
+            time.sleep(self.latency)
+        finally:
+            self._exit()
+        return StubResponse(f"eco: {message}")
+
+    async def arun(self, message, session_id=None, stream=False):
+        self._enter()
+        try:
+            await asyncio.sleep(self.latency)
+        finally:
+            self._exit()
+        return StubResponse(f"eco: {message}")
+
+    def _stream(self, text: str, chunk_size: int = 4):
+        """Primeiro pedaço após ``latency``; os demais a cada ``latency / 5``."""
+        self._enter()
+        try:
+            time.sleep(self.latency)
+            for i in range(0, len(text), chunk_size):
+                if i:
+                    time.sleep(self.latency / 5)
+                yield StubResponse(text[i:i + chunk_size])
+        finally:
+            self._exit()
+
+    def _enter(self):
+        with self._lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def _exit(self):
+        with self._lock:
+            self.in_flight -= 1
+
+
+class _StubToolkit:
+    def __init__(self, name: str = "toolkit", **kwargs):
+        self.name = name
+
+
+def _stub_module(name: str, **attrs) -> ModuleType:
+    module = ModuleType(name)
+    module.__dict__.update(attrs)
+    return module
+
+
+def _load_template(monkeypatch, name: str, path: Path) -> ModuleType:
+    """
+    Importa um template de agente com o AGNO stubado.
+
+    ``agno`` não é dependência dos testes: os módulos usados pelos templates
+    são trocados em ``sys.modules`` só durante o teste.
+    """
+    stubs = {
+        "agno": _stub_module("agno"),
+        "agno.agent": _stub_module("agno.agent", Agent=StubModelAgent),
+        "agno.models": _stub_module("agno.models"),
+        "agno.models.openai": _stub_module("agno.models.openai", OpenAIChat=lambda **kwargs: kwargs),
+        "agno.db": _stub_module("agno.db"),
+        "agno.db.sqlite": _stub_module("agno.db.sqlite", SqliteDb=lambda **kwargs: kwargs),
+        "agno.tools": _stub_module("agno.tools"),
+        "agno.tools.toolkit": _stub_module("agno.tools.toolkit", Toolkit=_StubToolkit),
+    }
+    for name, module in stubs.items():
+        monkeypatch.setitem(sys.modules, name, module)
+
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def base_agent_module(monkeypatch):
+    """Módulo ``templates/agentes/base_agent.py`` importado com o AGNO stubado."""
+    return _load_template(monkeypatch, "base_agent", BASE_AGENT_PATH)
+
+
+@pytest.fixture
+def sales_agent_module(monkeypatch):
+    """Módulo ``templates/agentes/sales_agent.py`` importado com o AGNO stubado."""
+    return _load_template(monkeypatch, "sales_agent", SALES_AGENT_PATH)
+
+
+@pytest.fixture
+def make_agent(base_agent_module, tmp_path):
+    """
+    Fábrica de ``ProductionAgent`` (construído pelo ``__init__``) com o
+    modelo stub: ``agent.agent`` é um ``StubModelAgent``.
+    """
+    logger = logging.getLogger("test_agent")
+    logger.setLevel(logging.WARNING)
+
+    def make(latency: float = 0.0, **kwargs):
+        kwargs.setdefault("model_id", "stub")
+        agent = base_agent_module.ProductionAgent(
+            agent_name="test_agent",
+            db_path=str(tmp_path / "agent.db"),
+            logger=logger,
+            **kwargs
+        )
+        agent.agent.latency = latency
+        return agent
+
+    return make
@@ -0,0 +1,139 @@
+"""
+Teste de carga do ProductionAgent: ``aprocess`` vs ``process``, TTFT do
+``process_stream``, lotes com ``process_many`` e cache de respostas.
+
+Usa um modelo stub com latência fixa no lugar do LLM (fixture
+``make_agent`` em tests/conftest.py; não requer ``agno``).
+
+Executar com saída:
+    pytest tests/performance/test_agent_concurrency.py -v -s
+"""
+
+import asyncio
+import os
+import time
+
+import pytest
+
+from src.utils.response_cache import ResponseCache
+
+
+MODEL_LATENCY = 0.05
+CONVERSATIONS = int(os.getenv("AGENT_BENCH_CONVERSATIONS", "500"))
+
+
+@pytest.mark.performance
+class TestAsyncProcessLoad:
+    """Muitas conversas em andamento num único event loop."""
+
+    def test_aprocess_overlaps_model_latency(self, make_agent):
+        agent = make_agent(latency=MODEL_LATENCY)
+
+        async def serve():
+            return await asyncio.gather(*(
+                agent.aprocess(f"Mensagem {i}", session_id=f"s{i}")
+                for i in range(CONVERSATIONS)
+            ))
+
+        start = time.perf_counter()
+        results = asyncio.run(serve())
+        async_elapsed = time.perf_counter() - start
+
+        sequential_n = 20
+        start = time.perf_counter()
+        for i in range(sequential_n):
+            agent.process(f"Mensagem {i}", session_id=f"s{i}")
+        per_call = (time.perf_counter() - start) / sequential_n
+
+        sequential_estimate = per_call * CONVERSATIONS
+        print(
+            f"\n{CONVERSATIONS} conversas: aprocess {async_elapsed:.2f}s "
+            f"vs process sequencial ~{sequential_estimate:.1f}s "
+            f"({sequential_estimate / async_elapsed:.0f}x), "
+            f"pico em andamento: {agent.agent.peak_in_flight}"
+        )
+
+        assert all(r["success"] for r in results)
+        assert agent.agent.peak_in_flight >= CONVERSATIONS * 0.9
+        assert async_elapsed < sequential_estimate / 10
+        assert agent.stats["successful_interactions"] == CONVERSATIONS + sequential_n
+
+
+@pytest.mark.performance
+class TestStreamingLatency:
+    """TTFT do streaming medido separado da latência total."""
+
+    def test_first_chunk_arrives_before_full_response(self, make_agent):
+        agent = make_agent(latency=MODEL_LATENCY)
+        message = "Quanto custa o plano Enterprise com suporte dedicado?"
+
+        start = time.perf_counter()
+        first_chunk_at = None
+        events = []
+        for event in agent.process_stream(message):
+            if event["type"] == "chunk" and first_chunk_at is None:
+                first_chunk_at = time.perf_counter() - start
+            events.append(event)
+        total = time.perf_counter() - start
+
+        done = events[-1]
+        ttft_ms = done["metadata"]["ttft_ms"]
+        print(
+            f"\nTTFT {ttft_ms:.0f}ms, primeiro chunk liberado em "
+            f"{first_chunk_at * 1000:.0f}ms, total {total * 1000:.0f}ms"
+        )
+
+        assert done["success"] and done["metadata"]["passed_guardrails"]
+        assert done["response"] == f"eco: {message}"
+        assert "".join(e["content"] for e in events[:-1]) == done["response"]
+        assert ttft_ms < done["metadata"]["processing_time_ms"] / 3
+        assert first_chunk_at < total / 2
+        assert agent.get_stats()["avg_ttft"] == pytest.approx(ttft_ms / 1000)
+
+
+@pytest.mark.performance
+class TestBatchProcessing:
+    """process_many: paralelismo limitado, teto por modelo e checkpoint."""
+
+    def test_bounded_parallelism_speeds_up_batch(self, make_agent):
+        agent = make_agent(latency=0.02)
+        n = 200
+
+        start = time.perf_counter()
+        results = list(agent.process_many((f"Lead {i}" for i in range(n)), concurrency=20))
+        elapsed = time.perf_counter() - start
+
+        print(f"\n{n} mensagens com concurrency=20: {elapsed:.2f}s (sequencial ~{n * 0.02:.1f}s)")
+
+        assert sorted(int(r["id"]) for r in results) == list(range(n))
+        assert all(r["success"] for r in results)
+        assert agent.agent.peak_in_flight <= 20
+        assert elapsed < n * 0.02 / 5
+
+
+@pytest.mark.performance
+class TestResponseCacheLoad:
+    """Perguntas repetidas servidas do cache, sem pagar a latência do LLM."""
+
+    def _agent(self, make_agent):
+        return make_agent(latency=0.02, response_cache=ResponseCache(ttl=60))
+
+    def test_repeated_questions_skip_the_model(self, make_agent):
+        agent = self._agent(make_agent)
+        questions = ["Quanto custa o plano Pro?", "Como integro com o CRM?", "Tem teste grátis?"]
+        traffic = [questions[i % 3] if i % 10 else f"Pergunta única {i}" for i in range(100)]
+
+        start = time.perf_counter()
+        results = [agent.process(q) for q in traffic]
+        elapsed = time.perf_counter() - start
+
+        cache_stats = agent.get_stats()["response_cache"]
+        print(
+            f"\n100 mensagens: {elapsed:.2f}s, chamadas ao modelo: {agent.agent.calls}, "
+            f"hit rate: {cache_stats['hit_rate']:.0%}"
+        )
+
+        assert all(r["success"] for r in results)
+        assert agent.agent.calls == 3 + 10
+        assert results[-1]["metadata"]["cache"] == "exact"
+        assert elapsed < 100 * 0.02 / 3
@@ -0,0 +1,107 @@
+"""
+Benchmarks do cache em memória.
+
+Executar com saída:
+    pytest tests/performance/ -v -s
+
+O número de chaves vivas pode ser ajustado com CACHE_BENCH_KEYS.
+"""
+
+import os
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Any, Optional, Tuple
+from unittest.mock import patch
+
+import pytest
+
+from src.utils.cache import SimpleCache
+
+
+LIVE_KEYS = int(os.getenv("CACHE_BENCH_KEYS", "1000000"))
+EXPIRING_KEYS = 1_000
+MEMORY_BENCH_KEYS = 100_000
+
+
+@dataclass
+class LegacyCacheEntry:
+    """Entrada com __dict__, como antes do modo compacto."""
+    value: Any
+    expires_at: float
+    size: int = 0
+    stale_at: Optional[float] = None
+    tags: Optional[Tuple[str, ...]] = None
+
+
+def _bytes_per_entry(n: int) -> float:
+    """Memória alocada pelo cache por entrada (chaves e valores pré-alocados)."""
+    keys = [f"customer_{i}" for i in range(n)]
+
+    tracemalloc.start()
+    try:
+        cache = SimpleCache(default_ttl=3600)
+        for key in keys:
+            cache.set(key, 1)
+        current, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert len(cache) == n
+    return current / n
+
+
+def _reaper_pass_cost(live_keys: int, rounds: int = 5) -> float:
+    """Mede o custo (melhor de N) de uma passada que remove EXPIRING_KEYS entradas."""
+    cache = SimpleCache(default_ttl=3600)
+    for i in range(live_keys):
+        cache.set(f"live_{i}", i)
+
+    best = float("inf")
+    for r in range(rounds):
+        for i in range(EXPIRING_KEYS):
+            cache.set(f"due_{r}_{i}", i, ttl=-1)
+
+        start = time.perf_counter()
+        removed = cache.cleanup_expired()
+        best = min(best, time.perf_counter() - start)
+
+        assert removed == EXPIRING_KEYS
+
+    assert len(cache) == live_keys
+    return best
+
+
+@pytest.mark.performance
+class TestReaperBenchmark:
+    """Custo do reaper independe do número de chaves vivas."""
+
+    def test_reaper_cost_is_constant_in_live_keys(self):
+        small = _reaper_pass_cost(10_000)
+        large = _reaper_pass_cost(LIVE_KEYS)
+
+        print(
+            f"\nreaper pass ({EXPIRING_KEYS} due): "
+            f"10k live={small * 1000:.2f}ms, "
+            f"{LIVE_KEYS // 1000}k live={large * 1000:.2f}ms"
+        )
+
+        # O(k log n): log(1M)/log(10k) = 1.5; margem para ruído
+        assert large < small * 5
+
+
+@pytest.mark.performance
+class TestMemoryBenchmark:
+    """Bytes por entrada: entradas com __slots__ vs dataclass com __dict__."""
+
+    def test_slotted_entries_use_less_memory(self):
+        compact = _bytes_per_entry(MEMORY_BENCH_KEYS)
+        with patch("src.utils.cache.CacheEntry", LegacyCacheEntry):
+            legacy = _bytes_per_entry(MEMORY_BENCH_KEYS)
+
+        print(
+            f"\nbytes/entry: slotted={compact:.0f}, legacy={legacy:.0f} "
+            f"({(1 - compact / legacy) * 100:.0f}% menos)"
+        )
+
+        assert compact < legacy
@@ -0,0 +1,52 @@
+"""
+Benchmarks do ledger de tokens: gravação por execução e consultas nos rollups.
+
+Executar com saída:
+    pytest tests/performance/test_ledger_benchmarks.py -v -s
+"""
+
+import os
+import time
+from datetime import date, timedelta
+
+import pytest
+
+from src.utils.token_ledger import TokenLedger, TokenUsage
+
+
+RUNS = int(os.getenv("LEDGER_BENCH_RUNS", "20000"))
+
+
+@pytest.mark.performance
+class TestTokenLedgerBenchmarks:
+    def test_queries_read_rollups_not_events(self, tmp_path):
+        ledger = TokenLedger(str(tmp_path / "ledger.db"))
+        first_day = date(2025, 1, 1)
+
+        start = time.perf_counter()
+        for i in range(RUNS):
+            ledger.record(
+                f"agente_{i % 3}",
+                f"sessao_{i % 2000}",
+                f"usuario_{i % 200}",
+                "gpt-4o",
+                TokenUsage(800 + i % 400, 150 + i % 100, i % 300),
+                day=first_day + timedelta(days=i % 30)
+            )
+        record_us = (time.perf_counter() - start) / RUNS * 1e6
+
+        start = time.perf_counter()
+        top = ledger.top_consumers("user", n=10, since=first_day + timedelta(days=23))
+        daily = ledger.daily_totals()
+        query_ms = (time.perf_counter() - start) * 1000
+
+        rollup_rows = ledger._conn().execute("SELECT COUNT(*) FROM usage_rollups").fetchone()[0]
+        print(
+            f"\n{RUNS} execuções -> {rollup_rows} linhas de rollup; "
+            f"record {record_us:.0f}us/execução, top-10 + totais diários {query_ms:.1f}ms"
+        )
+
+        assert len(top) == 10
+        assert len(daily) == 30
+        assert sum(row["runs"] for row in daily) == RUNS
+        assert query_ms < 500
@@ -0,0 +1,157 @@
+"""
+Benchmarks do scanner de prompt injection e sanitização.
+
+Executar com saída:
+    pytest tests/performance/test_validator_benchmarks.py -v -s
+"""
+
+import os
+import re
+import time
+
+import pytest
+
+from src.utils.validators import (
+    check_prompt_injection,
+    find_injection_rules,
+    sanitize_input,
+    validate_contacts,
+)
+
+
+INPUT_SIZE = 10 * 1024
+ROUNDS = 50
+CONTACT_ROWS = int(os.getenv("CONTACT_BENCH_ROWS", "1000000"))
+
+
+def _legacy_sanitize(text: str, max_length: int) -> str:
+    """Sanitização anterior: três re.sub com padrões não-gulosos."""
+    text = ' '.join(text.split())[:max_length]
+    for pattern in (r'<script.*?>.*?</script>', r'javascript:', r'on\w+\s*='):
+        text = re.sub(pattern, '', text, flags=re.IGNORECASE)
+    return text.strip()
+
+
+def _legacy_injection(text: str) -> bool:
+    """Detecção anterior: cinco re.search em sequência + loop de substrings."""
+    patterns = [
+        r'ignore\s+(all\s+)?previous\s+instructions?',
+        r'disregard\s+(all\s+)?previous',
+        r'forget\s+everything',
+        r'you\s+are\s+now',
+        r'new\s+instructions?:',
+    ]
+    text_lower = text.lower()
+    found = any(re.search(pattern, text_lower) for pattern in patterns)
+    substrings = ["ignore previous instructions", "ignore all previous",
+                  "disregard all", "forget everything", "you are now"]
+    return found or any(s in text_lower for s in substrings)
+
+
+def _new_injection(text: str) -> bool:
+    """Caminho atual: check_prompt_injection + validate_input num só scanner."""
+    return check_prompt_injection(text)[0] or bool(find_injection_rules(text))
+
+
+def _best_of(func, text: str) -> float:
+    best = float("inf")
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        func(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _benign_text() -> str:
+    sentence = "Olá, gostaria de saber o preço do plano Enterprise para 50 usuários. "
+    return (sentence * (INPUT_SIZE // len(sentence) + 1))[:INPUT_SIZE]
+
+
+def _adversarial_text(size: int = INPUT_SIZE) -> str:
+    # Muitas aberturas de <script sem fechamento: pior caso do .*? anterior
+    return ("<script " * (size // 8 + 1))[:size]
+
+
+@pytest.mark.performance
+class TestScannerBenchmark:
+    """Scanner único vs passadas múltiplas em entradas de 10 KB."""
+
+    def test_sanitize_adversarial_input_is_linear(self):
+        text = _adversarial_text()
+
+        new = _best_of(lambda t: sanitize_input(t, max_length=INPUT_SIZE), text)
+        legacy = _best_of(lambda t: _legacy_sanitize(t, INPUT_SIZE), text)
+
+        larger = _adversarial_text(4 * INPUT_SIZE)
+        new_4x = _best_of(lambda t: sanitize_input(t, max_length=4 * INPUT_SIZE), larger)
+
+        print(
+            f"\nsanitize 10KB adversarial: scanner={new * 1000:.3f}ms, legacy={legacy * 1000:.3f}ms; "
+            f"scanner 40KB={new_4x * 1000:.3f}ms"
+        )
+        assert new < legacy
+        # Linear: 4x o tamanho custa ~4x (quadrático seria ~16x)
+        assert new_4x < new * 10
+
+    def test_sanitize_benign_input(self):
+        text = _benign_text()
+
+        new = _best_of(lambda t: sanitize_input(t, max_length=INPUT_SIZE), text)
+        legacy = _best_of(lambda t: _legacy_sanitize(t, INPUT_SIZE), text)
+
+        print(f"\nsanitize 10KB benign: scanner={new * 1000:.3f}ms, legacy={legacy * 1000:.3f}ms")
+
+    def test_injection_check_benign_input(self):
+        text = _benign_text()
+
+        new = _best_of(_new_injection, text)
+        legacy = _best_of(_legacy_injection, text)
+
+        print(f"\ninjection 10KB benign: scanner={new * 1000:.3f}ms, legacy={legacy * 1000:.3f}ms")
+        assert _new_injection(text) is _legacy_injection(text) is False
+
+
+def _legacy_contact_row(email: str, phone: str):
+    """Validação linha a linha anterior (regex por chamada, filter(isdigit))."""
+    email = email.strip().lower()
+    email_ok = bool(re.match(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$', email))
+    digits = ''.join(filter(str.isdigit, phone))
+    phone_ok = 10 <= len(digits) <= 11
+    digits = ''.join(filter(str.isdigit, phone))
+    if len(digits) == 11:
+        formatted = f"({digits[:2]}) {digits[2:7]}-{digits[7:]}"
+    elif len(digits) == 10:
+        formatted = f"({digits[:2]}) {digits[2:6]}-{digits[6:]}"
+    else:
+        formatted = phone
+    return email, email_ok, formatted, phone_ok
+
+
+@pytest.mark.performance
+class TestContactBatchBenchmark:
+    """Importação de leads: lote em streaming vs linha a linha."""
+
+    def test_million_rows(self):
+        emails = [f" Lead{i}@Empresa.com.br " if i % 7 else "invalido@" for i in range(CONTACT_ROWS)]
+        phones = [f"(11) 9{i % 10000:04d}-{i % 10000:04d}" if i % 5 else "123" for i in range(CONTACT_ROWS)]
+
+        start = time.perf_counter()
+        rows = valid = 0
+        for batch in validate_contacts(emails, phones):
+            rows += len(batch)
+            valid += sum(batch.email_valid)
+        batch_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for email, phone in zip(emails, phones):
+            _legacy_contact_row(email, phone)
+        legacy_time = time.perf_counter() - start
+
+        print(
+            f"\n{CONTACT_ROWS // 1000}k contatos: lote={batch_time:.2f}s, "
+            f"linha a linha={legacy_time:.2f}s"
+        )
+
+        assert rows == CONTACT_ROWS
+        assert valid == CONTACT_ROWS - len(range(0, CONTACT_ROWS, 7))
+        assert batch_time < legacy_time
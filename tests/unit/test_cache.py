@@ -0,0 +1,598 @@
+"""
+Testes unitários para o cache em memória.
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.utils.cache import SimpleCache
+
+
+class TestBasicCache:
+    """Testes de operações básicas."""
+
+    def test_set_and_get(self):
+        cache = SimpleCache()
+        cache.set("a", 1)
+        assert cache.get("a") == 1
+
+    def test_missing_key_returns_none(self):
+        cache = SimpleCache()
+        assert cache.get("nao_existe") is None
+
+    def test_expired_entry_returns_none(self):
+        cache = SimpleCache()
+        cache.set("a", 1, ttl=-1)
+        assert cache.get("a") is None
+        assert len(cache) == 0
+
+    def test_delete(self):
+        cache = SimpleCache()
+        cache.set("a", 1)
+        cache.delete("a")
+        assert cache.get("a") is None
+
+
+class TestLRUEviction:
+    """Testes de limites e eviction LRU."""
+
+    def test_max_entries_evicts_least_recent(self):
+        cache = SimpleCache(max_entries=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")  # "b" passa a ser o menos recente
+        cache.set("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert cache.stats["evictions"] == 1
+
+    def test_max_bytes_keeps_size_under_limit(self):
+        cache = SimpleCache(max_bytes=10_000)
+        for i in range(1_000):
+            cache.set(f"key_{i}", "x" * 100)
+
+        assert cache.current_bytes <= 10_000
+        assert 0 < len(cache) < 1_000
+        assert cache.stats["evictions"] > 0
+
+    def test_oversized_value_is_rejected(self):
+        cache = SimpleCache(max_bytes=1_000)
+        cache.set("grande", "x" * 5_000)
+
+        assert cache.get("grande") is None
+        assert cache.stats["rejected"] == 1
+
+    def test_overwrite_updates_byte_accounting(self):
+        cache = SimpleCache()
+        cache.set("a", "x" * 1_000)
+        big = cache.current_bytes
+        cache.set("a", "x")
+
+        assert cache.current_bytes < big
+        assert len(cache) == 1
+
+    def test_memory_stays_flat_with_many_distinct_keys(self):
+        cache = SimpleCache(max_entries=1_000)
+        for i in range(50_000):
+            cache.set(f"customer_{i}", {"id": i})
+
+        assert len(cache) == 1_000
+        assert cache.stats["evictions"] == 49_000
+
+    def test_stats_hit_rate(self):
+        cache = SimpleCache()
+        cache.set("a", 1)
+        cache.get("a")
+        cache.get("b")
+
+        stats = cache.get_stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == pytest.approx(0.5)
+
+
+class TestExpiryIndex:
+    """Testes do índice de expiração e do reaper."""
+
+    def test_cleanup_removes_only_expired(self):
+        cache = SimpleCache()
+        cache.set("vencida", 1, ttl=-1)
+        cache.set("viva", 2, ttl=60)
+
+        assert cache.cleanup_expired() == 1
+        assert cache.get("viva") == 2
+        assert len(cache) == 1
+
+    def test_cleanup_ignores_overwritten_keys(self):
+        cache = SimpleCache()
+        cache.set("a", 1, ttl=-1)
+        cache.set("a", 2, ttl=60)  # item antigo no heap fica obsoleto
+
+        assert cache.cleanup_expired() == 0
+        assert cache.get("a") == 2
+
+    def test_cleanup_respects_max_items(self):
+        cache = SimpleCache()
+        for i in range(10):
+            cache.set(f"k{i}", i, ttl=-1)
+
+        assert cache.cleanup_expired(max_items=3) == 3
+        assert len(cache) == 7
+
+    def test_expiry_index_is_compacted(self):
+        cache = SimpleCache(max_entries=10)
+        for i in range(20_000):
+            cache.set(f"k{i}", i)
+
+        assert cache.get_stats()["expiry_index_size"] <= 2 * 10 + 1024 + 1
+
+    def test_reaper_thread_removes_expired(self):
+        cache = SimpleCache()
+        cache.set("a", 1, ttl=0.01)
+        cache.start_reaper(interval=0.01)
+        try:
+            deadline = time.monotonic() + 2
+            while len(cache) and time.monotonic() < deadline:
+                time.sleep(0.01)
+        finally:
+            cache.stop_reaper()
+
+        assert len(cache) == 0
+
+
+class TestSingleFlight:
+    """Testes de get_or_compute e concorrência."""
+
+    def test_get_or_compute_caches_result(self):
+        cache = SimpleCache()
+        calls = []
+
+        def loader():
+            calls.append(1)
+            return "valor"
+
+        assert cache.get_or_compute("a", loader) == "valor"
+        assert cache.get_or_compute("a", loader) == "valor"
+        assert len(calls) == 1
+
+    def test_concurrent_callers_run_loader_once(self):
+        cache = SimpleCache()
+        calls = []
+        barrier = threading.Barrier(20)
+
+        def loader():
+            calls.append(1)
+            time.sleep(0.05)
+            return 42
+
+        def worker():
+            barrier.wait()
+            return cache.get_or_compute("popular", loader)
+
+        with ThreadPoolExecutor(max_workers=20) as pool:
+            results = list(pool.map(lambda _: worker(), range(20)))
+
+        assert results == [42] * 20
+        assert len(calls) == 1
+        assert cache.stats["coalesced"] == 19
+
+    def test_loader_exception_propagates_and_is_not_cached(self):
+        cache = SimpleCache()
+
+        def failing():
+            raise ValueError("backend fora")
+
+        with pytest.raises(ValueError):
+            cache.get_or_compute("a", failing)
+
+        assert cache.get_or_compute("a", lambda: "ok") == "ok"
+
+    def test_thread_pool_hammering_keeps_invariants(self):
+        cache = SimpleCache(max_entries=100)
+
+        def worker(n):
+            for i in range(500):
+                key = f"k{(n * 7 + i) % 300}"
+                cache.set(key, i)
+                cache.get(key)
+                if i % 50 == 0:
+                    cache.delete(key)
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(worker, range(8)))
+
+        assert len(cache) <= 100
+        assert cache.current_bytes == sum(e.size for e in cache._cache.values())
+
+    def test_async_callers_run_loader_once(self):
+        cache = SimpleCache()
+        calls = []
+
+        async def loader():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "resposta"
+
+        async def main():
+            return await asyncio.gather(*[
+                cache.aget_or_compute("llm", loader) for _ in range(50)
+            ])
+
+        results = asyncio.run(main())
+
+        assert results == ["resposta"] * 50
+        assert len(calls) == 1
+        assert cache.get("llm") == "resposta"
+
+    def test_async_cancelled_caller_does_not_cancel_load(self):
+        cache = SimpleCache()
+
+        async def loader():
+            await asyncio.sleep(0.02)
+            return 1
+
+        async def main():
+            first = asyncio.ensure_future(cache.aget_or_compute("a", loader))
+            second = asyncio.ensure_future(cache.aget_or_compute("a", loader))
+            await asyncio.sleep(0)
+            first.cancel()
+            return await second
+
+        assert asyncio.run(main()) == 1
+
+
+class TestStaleWhileRevalidate:
+    """Testes de TTL soft/hard e cache negativo."""
+
+    def test_stale_value_served_while_refreshing(self):
+        cache = SimpleCache()
+        cache.set("crm", "antigo", ttl=60, soft_ttl=-1)
+        refreshed = threading.Event()
+
+        def loader():
+            refreshed.set()
+            return "novo"
+
+        assert cache.get_or_compute("crm", loader) == "antigo"
+        assert refreshed.wait(2)
+
+        deadline = time.monotonic() + 2
+        while cache.get("crm") != "novo" and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert cache.get("crm") == "novo"
+        assert cache.stats["refreshes"] == 1
+
+    def test_failed_refresh_keeps_stale_value(self):
+        cache = SimpleCache()
+        cache.set("crm", "antigo", ttl=60, soft_ttl=-1)
+
+        def failing():
+            raise ConnectionError("CRM fora")
+
+        assert cache.get_or_compute("crm", failing) == "antigo"
+
+        deadline = time.monotonic() + 2
+        while cache.stats["refresh_failures"] == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert cache.get("crm") == "antigo"
+
+    def test_hard_expired_entry_blocks_on_loader(self):
+        cache = SimpleCache()
+        cache.set("crm", "antigo", ttl=-1, soft_ttl=-2)
+
+        assert cache.get_or_compute("crm", lambda: "novo") == "novo"
+
+    def test_async_stale_refresh(self):
+        cache = SimpleCache()
+        cache.set("kb", "antigo", ttl=60, soft_ttl=-1)
+
+        async def loader():
+            return "novo"
+
+        async def main():
+            first = await cache.aget_or_compute("kb", loader)
+            await asyncio.sleep(0.01)
+            return first, cache.get("kb")
+
+        assert asyncio.run(main()) == ("antigo", "novo")
+
+    def test_negative_results_are_cached(self):
+        cache = SimpleCache(negative_ttl=30)
+        calls = []
+
+        def lookup_unknown():
+            calls.append(1)
+            return None
+
+        assert cache.get_or_compute("customer_999", lookup_unknown) is None
+        assert cache.get_or_compute("customer_999", lookup_unknown) is None
+        assert len(calls) == 1
+        assert cache.stats["negative_hits"] == 1
+
+    def test_none_not_cached_without_negative_ttl(self):
+        cache = SimpleCache()
+        calls = []
+
+        def lookup_unknown():
+            calls.append(1)
+            return None
+
+        cache.get_or_compute("customer_999", lookup_unknown)
+        cache.get_or_compute("customer_999", lookup_unknown)
+        assert len(calls) == 2
+
+    def test_negative_entry_expires_on_its_own_ttl(self):
+        cache = SimpleCache(default_ttl=300, negative_ttl=-1)
+        cache.get_or_compute("customer_999", lambda: None)
+
+        assert cache.get_or_compute("customer_999", lambda: "criado") == "criado"
+
+
+class TestBulkInvalidation:
+    """Testes de invalidação por tag e por prefixo."""
+
+    def test_invalidate_tag_removes_only_tagged(self):
+        cache = SimpleCache()
+        cache.set("customer_1", "a", tags=["customer:1"])
+        cache.set("deals_1", "b", tags=["customer:1", "deals"])
+        cache.set("customer_2", "c", tags=["customer:2"])
+
+        assert cache.invalidate_tag("customer:1") == 2
+        assert cache.get("customer_1") is None
+        assert cache.get("deals_1") is None
+        assert cache.get("customer_2") == "c"
+
+    def test_tag_index_follows_overwrite_and_eviction(self):
+        cache = SimpleCache(max_entries=1)
+        cache.set("a", 1, tags=["t"])
+        cache.set("a", 2)  # sobrescrita sem tag
+        cache.set("b", 3, tags=["t"])  # evicta "a"
+
+        assert cache.invalidate_tag("t") == 1
+        assert cache._tag_index == {}
+
+    def test_invalidate_unknown_tag(self):
+        cache = SimpleCache()
+        assert cache.invalidate_tag("nada") == 0
+
+    @pytest.mark.parametrize("index_prefixes", [True, False])
+    def test_invalidate_prefix(self, index_prefixes):
+        cache = SimpleCache(index_prefixes=index_prefixes)
+        cache.set("customer_1", 1)
+        cache.set("customer_12", 2)
+        cache.set("customer_2", 3)
+        cache.set("product_1", 4)
+
+        assert cache.invalidate_prefix("customer_1") == 2
+        assert cache.invalidate_prefix("customer_") == 1
+        assert cache.get("product_1") == 4
+
+    def test_prefix_index_only_touches_affected_keys(self):
+        cache = SimpleCache(index_prefixes=True)
+        for i in range(1_000):
+            cache.set(f"product_{i}", i)
+        cache.set("catalog:v3:plans", "x")
+        cache.set("catalog:v3:prices", "y")
+        cache.set("catalog:v4:plans", "z")
+
+        assert cache.invalidate_prefix("catalog:v3:") == 2
+        assert cache.invalidate_prefix("catalog:v9:") == 0
+        assert cache.get("catalog:v4:plans") == "z"
+
+    def test_prefix_index_cleaned_on_delete(self):
+        cache = SimpleCache(index_prefixes=True)
+        cache.set("customer_1", 1)
+        cache.delete("customer_1")
+
+        assert cache._prefix_index == {}
+
+
+class TestSnapshot:
+    """Testes de snapshot e warm-start."""
+
+    def test_snapshot_round_trip(self, tmp_path):
+        path = str(tmp_path / "cache.snap")
+        cache = SimpleCache()
+        cache.set("customer_1", {"name": "Ana"}, ttl=60, tags=["customer:1"])
+        cache.set("faq", "resposta", ttl=60)
+
+        assert cache.save_snapshot(path) == 2
+
+        restored = SimpleCache()
+        assert restored.load_snapshot(path) == 2
+        assert len(restored) == 0  # carga lazy
+
+        assert restored.get("customer_1") == {"name": "Ana"}
+        assert len(restored) == 1
+        assert restored.stats["warm_hits"] == 1
+        assert restored.invalidate_tag("customer:1") == 1
+
+    def test_expired_entries_dropped_on_load(self, tmp_path):
+        path = str(tmp_path / "cache.snap")
+        cache = SimpleCache()
+        cache.set("curta", 1, ttl=0.05)
+        cache.set("longa", 2, ttl=60)
+        cache.save_snapshot(path)
+        time.sleep(0.1)
+
+        restored = SimpleCache()
+        assert restored.load_snapshot(path) == 1
+        assert restored.get("curta") is None
+        assert restored.get("longa") == 2
+
+    def test_remaining_ttl_is_preserved(self, tmp_path):
+        path = str(tmp_path / "cache.snap")
+        cache = SimpleCache()
+        cache.set("a", 1, ttl=30)
+        cache.save_snapshot(path)
+
+        restored = SimpleCache(default_ttl=3600)
+        restored.load_snapshot(path)
+        restored.get("a")
+
+        remaining = restored._cache["a"].expires_at - time.monotonic()
+        assert 0 < remaining <= 30
+
+    def test_negative_entries_survive_snapshot(self, tmp_path):
+        path = str(tmp_path / "cache.snap")
+        cache = SimpleCache(negative_ttl=60)
+        cache.get_or_compute("customer_999", lambda: None)
+        cache.save_snapshot(path)
+
+        restored = SimpleCache(negative_ttl=60)
+        restored.load_snapshot(path)
+        calls = []
+
+        assert restored.get_or_compute("customer_999", lambda: calls.append(1)) is None
+        assert calls == []
+
+    def test_deleted_pending_key_is_not_loaded(self, tmp_path):
+        path = str(tmp_path / "cache.snap")
+        cache = SimpleCache()
+        cache.set("a", 1)
+        cache.save_snapshot(path)
+
+        restored = SimpleCache()
+        restored.load_snapshot(path)
+        restored.delete("a")
+
+        assert restored.get("a") is None
+
+    def _restored_with_old_value(self, tmp_path, **config):
+        path = str(tmp_path / "cache.snap")
+        cache = SimpleCache()
+        cache.set("a", "OLD", ttl=60)
+        cache.save_snapshot(path)
+
+        restored = SimpleCache(**config)
+        restored.load_snapshot(path)
+        return restored, path
+
+    def test_overwritten_key_does_not_resurrect_after_eviction(self, tmp_path):
+        restored, _ = self._restored_with_old_value(tmp_path, max_entries=1)
+        restored.set("a", "NEW")
+        restored.set("b", 1)  # evicta "a"
+
+        assert restored.get("a") is None
+
+    def test_overwritten_key_does_not_resurrect_after_expiry(self, tmp_path):
+        restored, _ = self._restored_with_old_value(tmp_path)
+        restored.set("a", "NEW", ttl=0.05)
+        time.sleep(0.1)
+
+        assert restored.get("a") is None
+        assert restored.get("a") is None
+
+    def test_overwritten_key_is_not_saved_from_old_snapshot(self, tmp_path):
+        restored, path = self._restored_with_old_value(tmp_path, max_entries=1)
+        restored.set("a", "NEW")
+        restored.set("b", 1)  # evicta "a"
+
+        assert restored.save_snapshot(path) == 1
+        reloaded = SimpleCache()
+        reloaded.load_snapshot(path)
+        assert reloaded.get("a") is None
+
+    def test_unpicklable_values_are_skipped(self, tmp_path):
+        path = str(tmp_path / "cache.snap")
+        cache = SimpleCache()
+        cache.set("lock", threading.Lock())
+        cache.set("ok", 1)
+
+        assert cache.save_snapshot(path) == 1
+
+    def test_resave_keeps_pending_entries(self, tmp_path):
+        path = str(tmp_path / "cache.snap")
+        cache = SimpleCache()
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.save_snapshot(path)
+
+        restored = SimpleCache()
+        restored.load_snapshot(path)
+        restored.get("a")
+        assert restored.save_snapshot(path) == 2
+        assert restored.get("b") == 2
+
+    def test_invalid_snapshot_is_ignored(self, tmp_path):
+        path = tmp_path / "cache.snap"
+        path.write_bytes(b"lixo")
+
+        cache = SimpleCache()
+        assert cache.load_snapshot(str(path)) == 0
+
+
+class TestBatchOperations:
+    """Testes de get_many / set_many / delete_many."""
+
+    def test_get_many_returns_hits_and_misses(self):
+        cache = SimpleCache()
+        cache.set_many({"a": 1, "b": 2})
+
+        hits, misses = cache.get_many(["a", "b", "c"])
+
+        assert hits == {"a": 1, "b": 2}
+        assert misses == ["c"]
+
+    def test_set_many_accepts_pairs_and_tags(self):
+        cache = SimpleCache()
+        cache.set_many([("a", 1), ("b", 2)], tags=["lote"])
+
+        assert cache.invalidate_tag("lote") == 2
+
+    def test_set_many_respects_limits(self):
+        cache = SimpleCache(max_entries=3)
+        cache.set_many({f"k{i}": i for i in range(10)})
+
+        assert len(cache) == 3
+        assert cache.get("k9") == 9
+
+    def test_delete_many(self):
+        cache = SimpleCache()
+        cache.set_many({"a": 1, "b": 2, "c": 3})
+
+        assert cache.delete_many(["a", "b", "x"]) == 2
+        assert len(cache) == 1
+
+    def test_get_or_compute_many_loads_misses_in_one_call(self):
+        cache = SimpleCache()
+        cache.set("customer_1", "Ana")
+        batches = []
+
+        def batch_loader(keys):
+            batches.append(list(keys))
+            return {key: key.upper() for key in keys}
+
+        result = cache.get_or_compute_many(
+            ["customer_1", "customer_2", "customer_3"], batch_loader
+        )
+
+        assert result == {
+            "customer_1": "Ana",
+            "customer_2": "CUSTOMER_2",
+            "customer_3": "CUSTOMER_3",
+        }
+        assert batches == [["customer_2", "customer_3"]]
+
+        cache.get_or_compute_many(["customer_2", "customer_3"], batch_loader)
+        assert len(batches) == 1
+
+    def test_get_or_compute_many_caches_not_found(self):
+        cache = SimpleCache(negative_ttl=30)
+        batches = []
+
+        def batch_loader(keys):
+            batches.append(list(keys))
+            return {"customer_1": "Ana"}
+
+        first = cache.get_or_compute_many(["customer_1", "customer_404"], batch_loader)
+        second = cache.get_or_compute_many(["customer_1", "customer_404"], batch_loader)
+
+        assert first == second == {"customer_1": "Ana", "customer_404": None}
+        assert len(batches) == 1
@@ -0,0 +1,193 @@
+"""
+Testes unitários para o decorator de memoização.
+"""
+
+import asyncio
+import inspect
+
+import pytest
+
+from src.utils.cache import SimpleCache, cached, cached_function_stats
+
+
+class TestCachedDecorator:
+    """Testes do @cached."""
+
+    def test_repeated_calls_hit_cache(self):
+        calls = []
+
+        @cached(ttl=60)
+        def compare(plan_a: str, plan_b: str) -> str:
+            calls.append((plan_a, plan_b))
+            return f"{plan_a} vs {plan_b}"
+
+        assert compare("crm", "ai") == "crm vs ai"
+        assert compare("crm", "ai") == "crm vs ai"
+        assert compare("crm", "analytics") == "crm vs analytics"
+        assert len(calls) == 2
+
+        info = compare.cache_info()
+        assert info["hits"] == 1
+        assert info["misses"] == 2
+
+    def test_positional_and_keyword_share_key(self):
+        calls = []
+
+        @cached()
+        def details(product_id: str, region: str = "BR"):
+            calls.append(1)
+            return product_id
+
+        details("prod-001")
+        details(product_id="prod-001")
+        details("prod-001", region="BR")
+        assert len(calls) == 1
+
+    def test_unhashable_arguments(self):
+        @cached()
+        def total(items: list, options: dict) -> int:
+            return sum(items)
+
+        assert total([1, 2], {"a": {1, 2}}) == 3
+        assert total([1, 2], {"a": {2, 1}}) == 3
+        assert total.cache_info()["hits"] == 1
+
+    def test_none_results_are_cached(self):
+        calls = []
+
+        @cached()
+        def lookup(customer_id: str):
+            calls.append(1)
+            return None
+
+        assert lookup("x") is None
+        assert lookup("x") is None
+        assert len(calls) == 1
+
+    def test_none_results_follow_shared_cache_negative_ttl(self):
+        calls = []
+
+        @cached(cache=SimpleCache(default_ttl=60))
+        def lookup(customer_id: str):
+            calls.append(1)
+            return None
+
+        @cached(cache=SimpleCache(default_ttl=60, negative_ttl=60))
+        def lookup_negative(customer_id: str):
+            calls.append(2)
+            return None
+
+        for _ in range(2):
+            lookup("x")
+            lookup_negative("x")
+        assert calls.count(1) == 2
+        assert calls.count(2) == 1
+
+    def test_objects_without_stable_key_are_rejected(self):
+        class Toolkit:
+            @cached()
+            def get_product_details(self, product_id: str) -> str:
+                return product_id
+
+        with pytest.raises(TypeError, match="__cache_key__"):
+            Toolkit().get_product_details("p")
+
+    def test_methods_keyed_by_cache_key(self):
+        class Toolkit:
+            def __init__(self, catalog):
+                self.catalog = catalog
+
+            def __cache_key__(self):
+                return repr(sorted(self.catalog.items()))
+
+            @cached()
+            def get_product_details(self, product_id: str) -> str:
+                return self.catalog[product_id]
+
+        a = Toolkit({"p": "A"})
+        b = Toolkit({"p": "B"})
+
+        assert a.get_product_details("p") == "A"
+        assert b.get_product_details("p") == "B"
+        assert Toolkit({"p": "A"}).get_product_details("p") == "A"
+        assert Toolkit.get_product_details.cache_info()["hits"] == 1
+
+    def test_explicit_key_function(self):
+        calls = []
+
+        class Toolkit:
+            @cached(key=lambda self, product_id: product_id)
+            def get_product_details(self, product_id: str) -> str:
+                calls.append(product_id)
+                return product_id.upper()
+
+        assert Toolkit().get_product_details("p") == "P"
+        assert Toolkit().get_product_details(product_id="p") == "P"
+        assert calls == ["p"]
+
+    def test_wrapper_preserves_metadata(self):
+        @cached()
+        def get_product_roadmap(product: str) -> str:
+            """Obtém roadmap de features futuras."""
+            return product
+
+        assert get_product_roadmap.__name__ == "get_product_roadmap"
+        assert get_product_roadmap.__doc__ == "Obtém roadmap de features futuras."
+        assert list(inspect.signature(get_product_roadmap).parameters) == ["product"]
+
+    def test_max_entries_limits_cache(self):
+        @cached(max_entries=2)
+        def square(x: int) -> int:
+            return x * x
+
+        for i in range(10):
+            square(i)
+
+        assert square.cache_info()["entries"] == 2
+
+    def test_cache_clear(self):
+        calls = []
+
+        @cached()
+        def f(x):
+            calls.append(x)
+            return x
+
+        f(1)
+        f.cache_clear()
+        f(1)
+        assert len(calls) == 2
+        assert f.cache_info()["misses"] == 1
+
+    def test_shared_cache_instance(self):
+        shared = SimpleCache()
+
+        @cached(cache=shared)
+        def f(x):
+            return x
+
+        f(1)
+        assert len(shared) == 1
+
+    def test_coroutine_functions(self):
+        calls = []
+
+        @cached()
+        async def embed(text: str):
+            calls.append(text)
+            await asyncio.sleep(0)
+            return len(text)
+
+        async def main():
+            return await asyncio.gather(*[embed("olá") for _ in range(10)])
+
+        assert asyncio.run(main()) == [3] * 10
+        assert len(calls) == 1
+
+    def test_global_stats_registry(self):
+        @cached(key_prefix="tests.registry_fn")
+        def registry_fn(x):
+            return x
+
+        registry_fn(1)
+        assert cached_function_stats()["tests.registry_fn"]["misses"] == 1
@@ -0,0 +1,41 @@
+"""
+Testes unitários do checkpoint de lotes (JSONL append-only).
+"""
+
+from src.utils.checkpoint import BatchCheckpoint
+
+
+class TestBatchCheckpoint:
+    def test_records_survive_reopen(self, tmp_path):
+        path = str(tmp_path / "batch.jsonl")
+
+        with BatchCheckpoint(path) as checkpoint:
+            checkpoint.record("0", {"success": True, "response": "olá"})
+            checkpoint.record("lead-7", {"success": True})
+
+        with BatchCheckpoint(path) as checkpoint:
+            assert len(checkpoint) == 2
+            assert "lead-7" in checkpoint
+            assert "1" not in checkpoint
+            assert checkpoint.get("0")["response"] == "olá"
+
+    def test_ignores_truncated_last_line(self, tmp_path):
+        path = tmp_path / "batch.jsonl"
+        path.write_text('{"key": "0", "result": 1}\n{"key": "1", "res', encoding="utf-8")
+
+        with BatchCheckpoint(str(path)) as checkpoint:
+            assert "0" in checkpoint
+            assert "1" not in checkpoint
+            checkpoint.record("1", 2)
+
+        with BatchCheckpoint(str(path)) as checkpoint:
+            assert checkpoint.get("1") == 2
+
+    def test_appends_instead_of_rewriting(self, tmp_path):
+        path = tmp_path / "batch.jsonl"
+
+        for key in ("a", "b"):
+            with BatchCheckpoint(str(path)) as checkpoint:
+                checkpoint.record(key, None)
+
+        assert len(path.read_text(encoding="utf-8").splitlines()) == 2
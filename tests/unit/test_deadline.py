@@ -0,0 +1,104 @@
+"""
+Testes unitários para propagação de deadline.
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from src.utils.deadline import (
+    DeadlineExceeded,
+    cap_timeout,
+    check_deadline,
+    current_deadline,
+    deadline,
+    remaining_time,
+)
+from src.utils.retry import CircuitBreaker, retry_with_backoff
+
+
+class TestDeadline:
+    """Testes do deadline por contexto."""
+
+    def test_no_deadline_by_default(self):
+        assert current_deadline() is None
+        assert remaining_time() is None
+        assert cap_timeout(30) == 30
+        check_deadline()
+
+    def test_cap_timeout_uses_remaining_budget(self):
+        with deadline(0.5):
+            assert cap_timeout(30) <= 0.5
+            assert cap_timeout(0.1) == 0.1
+        assert current_deadline() is None
+
+    def test_nested_deadline_never_extends_outer(self):
+        with deadline(0.2) as outer:
+            with deadline(10) as inner:
+                assert inner is outer
+            with deadline(0.05) as tighter:
+                assert tighter.expires_at < outer.expires_at
+
+    def test_expired_deadline_raises(self):
+        with deadline(0.01):
+            time.sleep(0.02)
+            with pytest.raises(DeadlineExceeded):
+                check_deadline()
+            with pytest.raises(DeadlineExceeded):
+                cap_timeout(5)
+
+    def test_deadline_is_inherited_by_tasks(self):
+        async def child():
+            return remaining_time()
+
+        async def main():
+            with deadline(1):
+                return await asyncio.create_task(child())
+
+        assert 0 < asyncio.run(main()) <= 1
+
+
+class TestDeadlineIntegration:
+    """Testes de retry e circuit breaker respeitando o deadline."""
+
+    def test_retry_skips_backoff_past_deadline(self):
+        attempts = []
+
+        @retry_with_backoff(max_retries=5, initial_delay=1.0, jitter=None)
+        def failing():
+            attempts.append(1)
+            raise ConnectionError("503")
+
+        start = time.monotonic()
+        with deadline(0.5):
+            with pytest.raises(ConnectionError):
+                failing()
+
+        assert len(attempts) == 1
+        assert time.monotonic() - start < 0.5
+
+    def test_deadline_exceeded_is_not_retried(self):
+        attempts = []
+
+        @retry_with_backoff(max_retries=3, initial_delay=0.001)
+        def timed_out():
+            attempts.append(1)
+            raise DeadlineExceeded("budget")
+
+        with pytest.raises(DeadlineExceeded):
+            timed_out()
+        assert len(attempts) == 1
+
+    def test_breaker_rejects_expired_calls_without_counting(self):
+        breaker = CircuitBreaker(failure_threshold=1)
+        called = []
+
+        with deadline(0.01):
+            time.sleep(0.02)
+            with pytest.raises(DeadlineExceeded):
+                breaker.call(lambda: called.append(1))
+
+        assert called == []
+        assert breaker.state == "CLOSED"
+        assert breaker.failure_count == 0
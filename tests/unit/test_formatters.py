@@ -0,0 +1,127 @@
+"""
+Testes unitários para formatadores com orçamento de tokens.
+"""
+
+import pytest
+
+from src.utils.formatters import (
+    NON_DIGITS,
+    count_tokens,
+    format_digits,
+    format_phone,
+    is_series,
+    pack_to_token_budget,
+    truncate_text,
+    truncate_to_tokens,
+)
+
+
+TEXT = (
+    "O plano Enterprise inclui integrações ilimitadas. "
+    "Suporte 24/7 está incluso! "
+    "Você pode cancelar quando quiser."
+)
+
+
+class TestCountTokens:
+    """Testes da contagem de tokens."""
+
+    def test_empty_and_nonempty(self):
+        assert count_tokens("") == 0
+        assert count_tokens(TEXT) > len(TEXT.split()) // 2
+
+    def test_counts_are_cached(self):
+        count_tokens.cache_clear()
+        count_tokens(TEXT)
+        count_tokens(TEXT)
+
+        assert count_tokens.cache_info().hits == 1
+
+    def test_truncation_candidates_do_not_fill_cache(self):
+        count_tokens.cache_clear()
+        long_text = " ".join(f"palavra{i}." for i in range(2000))
+
+        truncate_to_tokens(long_text, 50, boundary="sentence")
+        truncate_to_tokens(long_text.replace(" ", ""), 50)
+        pack_to_token_budget([long_text, TEXT], 80)
+
+        # Só os textos de entrada entram no cache, não os prefixos da busca
+        assert count_tokens.cache_info().currsize <= 5
+
+
+class TestTruncateToTokens:
+    """Testes de truncamento por tokens."""
+
+    def test_short_text_is_untouched(self):
+        assert truncate_to_tokens(TEXT, 1000) == TEXT
+
+    @pytest.mark.parametrize("budget", [3, 8, 15, 25])
+    def test_result_fits_budget(self, budget):
+        result = truncate_to_tokens(TEXT, budget)
+
+        assert count_tokens(result) <= budget
+        assert TEXT.startswith(result[:-3].rstrip())
+
+    def test_word_boundary(self):
+        result = truncate_to_tokens(TEXT, 10)
+
+        assert result.endswith("...")
+        assert result[:-3] in TEXT
+        assert TEXT[len(result) - 3] == " "
+
+    def test_sentence_boundary_has_no_suffix(self):
+        budget = count_tokens("O plano Enterprise inclui integrações ilimitadas.") + 2
+        result = truncate_to_tokens(TEXT, budget, boundary="sentence")
+
+        assert result == "O plano Enterprise inclui integrações ilimitadas."
+
+    def test_unknown_boundary(self):
+        with pytest.raises(ValueError):
+            truncate_to_tokens(TEXT, 5, boundary="paragraph")
+
+    def test_character_based_truncate_still_available(self):
+        assert truncate_text("uma frase bem longa aqui", max_length=13) == "uma frase..."
+
+
+class TestPackToTokenBudget:
+    """Testes de empacotamento de chunks/histórico."""
+
+    def test_keeps_first_items_and_truncates_overflow(self):
+        chunks = ["Primeiro trecho relevante.", TEXT, "Último trecho."]
+        budget = count_tokens(chunks[0]) + 10
+
+        packed = pack_to_token_budget(chunks, budget)
+
+        assert packed[0] == chunks[0]
+        assert len(packed) == 2
+        assert TEXT.startswith(packed[1])
+        assert count_tokens("\n\n".join(packed)) <= budget
+
+    def test_keep_last_prefers_recent_history(self):
+        history = ["mensagem antiga " * 10, "mensagem do meio", "mensagem recente"]
+        budget = count_tokens("mensagem do meio\nmensagem recente")
+
+        packed = pack_to_token_budget(
+            history, budget, separator="\n", keep="last", truncate_overflow=False
+        )
+
+        assert packed == ["mensagem do meio", "mensagem recente"]
+
+    def test_everything_fits(self):
+        items = ["a", "b", "c"]
+        assert pack_to_token_budget(items, 100) == items
+
+    def test_zero_budget(self):
+        assert pack_to_token_budget([TEXT], 0) == []
+
+
+class TestPhoneHelpers:
+    """Helpers públicos compartilhados com validators."""
+
+    def test_format_digits_matches_format_phone(self):
+        for phone in ("11 98765-4321", "(11) 3456-7890", "123"):
+            assert format_digits(NON_DIGITS.sub("", phone), phone) == format_phone(phone)
+
+    def test_is_series_rejects_plain_iterables(self):
+        assert not is_series(["11987654321"])
+        assert not is_series("11987654321")
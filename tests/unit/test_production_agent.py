@@ -0,0 +1,340 @@
+"""
+Testes unitários do ProductionAgent (templates/agentes/base_agent.py).
+
+O AGNO é stubado pela fixture ``make_agent`` (tests/conftest.py): o agente
+é construído pelo ``__init__`` normal, com o modelo trocado por um stub
+que ecoa a mensagem.
+"""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.utils.rate_limit import estimate_tokens
+from src.utils.response_cache import ResponseCache
+from src.utils.token_ledger import TokenLedger
+
+
+class TestAprocess:
+    def test_aprocess_returns_model_response(self, make_agent):
+        agent = make_agent()
+
+        result = asyncio.run(agent.aprocess("Olá", session_id="s1"))
+
+        assert result["success"]
+        assert result["response"] == "eco: Olá"
+        assert result["session_id"] == "s1"
+        assert agent.stats["successful_interactions"] == 1
+
+    def test_aprocess_overlaps_model_latency(self, make_agent):
+        agent = make_agent(latency=0.05)
+
+        async def serve():
+            return await asyncio.gather(*(
+                agent.aprocess(f"Mensagem {i}", session_id=f"s{i}")
+                for i in range(20)
+            ))
+
+        start = time.perf_counter()
+        results = asyncio.run(serve())
+        elapsed = time.perf_counter() - start
+
+        assert all(r["success"] for r in results)
+        assert agent.agent.peak_in_flight == 20
+        assert elapsed < 20 * 0.05 / 4
+
+    def test_aprocess_enforces_deadline(self, make_agent):
+        agent = make_agent(latency=1.0)
+
+        start = time.perf_counter()
+        result = asyncio.run(agent.aprocess("Olá", timeout=0.05))
+
+        assert result["error"] == "timeout"
+        assert time.perf_counter() - start < 0.5
+        assert agent.stats["failed_interactions"] == 1
+
+    def test_aprocess_rejects_invalid_input_without_calling_model(self, make_agent):
+        agent = make_agent()
+
+        result = asyncio.run(agent.aprocess("   "))
+
+        assert not result["success"]
+        assert agent.agent.calls == 0
+
+
+class TestProcessStream:
+    def test_chunks_add_up_to_final_response(self, make_agent):
+        agent = make_agent(latency=0.01)
+
+        events = list(agent.process_stream("Quanto custa o plano Pro?", session_id="s1"))
+
+        done = events[-1]
+        assert [e["type"] for e in events[:-1]] == ["chunk"] * (len(events) - 1)
+        assert done["type"] == "done" and done["success"]
+        assert done["response"] == "eco: Quanto custa o plano Pro?"
+        assert "".join(e["content"] for e in events[:-1]) == done["response"]
+        assert done["metadata"]["ttft_ms"] >= 10
+        assert agent.get_stats()["avg_ttft"] == pytest.approx(done["metadata"]["ttft_ms"] / 1000)
+
+    def test_stream_stops_on_sensitive_data(self, make_agent, base_agent_module):
+        agent = make_agent()
+
+        events = list(agent.process_stream("Meu CPF é 123.456.789-09"))
+
+        done = events[-1]
+        assert not done["metadata"]["passed_guardrails"]
+        assert "123.456" not in "".join(e.get("content", "") for e in events)
+        assert done["response"].endswith(base_agent_module.GUARDRAIL_REFUSAL)
+
+    def test_stream_rejects_invalid_input(self, make_agent):
+        agent = make_agent()
+
+        events = list(agent.process_stream("   "))
+
+        assert len(events) == 1
+        assert events[0]["type"] == "done" and not events[0]["success"]
+        assert agent.agent.calls == 0
+
+    def test_stream_enforces_deadline(self, make_agent):
+        agent = make_agent(latency=0.2)
+
+        events = list(agent.process_stream("Olá", timeout=0.05))
+
+        assert events[-1]["error"] == "timeout"
+
+    def test_streams_respect_model_in_flight_cap(self, make_agent):
+        agent = make_agent(latency=0.01, model_id="stub-stream-cap", max_in_flight=2)
+
+        def consume(i):
+            return list(agent.process_stream(f"Mensagem {i}"))[-1]
+
+        with ThreadPoolExecutor(max_workers=6) as pool:
+            results = list(pool.map(consume, range(12)))
+
+        assert all(r["success"] for r in results)
+        assert agent.agent.peak_in_flight == 2
+        assert agent.concurrency_limiter.in_flight == 0
+
+    def test_abandoned_stream_frees_model_slot(self, make_agent):
+        agent = make_agent(model_id="stub-stream-abandon", max_in_flight=1)
+
+        events = agent.process_stream("Quanto custa o plano Pro?")
+        next(events)
+        assert agent.concurrency_limiter.in_flight == 1
+        events.close()
+
+        assert agent.concurrency_limiter.in_flight == 0
+        assert agent.agent.in_flight == 0
+
+
+class TestProcessMany:
+    def test_results_keep_item_ids(self, make_agent):
+        agent = make_agent()
+        items = ["Olá", {"id": "lead-7", "message": "Oi", "session_id": "s7"}]
+
+        results = {r["id"]: r for r in agent.process_many(items, concurrency=2)}
+
+        assert set(results) == {"0", "lead-7"}
+        assert results["lead-7"]["session_id"] == "s7"
+        assert results["0"]["response"] == "eco: Olá"
+
+    def test_concurrency_bounds_parallelism(self, make_agent):
+        agent = make_agent(latency=0.01)
+
+        results = list(agent.process_many((f"Lead {i}" for i in range(30)), concurrency=5))
+
+        assert len(results) == 30
+        assert agent.agent.peak_in_flight == 5
+
+    def test_model_in_flight_cap_applies_across_batches(self, make_agent):
+        agent = make_agent(latency=0.01, model_id="stub-batch-cap", max_in_flight=3)
+
+        results = list(agent.process_many([f"Lead {i}" for i in range(30)], concurrency=10))
+
+        assert all(r["success"] for r in results)
+        assert agent.agent.peak_in_flight == 3
+
+    def test_resumes_from_checkpoint_after_crash(self, make_agent, tmp_path):
+        path = str(tmp_path / "batch.jsonl")
+        items = [{"id": f"lead-{i}", "message": f"Lead {i}"} for i in range(20)]
+
+        agent = make_agent(latency=0.001)
+        batch = agent.process_many(items, concurrency=4, checkpoint_path=path)
+        first_run = [next(batch)["id"] for _ in range(8)]
+        batch.close()  # simula queda no meio do lote
+
+        resumed = make_agent(latency=0.001)
+        second_run = [r["id"] for r in resumed.process_many(items, concurrency=4, checkpoint_path=path)]
+
+        assert set(first_run).isdisjoint(second_run)
+        assert set(first_run) | set(second_run) == {item["id"] for item in items}
+        assert resumed.agent.calls <= 20 - 8
+
+    def test_stats_add_up_across_worker_threads(self, make_agent):
+        agent = make_agent()
+        items = [f"Lead {i}" for i in range(200)] + ["   "] * 10
+
+        results = list(agent.process_many(items, concurrency=16))
+
+        stats = agent.get_stats()
+        assert stats["successful_interactions"] == stats["total_interactions"] == 200
+        assert stats["failed_interactions"] == 10
+        assert stats["total_tokens"] == sum(
+            r["metadata"]["usage"]["prompt_tokens"] + r["metadata"]["usage"]["completion_tokens"]
+            for r in results if r["success"]
+        )
+
+        agent.reset_stats()
+        assert agent.get_stats()["total_interactions"] == 0
+        assert agent.get_stats()["total_cost"] == 0.0
+
+    def test_invalid_concurrency(self, make_agent):
+        agent = make_agent()
+
+        with pytest.raises(ValueError):
+            list(agent.process_many(["Olá"], concurrency=0))
+
+
+class TestResponseCache:
+    @pytest.fixture
+    def agent(self, make_agent):
+        return make_agent(response_cache=ResponseCache(ttl=60))
+
+    def test_repeated_question_skips_the_model(self, agent):
+        agent.process("Quanto custa o plano Pro?")
+        result = agent.process("quanto custa o plano pro")
+
+        assert result["response"] == "eco: Quanto custa o plano Pro?"
+        assert result["metadata"]["cache"] == "exact"
+        assert agent.agent.calls == 1
+
+    def test_personalized_sessions_bypass_cache(self, agent):
+        agent.process("Quanto custa o plano Pro?")
+
+        first = agent.process("Olá", session_id="lead-1")
+        second = agent.process("Quanto custa o plano Pro?", session_id="lead-1")
+        agent.mark_personalized("lead-2")
+        third = agent.process("Quanto custa o plano Pro?", session_id="lead-2")
+
+        assert "cache" not in first["metadata"]
+        assert "cache" not in second["metadata"]
+        assert "cache" not in third["metadata"]
+        assert agent.response_cache.get_stats()["bypassed"] == 2
+
+    def test_invalidation_forces_fresh_answer(self, agent):
+        agent.process("Quanto custa o plano Pro?")
+
+        assert agent.invalidate_response_cache() == 1
+        result = agent.process("Quanto custa o plano Pro?")
+
+        assert "cache" not in result["metadata"]
+        assert agent.agent.calls == 2
+
+    def test_aprocess_uses_cache(self, agent):
+        async def serve():
+            await agent.aprocess("Quanto custa o plano Pro?")
+            return await agent.aprocess("quanto custa o plano pro")
+
+        result = asyncio.run(serve())
+
+        assert result["metadata"]["cache"] == "exact"
+        assert agent.agent.calls == 1
+
+    def test_similar_question_is_not_served_by_default(self, agent):
+        agent.process("Quais recursos tem o plano Premium?")
+        result = agent.process("Quais recursos tem o plano Básico?")
+
+        assert "cache" not in result["metadata"]
+        assert agent.agent.calls == 2
+
+
+class TestTokenAccounting:
+    def test_usage_lands_in_stats_and_metadata(self, make_agent):
+        agent = make_agent(model_id="gpt-4o-mini")
+
+        result = agent.process("Quanto custa o plano Pro?")
+
+        usage = result["metadata"]["usage"]
+        assert usage["prompt_tokens"] > 0 and usage["completion_tokens"] > 0
+        stats = agent.get_stats()
+        assert stats["total_tokens"] == usage["prompt_tokens"] + usage["completion_tokens"]
+        assert stats["total_cost"] > 0
+
+    def test_batch_usage_lands_in_ledger(self, make_agent, tmp_path):
+        agent = make_agent(
+            model_id="gpt-4o-mini",
+            token_ledger=TokenLedger(str(tmp_path / "ledger.db"))
+        )
+        items = [
+            {"message": f"Lead {i}", "session_id": f"s{i % 5}", "user_id": f"u{i % 2}"}
+            for i in range(20)
+        ]
+
+        results = list(agent.process_many(items, concurrency=4))
+
+        total = sum(
+            r["metadata"]["usage"]["prompt_tokens"] + r["metadata"]["usage"]["completion_tokens"]
+            for r in results
+        )
+        assert agent.get_stats()["total_tokens"] == total
+        users = agent.token_ledger.top_consumers("user", n=5, by="tokens")
+        assert {row["id"] for row in users} == {"u0", "u1"}
+        assert sum(row["runs"] for row in users) == 20
+        assert agent.token_ledger.daily_totals(agent="test_agent")[0]["total_tokens"] == total
+
+    def test_stream_usage_is_recorded(self, make_agent, tmp_path):
+        agent = make_agent(
+            model_id="gpt-4o-mini",
+            token_ledger=TokenLedger(str(tmp_path / "ledger.db"))
+        )
+
+        done = list(agent.process_stream("Olá", session_id="s1", user_id="u1"))[-1]
+
+        assert done["metadata"]["usage"]["prompt_tokens"] > 0
+        assert agent.token_ledger.usage_for("session", "s1")["runs"] == 1
+
+
+class TestRateLimiting:
+    def _spy_acquire(self, agent, monkeypatch):
+        charged = []
+        acquire = agent.rate_limiter.acquire
+
+        def spy(tokens=0, timeout=None):
+            charged.append(tokens)
+            return acquire(tokens, timeout)
+
+        monkeypatch.setattr(agent.rate_limiter, "acquire", spy)
+        return charged
+
+    def test_tpm_reserves_full_prompt_and_completion_budget(self, make_agent, monkeypatch):
+        agent = make_agent(
+            model_id="stub-tpm-estimate", tokens_per_minute=1_000_000, max_completion_tokens=800
+        )
+        charged = self._spy_acquire(agent, monkeypatch)
+
+        first = agent.process("Quanto custa o plano Pro?", session_id="s1")
+        agent.process("E o Enterprise?", session_id="s1")
+
+        instructions = estimate_tokens("\n".join(agent._load_instructions()))
+        assert charged[0] >= instructions + 800
+        # O segundo turno inclui o prompt e a resposta do primeiro (histórico)
+        usage = first["metadata"]["usage"]
+        assert charged[1] >= usage["prompt_tokens"] + usage["completion_tokens"] + 800
+
+    def test_tpm_is_charged_real_usage(self, make_agent):
+        agent = make_agent(model_id="stub-tpm-usage", tokens_per_minute=1_000_000)
+
+        results = [agent.process("Quanto custa o plano Pro?", session_id="s1")]
+        results.append(asyncio.run(agent.aprocess("Tem teste grátis?", session_id="s2")))
+        results.append(list(agent.process_stream("Olá", session_id="s3"))[-1])
+
+        total = sum(
+            r["metadata"]["usage"]["prompt_tokens"] + r["metadata"]["usage"]["completion_tokens"]
+            for r in results
+        )
+        stats = agent.rate_limiter.get_stats()
+        assert stats["acquired"] == 3
+        assert stats["tokens"] == total
+
@@ -0,0 +1,195 @@
+"""
+Testes unitários para o rate limiter de RPM/TPM.
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.utils.deadline import DeadlineExceeded, deadline
+from src.utils.rate_limit import (
+    RateLimiter,
+    estimate_prompt_tokens,
+    estimate_tokens,
+    get_rate_limiter,
+    parse_retry_after,
+    retry_after_from_exception,
+)
+
+
+class TestRateLimiter:
+    """Testes do token bucket de requisições e tokens."""
+
+    def test_unlimited_limiter_never_waits(self):
+        limiter = RateLimiter()
+
+        for _ in range(100):
+            assert limiter.acquire(tokens=10_000)
+        assert limiter.get_stats()["waited"] == 0
+
+    def test_requests_per_minute_paces_bursts(self):
+        limiter = RateLimiter(requests_per_minute=600)  # 10/s, burst de 600
+
+        limiter._requests.tokens = 1
+        start = time.monotonic()
+        limiter.acquire()
+        limiter.acquire()
+
+        assert time.monotonic() - start >= 0.08
+
+    def test_tokens_weight_by_prompt_size(self):
+        limiter = RateLimiter(tokens_per_minute=6000)  # 100 tokens/s
+
+        assert limiter.acquire(tokens=6000)
+        assert not limiter.acquire(tokens=50, timeout=0.1)
+        assert limiter.acquire(tokens=5, timeout=0.2)
+        assert limiter.get_stats()["timeouts"] == 1
+
+    def test_acquire_respects_deadline(self):
+        limiter = RateLimiter(requests_per_minute=60)
+        limiter._requests.tokens = 0
+
+        with deadline(0.05):
+            assert not limiter.acquire()
+            time.sleep(0.06)
+            with pytest.raises(DeadlineExceeded):
+                limiter.acquire()
+
+    def test_fifo_order_under_contention(self):
+        limiter = RateLimiter(requests_per_minute=1200)  # 20/s
+        limiter._requests.tokens = 0
+        order = []
+
+        def worker(i):
+            limiter.acquire()
+            order.append(i)
+
+        threads = []
+        for i in range(5):
+            thread = threading.Thread(target=worker, args=(i,))
+            thread.start()
+            threads.append(thread)
+            time.sleep(0.005)
+        for thread in threads:
+            thread.join()
+
+        assert order == [0, 1, 2, 3, 4]
+
+    def test_async_acquire_does_not_block_loop(self):
+        limiter = RateLimiter(requests_per_minute=600)
+        limiter._requests.tokens = 0
+        ticks = []
+
+        async def ticker():
+            for _ in range(5):
+                ticks.append(1)
+                await asyncio.sleep(0.01)
+
+        async def main():
+            await asyncio.gather(limiter.aacquire(), ticker())
+
+        asyncio.run(main())
+        assert len(ticks) == 5
+        assert limiter.get_stats()["acquired"] == 1
+
+    def test_async_queue_waits_without_polling(self):
+        limiter = RateLimiter(requests_per_minute=1200)  # 20/s
+        limiter._requests.tokens = 0
+        attempts = []
+        try_consume = limiter._try_consume
+
+        def counting_try_consume(tokens, now):
+            attempts.append(now)
+            return try_consume(tokens, now)
+
+        limiter._try_consume = counting_try_consume
+        order = []
+
+        async def worker(i):
+            await limiter.aacquire()
+            order.append(i)
+
+        async def main():
+            await asyncio.gather(*(worker(i) for i in range(4)))
+
+        start = time.monotonic()
+        asyncio.run(main())
+
+        assert order == [0, 1, 2, 3]
+        assert time.monotonic() - start >= 0.18
+        # Cada waiter tenta ao chegar e quando acorda; sem polling de 10 ms
+        assert len(attempts) <= 4 * 4
+        assert limiter._queue.async_waiting == 0
+
+    def test_pause_honours_retry_after(self):
+        limiter = RateLimiter(requests_per_minute=600)
+        limiter.pause(0.1)
+
+        start = time.monotonic()
+        limiter.acquire()
+        assert time.monotonic() - start >= 0.09
+
+    def test_record_usage_charges_underestimates(self):
+        limiter = RateLimiter(tokens_per_minute=600)
+        limiter.acquire(tokens=100)
+        limiter.record_usage(estimated_tokens=100, actual_tokens=400)
+
+        assert limiter.get_stats()["tokens_available"] < 201
+
+    def test_record_usage_refunds_only_what_was_charged(self):
+        limiter = RateLimiter(tokens_per_minute=600)
+        limiter.acquire(tokens=5000)  # cobrado até a capacidade (600)
+        limiter.record_usage(estimated_tokens=5000, actual_tokens=100)
+
+        assert limiter.get_stats()["tokens_available"] <= 501
+
+    def test_registry_shares_limiter_per_model(self):
+        first = get_rate_limiter("test-model", requests_per_minute=10)
+        again = get_rate_limiter("test-model", requests_per_minute=999)
+
+        assert first is again
+        assert first._requests.capacity == 10
+
+
+class TestRetryAfter:
+    """Testes de parsing de Retry-After."""
+
+    def test_seconds_and_invalid_values(self):
+        assert parse_retry_after("2.5") == 2.5
+        assert parse_retry_after(None) is None
+        assert parse_retry_after("soon") is None
+
+    def test_http_date(self):
+        assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+
+    def test_extracts_from_http_error(self):
+        class Response:
+            headers = {"retry-after": "3"}
+
+        class HTTPError(Exception):
+            response = Response()
+
+        assert retry_after_from_exception(HTTPError()) == 3.0
+        assert retry_after_from_exception(ValueError()) is None
+
+    def test_estimate_tokens(self):
+        assert estimate_tokens("") == 1
+        assert estimate_tokens("a" * 400) == 100
+
+    def test_estimate_prompt_tokens_counts_tool_schemas(self):
+        class Toolkit:
+            def search_products(self, query: str, max_results: int = 5) -> str:
+                """Busca produtos no catálogo por nome, descrição ou funcionalidades."""
+
+            def _helper(self):
+                pass
+
+        instructions = ["Você é um assistente de vendas" * 10]
+
+        base = estimate_prompt_tokens(instructions)
+        with_tools = estimate_prompt_tokens(instructions, [Toolkit()])
+
+        assert base == estimate_tokens(instructions[0])
+        assert with_tools - base >= 20
@@ -0,0 +1,182 @@
+"""
+Testes unitários do cache de respostas (tier exato + semântico).
+"""
+
+import math
+import time
+import zlib
+from typing import Dict
+
+import pytest
+
+from src.utils.response_cache import (
+    ResponseCache,
+    cache_namespace,
+    normalize_message,
+)
+
+
+NS = cache_namespace("gpt-4", ["Seja conciso"], ["crm"])
+
+
+def hashing_embedder(dim: int = 512):
+    """
+    Embedding léxico (feature hashing de palavras e trigramas).
+
+    Só exercita o mecanismo do tier semântico nos testes: capta erros de
+    digitação, mas não separa negações nem nomes de produto diferentes.
+    """
+    def embed(text: str) -> Dict[int, float]:
+        vector: Dict[int, float] = {}
+        words = normalize_message(text).split()
+        features = list(words)
+        for word in words:
+            padded = f" {word} "
+            features.extend(padded[i:i + 3] for i in range(len(padded) - 2))
+
+        for feature in features:
+            h = zlib.crc32(feature.encode("utf-8"))
+            index = h % dim
+            vector[index] = vector.get(index, 0.0) + (1.0 if h & 0x80000000 else -1.0)
+
+        norm = math.sqrt(sum(v * v for v in vector.values()))
+        return {i: v / norm for i, v in vector.items() if v} if norm else {}
+
+    return embed
+
+
+@pytest.fixture
+def cache():
+    """Tier semântico com embedding léxico, só para exercitar o mecanismo."""
+    return ResponseCache(ttl=60, semantic=True, embedder=hashing_embedder(), similarity_threshold=0.8)
+
+
+class TestNormalization:
+    def test_normalize_message(self):
+        assert normalize_message("  Quanto CUSTA o plano Pró?? ") == "quanto custa o plano pro"
+
+    def test_namespace_changes_with_prompt_tools_and_model(self):
+        assert cache_namespace("gpt-4", ["Seja conciso"], ["crm"]) == NS
+        assert cache_namespace("gpt-4o", ["Seja conciso"], ["crm"]) != NS
+        assert cache_namespace("gpt-4", ["Seja detalhista"], ["crm"]) != NS
+        assert cache_namespace("gpt-4", ["Seja conciso"], ["crm", "email"]) != NS
+
+
+class TestResponseCache:
+    def test_exact_hit_ignores_case_and_punctuation(self, cache):
+        cache.store(NS, "Quanto custa o plano Pro?", "R$ 199/mês")
+
+        assert cache.lookup(NS, "quanto custa o plano pro") == ("R$ 199/mês", "exact")
+
+    def test_semantic_hit_for_near_duplicate(self, cache):
+        cache.store(NS, "Quanto custa o plano Pro?", "R$ 199/mês")
+
+        assert cache.lookup(NS, "qunato custa o plano pro") == ("R$ 199/mês", "semantic")
+
+    def test_semantic_miss_for_different_question(self, cache):
+        cache.store(NS, "Quanto custa o plano Pro?", "R$ 199/mês")
+
+        assert cache.lookup(NS, "Quanto custa o plano Enterprise?") is None
+
+    def test_different_numbers_never_share_answer(self, cache):
+        cache.store(NS, "Preço do plano para 10 usuários", "R$ 500")
+
+        assert cache.lookup(NS, "Preço do plano para 100 usuários") is None
+
+    def test_namespaces_are_isolated(self, cache):
+        cache.store(NS, "Quanto custa o plano Pro?", "R$ 199/mês")
+        other = cache_namespace("gpt-4", ["Outro prompt"], [])
+
+        assert cache.lookup(other, "Quanto custa o plano Pro?") is None
+
+    def test_invalidate_namespace_clears_both_tiers(self, cache):
+        cache.store(NS, "Quanto custa o plano Pro?", "R$ 199/mês")
+
+        assert cache.invalidate(namespace=NS) == 1
+        assert cache.lookup(NS, "qunato custa o plano pro") is None
+
+    def test_invalidate_single_message(self, cache):
+        cache.store(NS, "Quanto custa o plano Pro?", "R$ 199/mês")
+        cache.store(NS, "Como integro com o CRM?", "Via API")
+
+        assert cache.invalidate(namespace=NS, message="quanto custa o plano pro") == 1
+        assert cache.lookup(NS, "Quanto custa o plano Pro?") is None
+        assert cache.lookup(NS, "Como integro com o CRM?") is not None
+        assert cache.get_stats()["semantic_entries"] == 1
+
+    def test_invalidation_does_not_count_as_lookup(self, cache):
+        cache.store(NS, "Quanto custa o plano Pro?", "R$ 199/mês")
+
+        cache.invalidate(namespace=NS, message="Quanto custa o plano Pro?")
+        cache.invalidate(namespace=NS, message="Tem teste grátis?")
+
+        exact = cache._exact.get_stats()
+        assert exact["hits"] == 0 and exact["misses"] == 0
+        assert cache.get_stats()["misses"] == 0
+
+    def test_storing_same_message_replaces_semantic_entry(self, cache):
+        for price in ("R$ 199/mês", "R$ 249/mês", "R$ 299/mês"):
+            cache.store(NS, "Quanto custa o plano Pro?", price)
+
+        assert cache.get_stats()["semantic_entries"] == 1
+        assert cache.lookup(NS, "qunato custa o plano pro") == ("R$ 299/mês", "semantic")
+
+    def test_semantic_index_keeps_most_recent_entries(self):
+        cache = ResponseCache(semantic=True, embedder=hashing_embedder(), max_semantic_entries=2)
+        for i in range(3):
+            cache.store(NS, f"Pergunta {i}", f"resposta {i}")
+
+        assert cache.get_stats()["semantic_entries"] == 2
+
+    def test_ttl_expires_both_tiers(self, cache):
+        cache.store(NS, "Quanto custa o plano Pro?", "R$ 199/mês", ttl=0.05)
+        time.sleep(0.1)
+
+        assert cache.lookup(NS, "Quanto custa o plano Pro?") is None
+        assert cache.lookup(NS, "qunato custa o plano pro") is None
+        assert cache.get_stats()["semantic_entries"] == 0
+
+    def test_stats_and_hit_rate(self, cache):
+        cache.store(NS, "Quanto custa o plano Pro?", "R$ 199/mês")
+        cache.lookup(NS, "Quanto custa o plano Pro?")
+        cache.lookup(NS, "qunato custa o plano pro")
+        cache.lookup(NS, "Tem teste grátis?")
+        cache.record_bypass()
+
+        stats = cache.get_stats()
+        assert stats["exact_hits"] == 1
+        assert stats["semantic_hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["bypassed"] == 1
+        assert stats["hit_rate"] == pytest.approx(2 / 3)
+
+    def test_semantic_disabled(self):
+        cache = ResponseCache(semantic=False, embedder=hashing_embedder())
+        cache.store(NS, "Quanto custa o plano Pro?", "R$ 199/mês")
+
+        assert cache.lookup(NS, "qunato custa o plano pro") is None
+
+
+class TestSemanticDefaults:
+    """Sem embedding de sentenças, só mensagens iguais compartilham resposta."""
+
+    @pytest.mark.parametrize("stored, asked", [
+        ("Quais recursos tem o plano Premium?", "Quais recursos tem o plano Básico?"),
+        ("O plano pro tem API?", "O plano pro não tem API?"),
+    ])
+    def test_near_duplicates_with_different_entities_miss(self, stored, asked):
+        cache = ResponseCache()
+        cache.store(NS, stored, "resposta")
+
+        assert cache.lookup(NS, asked) is None
+        assert cache.lookup(NS, stored) == ("resposta", "exact")
+
+    def test_semantic_without_sentence_embedder_is_disabled(self, monkeypatch, caplog):
+        monkeypatch.setattr("src.utils.response_cache.sentence_embedder", lambda: None)
+
+        cache = ResponseCache(semantic=True)
+        cache.store(NS, "Quais recursos tem o plano Premium?", "PREMIUM: R$ 999")
+
+        assert not cache.semantic
+        assert "semantic response cache disabled" in caplog.text
+        assert cache.lookup(NS, "Quais recursos tem o plano Básico?") is None
@@ -0,0 +1,744 @@
+"""
+Testes unitários para retry com backoff e circuit breaker.
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.utils.retry import (
+    AdaptiveConcurrencyLimiter,
+    CircuitBreaker,
+    CircuitBreakerOpenError,
+    ConcurrencyLimitExceeded,
+    Hedger,
+    RetryBudget,
+    backoff_delays,
+    circuit_breaker_stats,
+    get_circuit_breaker,
+    get_concurrency_limiter,
+    hedged,
+    retry_with_backoff,
+)
+
+
+class TestRetryWithBackoff:
+    """Testes do decorator de retry (sync e async)."""
+
+    def test_sync_retries_until_success(self):
+        attempts = []
+
+        @retry_with_backoff(max_retries=3, initial_delay=0.001)
+        def flaky():
+            attempts.append(1)
+            if len(attempts) < 3:
+                raise ConnectionError("timeout")
+            return "ok"
+
+        assert flaky() == "ok"
+        assert len(attempts) == 3
+
+    def test_sync_raises_after_max_retries(self):
+        @retry_with_backoff(max_retries=2, initial_delay=0.001)
+        def always_fails():
+            raise ConnectionError("fora")
+
+        with pytest.raises(ConnectionError):
+            always_fails()
+
+    def test_non_retryable_exception_is_not_retried(self):
+        attempts = []
+
+        @retry_with_backoff(max_retries=3, initial_delay=0.001, exceptions=[ConnectionError])
+        def bad_input():
+            attempts.append(1)
+            raise ValueError("inválido")
+
+        with pytest.raises(ValueError):
+            bad_input()
+        assert len(attempts) == 1
+
+    def test_async_function_is_detected(self):
+        attempts = []
+
+        @retry_with_backoff(max_retries=3, initial_delay=0.001)
+        async def flaky():
+            attempts.append(1)
+            if len(attempts) < 2:
+                raise ConnectionError("timeout")
+            return "ok"
+
+        assert asyncio.iscoroutinefunction(flaky)
+        assert asyncio.run(flaky()) == "ok"
+        assert len(attempts) == 2
+
+    def test_other_tasks_progress_during_backoff(self):
+        ticks = []
+        ticks_at_attempt = []
+
+        @retry_with_backoff(max_retries=2, initial_delay=0.05, backoff_factor=1.0, jitter=None)
+        async def llm_call():
+            ticks_at_attempt.append(len(ticks))
+            raise ConnectionError("503")
+
+        async def other_conversation():
+            for _ in range(20):
+                ticks.append(1)
+                await asyncio.sleep(0.005)
+
+        async def main():
+            results = await asyncio.gather(
+                llm_call(), other_conversation(), return_exceptions=True
+            )
+            return results[0]
+
+        error = asyncio.run(main())
+
+        assert isinstance(error, ConnectionError)
+        # A outra conversa avançou durante cada backoff de 50ms
+        assert ticks_at_attempt[1] - ticks_at_attempt[0] >= 5
+        assert ticks_at_attempt[2] - ticks_at_attempt[1] >= 5
+
+    def test_cancellation_during_backoff(self):
+        attempts = []
+
+        @retry_with_backoff(max_retries=5, initial_delay=10, jitter=None)
+        async def slow_retry():
+            attempts.append(1)
+            raise ConnectionError("timeout")
+
+        async def main():
+            task = asyncio.ensure_future(slow_retry())
+            await asyncio.sleep(0.01)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(main())
+        assert len(attempts) == 1
+
+
+class TestCircuitBreaker:
+    """Testes do circuit breaker."""
+
+    def test_opens_after_failures(self):
+        breaker = CircuitBreaker(failure_threshold=2, timeout=60)
+
+        def fail():
+            raise ConnectionError("fora")
+
+        for _ in range(2):
+            with pytest.raises(ConnectionError):
+                breaker.call(fail)
+
+        assert breaker.state == "OPEN"
+        with pytest.raises(CircuitBreakerOpenError):
+            breaker.call(lambda: "ok")
+
+    def test_async_calls_share_state_with_sync(self):
+        breaker = CircuitBreaker(failure_threshold=2, timeout=60)
+
+        async def fail():
+            raise ConnectionError("fora")
+
+        async def main():
+            for _ in range(2):
+                with pytest.raises(ConnectionError):
+                    await breaker.call(fail)
+
+        asyncio.run(main())
+
+        assert breaker.state == "OPEN"
+        with pytest.raises(CircuitBreakerOpenError):
+            breaker.call(lambda: "ok")
+
+    def test_async_cancellation_is_not_a_failure(self):
+        breaker = CircuitBreaker(failure_threshold=1)
+
+        async def hang():
+            await asyncio.sleep(10)
+
+        async def main():
+            task = asyncio.ensure_future(breaker.acall(hang))
+            await asyncio.sleep(0.01)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(main())
+        assert breaker.state == "CLOSED"
+
+    def test_sparse_failures_leave_the_window(self):
+        breaker = CircuitBreaker(failure_threshold=3, window_size=10)
+
+        for _ in range(5):
+            with pytest.raises(ValueError):
+                breaker.call(_fail)
+            for _ in range(10):
+                breaker.call(lambda: "ok")
+
+        assert breaker.state == "CLOSED"
+        assert breaker.failure_count == 0
+
+    def test_time_window_forgets_old_failures(self):
+        breaker = CircuitBreaker(failure_threshold=2, window_type="time", window_size=0.05)
+
+        with pytest.raises(ValueError):
+            breaker.call(_fail)
+        time.sleep(0.06)
+        with pytest.raises(ValueError):
+            breaker.call(_fail)
+
+        assert breaker.state == "CLOSED"
+
+    def test_failure_rate_needs_minimum_calls(self):
+        breaker = CircuitBreaker(
+            failure_threshold=100,
+            failure_rate_threshold=0.5,
+            minimum_calls=4
+        )
+
+        for _ in range(3):
+            with pytest.raises(ValueError):
+                breaker.call(_fail)
+        assert breaker.state == "CLOSED"
+
+        breaker.call(lambda: "ok")
+        assert breaker.state == "OPEN"
+
+    def test_slow_calls_open_the_circuit(self):
+        breaker = CircuitBreaker(
+            slow_call_duration=0.01,
+            slow_call_rate_threshold=0.5,
+            minimum_calls=2
+        )
+
+        breaker.call(time.sleep, 0.02)
+        breaker.call(time.sleep, 0.02)
+
+        assert breaker.state == "OPEN"
+        assert breaker.get_stats()["slow_calls"] == 2
+
+    def test_half_open_limits_trial_calls(self):
+        breaker = CircuitBreaker(failure_threshold=1, success_threshold=1, timeout=0)
+        with pytest.raises(ValueError):
+            breaker.call(_fail)
+
+        def trial():
+            # Chamada concorrente enquanto o teste ainda está em andamento
+            with pytest.raises(CircuitBreakerOpenError):
+                breaker.call(lambda: "ok")
+            return "ok"
+
+        assert breaker.call(trial) == "ok"
+        assert breaker.state == "CLOSED"
+
+    def test_calls_from_before_opening_do_not_consume_trial_slots(self):
+        breaker = CircuitBreaker(failure_threshold=1, success_threshold=1, timeout=0.05)
+        started, finish = threading.Event(), threading.Event()
+
+        def slow_ok():
+            started.set()
+            finish.wait(1)
+            return "ok"
+
+        straggler = threading.Thread(target=breaker.call, args=(slow_ok,))
+        straggler.start()
+        started.wait(1)
+        with pytest.raises(ValueError):
+            breaker.call(_fail)
+        time.sleep(0.06)
+
+        def trial():
+            # A chamada antiga termina enquanto o teste está em andamento
+            finish.set()
+            straggler.join()
+            with pytest.raises(CircuitBreakerOpenError):
+                breaker.call(lambda: "ok")
+            return "ok"
+
+        assert breaker.call(trial) == "ok"
+        assert breaker.state == "CLOSED"
+
+    def test_late_failure_from_before_opening_does_not_reopen(self):
+        breaker = CircuitBreaker(failure_threshold=1, success_threshold=2, timeout=0.05)
+        started, finish = threading.Event(), threading.Event()
+
+        def slow_fail():
+            started.set()
+            finish.wait(1)
+            raise ValueError("late")
+
+        def straggle():
+            with pytest.raises(ValueError):
+                breaker.call(slow_fail)
+
+        straggler = threading.Thread(target=straggle)
+        straggler.start()
+        started.wait(1)
+        with pytest.raises(ValueError):
+            breaker.call(_fail)
+        time.sleep(0.06)
+
+        breaker.call(lambda: "ok")
+        finish.set()
+        straggler.join()
+
+        assert breaker.state == "HALF_OPEN"
+        breaker.call(lambda: "ok")
+        assert breaker.state == "CLOSED"
+
+    def test_failure_count_can_be_reset(self):
+        breaker = CircuitBreaker(failure_threshold=3)
+        for _ in range(2):
+            with pytest.raises(ValueError):
+                breaker.call(_fail)
+
+        breaker.failure_count = 0
+        with pytest.raises(ValueError):
+            breaker.call(_fail)
+
+        assert breaker.failure_count == 1
+        assert breaker.state == "CLOSED"
+        with pytest.raises(ValueError):
+            breaker.failure_count = -1
+
+    def test_concurrent_failures_are_counted_exactly(self):
+        breaker = CircuitBreaker(failure_threshold=10_000, window_size=10_000)
+
+        def worker():
+            for _ in range(500):
+                try:
+                    breaker.call(_fail)
+                except ValueError:
+                    pass
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert breaker.failure_count == 4000
+        assert breaker.get_stats()["failures"] == 4000
+
+    def test_registry_returns_one_breaker_per_key(self):
+        first = get_circuit_breaker("test:crm", failure_threshold=1)
+        again = get_circuit_breaker("test:crm", failure_threshold=50)
+        other = get_circuit_breaker("test:llm")
+
+        assert first is again
+        assert first.failure_threshold == 1
+        assert other is not first
+        assert circuit_breaker_stats()["test:crm"]["state"] == "CLOSED"
+
+
+def _fail():
+    raise ValueError("boom")
+
+
+class TestJitterAndBudget:
+    """Testes de jitter e orçamento de retries."""
+
+    def test_deterministic_delays_without_jitter(self):
+        delays = backoff_delays(1.0, 2.0)
+        assert [next(delays) for _ in range(4)] == [1.0, 2.0, 4.0, 8.0]
+
+    def test_full_jitter_stays_within_exponential_bound(self):
+        delays = backoff_delays(1.0, 2.0, jitter="full")
+        values = [next(delays) for _ in range(6)]
+
+        for n, value in enumerate(values):
+            assert 0 <= value <= 2 ** n
+
+    def test_decorrelated_jitter_respects_max_delay(self):
+        delays = backoff_delays(0.5, jitter="decorrelated", max_delay=3.0)
+        values = [next(delays) for _ in range(50)]
+
+        assert all(0.5 <= value <= 3.0 for value in values)
+        assert len(set(values)) > 1
+
+    def test_retry_uses_full_jitter_by_default(self, monkeypatch):
+        slept = []
+        monkeypatch.setattr("src.utils.retry.time.sleep", slept.append)
+
+        @retry_with_backoff(max_retries=20, initial_delay=1.0, backoff_factor=1.0)
+        def failing():
+            raise ConnectionError("503")
+
+        with pytest.raises(ConnectionError):
+            failing()
+
+        assert len(slept) == 20
+        assert all(0 <= delay <= 1.0 for delay in slept)
+        assert len(set(slept)) > 1
+
+    def test_unknown_jitter_mode(self):
+        with pytest.raises(ValueError):
+            next(backoff_delays(jitter="random"))
+
+    def test_exhausted_budget_fails_fast(self):
+        budget = RetryBudget(ratio=0.1, min_retries_per_second=0, max_tokens=1)
+        attempts = []
+
+        @retry_with_backoff(max_retries=5, initial_delay=0.001, budget=budget)
+        def failing():
+            attempts.append(1)
+            raise ConnectionError("503")
+
+        with pytest.raises(ConnectionError):
+            failing()
+
+        # 1 tentativa + 1 retry permitido pelo único token
+        assert len(attempts) == 2
+        assert budget.stats["retries_rejected"] == 1
+
+    def test_successes_replenish_budget(self):
+        budget = RetryBudget(ratio=0.5, min_retries_per_second=0, max_tokens=10)
+        budget.try_acquire()
+        while budget.available >= 1:
+            budget.try_acquire()
+
+        @retry_with_backoff(budget=budget)
+        def ok():
+            return "ok"
+
+        ok()
+        ok()
+        assert budget.available >= 1
+
+    def test_default_budget_starts_small(self):
+        budget = RetryBudget()
+
+        assert budget.try_acquire()
+        assert not budget.try_acquire()
+
+    def test_capacity_comes_from_successes(self):
+        budget = RetryBudget(ratio=0.25, initial_tokens=0)
+        assert not budget.try_acquire()
+
+        for _ in range(4):
+            budget.record_success()
+
+        assert budget.try_acquire()
+        assert not budget.try_acquire()
+
+    def test_budget_applies_to_async(self):
+        budget = RetryBudget(min_retries_per_second=0, max_tokens=0)
+        attempts = []
+
+        @retry_with_backoff(max_retries=3, initial_delay=0.001, budget=budget)
+        async def failing():
+            attempts.append(1)
+            raise ConnectionError("503")
+
+        with pytest.raises(ConnectionError):
+            asyncio.run(failing())
+        assert len(attempts) == 1
+
+
+class TestHedger:
+    """Testes de hedged requests."""
+
+    def _warm(self, hedger, key, latency=0.001, samples=20):
+        for _ in range(samples):
+            hedger.call(key, time.sleep, latency)
+
+    def test_no_hedge_without_history(self):
+        hedger = Hedger(min_samples=5)
+
+        assert hedger.call("k", lambda: "ok") == "ok"
+        assert hedger.hedge_delay("k") is None
+        assert hedger.get_stats()["hedges"] == 0
+
+    def test_slow_primary_is_hedged_and_backup_wins(self):
+        hedger = Hedger(max_hedge_rate=1.0, min_samples=20)
+        self._warm(hedger, "k")
+        calls = []
+
+        def flaky():
+            calls.append(1)
+            time.sleep(0.3 if len(calls) == 1 else 0.001)
+            return len(calls)
+
+        start = time.monotonic()
+        assert hedger.call("k", flaky) == 2
+        assert time.monotonic() - start < 0.2
+
+        stats = hedger.get_stats()
+        assert stats["hedges"] == 1
+        assert stats["hedge_wins"] == 1
+        hedger.shutdown()
+
+    def test_hedge_rate_is_capped(self):
+        hedger = Hedger(max_hedge_rate=0.0, min_samples=20)
+        self._warm(hedger, "k")
+
+        hedger.call("k", time.sleep, 0.02)
+
+        stats = hedger.get_stats()
+        assert stats["hedges"] == 0
+        assert stats["rate_limited"] == 1
+        hedger.shutdown()
+
+    def test_backup_result_used_when_primary_fails_late(self):
+        hedger = Hedger(max_hedge_rate=1.0, min_samples=20)
+        self._warm(hedger, "k")
+        calls = []
+
+        def primary_fails():
+            calls.append(1)
+            if len(calls) == 1:
+                time.sleep(0.02)
+                raise ConnectionError("reset")
+            time.sleep(0.05)
+            return "backup"
+
+        assert hedger.call("k", primary_fails) == "backup"
+        hedger.shutdown()
+
+    def test_async_loser_is_cancelled(self):
+        hedger = Hedger(max_hedge_rate=1.0, min_samples=20)
+        cancelled = []
+        calls = []
+
+        async def fast():
+            await asyncio.sleep(0.001)
+
+        async def flaky():
+            calls.append(1)
+            try:
+                await asyncio.sleep(0.5 if len(calls) == 1 else 0.001)
+            except asyncio.CancelledError:
+                cancelled.append(1)
+                raise
+            return len(calls)
+
+        async def main():
+            for _ in range(20):
+                await hedger.acall("k", fast)
+            return await hedger.acall("k", flaky)
+
+        assert asyncio.run(main()) == 2
+        assert cancelled == [1]
+        assert hedger.get_stats()["hedge_wins"] == 1
+
+    def test_decorator_detects_coroutines(self):
+        @hedged(min_samples=1)
+        async def lookup(value):
+            return value * 2
+
+        @hedged(key="sync-lookup")
+        def sync_lookup(value):
+            return value + 1
+
+        assert asyncio.run(lookup(4)) == 8
+        assert sync_lookup(1) == 2
+        assert lookup.hedger.get_stats()["calls"] == 1
+        sync_lookup.hedger.shutdown()
+
+
+class TestAdaptiveConcurrencyLimiter:
+    """Testes do limiter de concorrência AIMD."""
+
+    def test_limit_grows_while_saturated_and_healthy(self):
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=2, max_limit=10)
+
+        def worker():
+            for _ in range(20):
+                limiter.call(time.sleep, 0.002)
+
+        threads = [threading.Thread(target=worker) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert limiter.limit > 2
+        assert limiter.get_stats()["increases"] > 0
+
+    def test_limit_does_not_grow_when_underused(self):
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=4)
+
+        for _ in range(30):
+            limiter.call(time.sleep, 0.001)
+
+        assert limiter.limit == 4
+
+    def test_errors_cut_limit_multiplicatively(self):
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=16, backoff_ratio=0.5)
+
+        with pytest.raises(TimeoutError):
+            limiter.call(_timeout)
+        assert limiter.limit == 8
+
+        with pytest.raises(TimeoutError):
+            limiter.call(_timeout)
+        assert limiter.limit == 4
+
+    def test_limit_never_below_minimum(self):
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=4, min_limit=2)
+
+        for _ in range(5):
+            with pytest.raises(TimeoutError):
+                limiter.call(_timeout)
+        assert limiter.limit == 2
+
+    def test_concurrent_burst_of_errors_cuts_once(self):
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=8)
+        barrier = threading.Barrier(4)
+
+        def failing():
+            barrier.wait()
+            raise ConnectionError("503")
+
+        def worker():
+            with pytest.raises(ConnectionError):
+                limiter.call(failing)
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert limiter.limit == 4
+        assert limiter.get_stats()["decreases"] == 1
+
+    def test_callers_queue_and_are_rejected_after_max_wait(self):
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=1, max_wait=0.02)
+        release = threading.Event()
+        queued = []
+
+        holder = threading.Thread(target=limiter.call, args=(release.wait,))
+        holder.start()
+        time.sleep(0.01)
+
+        def probe():
+            queued.append(limiter.queue_depth)
+
+        watcher = threading.Timer(0.01, probe)
+        watcher.start()
+        with pytest.raises(ConcurrencyLimitExceeded):
+            limiter.call(lambda: "ok")
+        release.set()
+        holder.join()
+        watcher.join()
+
+        assert queued == [1]
+        assert limiter.get_stats()["rejected"] == 1
+        assert limiter.in_flight == 0
+
+    def test_async_calls_respect_limit(self):
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=2, max_limit=2)
+        peak = []
+
+        async def work():
+            peak.append(limiter.in_flight)
+            await asyncio.sleep(0.01)
+
+        async def main():
+            await asyncio.gather(*(limiter.acall(work) for _ in range(6)))
+
+        asyncio.run(main())
+        assert max(peak) == 2
+        assert limiter.get_stats()["calls"] == 6
+
+    def test_async_waiter_sleeps_until_slot_is_released(self):
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=1, max_limit=1)
+        attempts = []
+        try_enter = limiter._try_enter
+
+        def counting_try_enter(now):
+            attempts.append(now)
+            return try_enter(now)
+
+        limiter._try_enter = counting_try_enter
+        release = threading.Event()
+        holder = threading.Thread(target=limiter.call, args=(release.wait,))
+        holder.start()
+        while limiter.in_flight == 0:
+            time.sleep(0.001)
+        attempts.clear()
+
+        async def main():
+            threading.Timer(0.1, release.set).start()
+            start = time.perf_counter()
+            await limiter.acall(asyncio.sleep, 0)
+            return time.perf_counter() - start
+
+        waited = asyncio.run(main())
+        holder.join()
+
+        assert 0.09 <= waited < 0.15
+        # Sem polling: uma tentativa ao chegar e outra quando a vaga abre
+        assert len(attempts) <= 3
+
+    def test_async_waiter_respects_max_wait(self):
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=1, max_wait=0.05)
+
+        async def main():
+            holder = asyncio.ensure_future(limiter.acall(asyncio.sleep, 0.3))
+            await asyncio.sleep(0)
+            start = time.perf_counter()
+            with pytest.raises(ConcurrencyLimitExceeded):
+                await limiter.acall(asyncio.sleep, 0)
+            elapsed = time.perf_counter() - start
+            await holder
+            return elapsed
+
+        assert asyncio.run(main()) < 0.15
+        assert limiter.queue_depth == 0
+        assert limiter._queue.async_waiting == 0
+
+    def test_iterate_holds_slot_until_stream_ends(self):
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=1)
+        stream = limiter.iterate(iter, [1, 2, 3])
+
+        assert limiter.in_flight == 0
+        assert next(stream) == 1
+        assert limiter.in_flight == 1
+        assert list(stream) == [2, 3]
+        assert limiter.in_flight == 0
+        assert limiter.get_stats()["calls"] == 1
+
+    def test_iterate_releases_slot_when_closed_early(self):
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=1)
+        closed = []
+
+        def produce():
+            try:
+                yield from range(10)
+            finally:
+                closed.append(True)
+
+        stream = limiter.iterate(produce)
+        next(stream)
+        stream.close()
+
+        assert closed == [True]
+        assert limiter.in_flight == 0
+        assert limiter.get_stats()["errors"] == 0
+
+    def test_iterate_error_cuts_limit(self):
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=4)
+
+        def produce():
+            yield "parcial"
+            raise ConnectionError("503")
+
+        with pytest.raises(ConnectionError):
+            list(limiter.iterate(produce))
+        assert limiter.limit == 2
+        assert limiter.in_flight == 0
+
+    def test_registry_returns_one_limiter_per_key(self):
+        first = get_concurrency_limiter("test:llm", initial_limit=3)
+        assert get_concurrency_limiter("test:llm") is first
+        assert first.limit == 3
+
+
+def _timeout():
+    raise TimeoutError("upstream timeout")
@@ -0,0 +1,55 @@
+"""
+Testes unitários do SalesToolkit (template ``sales_agent.py`` com AGNO stubado).
+"""
+
+import json
+
+import pytest
+
+
+CATALOG = [
+    {"id": "prod-001", "name": "CRM Pro", "pricing": {"starting_at": 199}},
+]
+
+
+@pytest.fixture
+def toolkit(sales_agent_module):
+    sales_agent_module.SalesToolkit.get_product_details.cache_clear()
+    return sales_agent_module.SalesToolkit(product_catalog=[dict(p) for p in CATALOG])
+
+
+def price(details: str) -> int:
+    return json.loads(details)["product"]["pricing"]["starting_at"]
+
+
+class TestProductDetailsCache:
+    def test_repeated_lookup_is_cached(self, toolkit):
+        toolkit.get_product_details("prod-001")
+        toolkit.get_product_details("prod-001")
+
+        assert toolkit.get_product_details.cache_info()["hits"] == 1
+
+    def test_replacing_catalog_invalidates_details(self, toolkit):
+        assert price(toolkit.get_product_details("prod-001")) == 199
+
+        toolkit.product_catalog = [
+            {"id": "prod-001", "name": "CRM Pro", "pricing": {"starting_at": 249}},
+        ]
+
+        assert price(toolkit.get_product_details("prod-001")) == 249
+
+    def test_reassigning_after_in_place_edit_invalidates_details(self, toolkit):
+        assert price(toolkit.get_product_details("prod-001")) == 199
+
+        toolkit.product_catalog[0]["pricing"] = {"starting_at": 299}
+        toolkit.product_catalog = toolkit.product_catalog
+
+        assert price(toolkit.get_product_details("prod-001")) == 299
+
+    def test_toolkits_with_same_catalog_share_entries(self, sales_agent_module, toolkit):
+        other = sales_agent_module.SalesToolkit(product_catalog=[dict(p) for p in CATALOG])
+
+        toolkit.get_product_details("prod-001")
+        other.get_product_details("prod-001")
+
+        assert toolkit.get_product_details.cache_info()["hits"] == 1
@@ -0,0 +1,171 @@
+"""
+Testes unitários para o cache em dois níveis.
+"""
+
+import os
+import stat
+import threading
+import time
+
+import pytest
+
+from src.utils.cache import SimpleCache
+from src.utils.tiered_cache import SQLiteCacheBackend, TieredCache
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    """Arquivo SQLite compartilhado entre 'workers'."""
+    return str(tmp_path / "l2.db")
+
+
+def make_worker(db_path, **kwargs):
+    """Simula um worker com L1 próprio e L2 compartilhado."""
+    return TieredCache(
+        backend=SQLiteCacheBackend(db_path),
+        invalidation_poll_interval=0,
+        **kwargs
+    )
+
+
+class TestReadWriteThrough:
+    """Testes de leitura e escrita entre níveis."""
+
+    def test_write_through_is_visible_to_other_worker(self, db_path):
+        worker_a = make_worker(db_path)
+        worker_b = make_worker(db_path)
+
+        worker_a.set("customer_1", {"name": "Ana"})
+
+        assert worker_b.get("customer_1") == {"name": "Ana"}
+        assert worker_b.stats["l2_hits"] == 1
+
+    def test_l2_hit_populates_l1(self, db_path):
+        worker_a = make_worker(db_path)
+        worker_b = make_worker(db_path)
+        worker_a.set("k", "v")
+
+        worker_b.get("k")
+        worker_b.get("k")
+
+        assert worker_b.stats["l2_hits"] == 1
+        assert worker_b.stats["l1_hits"] == 1
+
+    def test_get_or_compute_reads_through_before_loader(self, db_path):
+        worker_a = make_worker(db_path)
+        worker_b = make_worker(db_path)
+        calls = []
+
+        def loader():
+            calls.append(1)
+            return "resposta"
+
+        assert worker_a.get_or_compute("faq", loader) == "resposta"
+        assert worker_b.get_or_compute("faq", loader) == "resposta"
+        assert len(calls) == 1
+        assert worker_a.stats["misses"] == 1
+        assert worker_b.stats["l2_hits"] == 1
+
+    def test_coalesced_callers_are_not_l1_hits(self, db_path):
+        worker = make_worker(db_path)
+        barrier = threading.Barrier(5)
+
+        def loader():
+            time.sleep(0.05)
+            return "resposta"
+
+        def call():
+            barrier.wait()
+            worker.get_or_compute("faq", loader)
+
+        threads = [threading.Thread(target=call) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        worker.get_or_compute("faq", loader)
+
+        assert worker.stats["misses"] == 1
+        assert worker.stats["coalesced"] == 4
+        assert worker.stats["l1_hits"] == 1
+        assert worker.get_stats()["l1_hit_rate"] == 1 / 6
+
+    def test_expired_l2_entry_is_a_miss(self, db_path):
+        worker = make_worker(db_path)
+        worker.backend.set("k", "v", ttl=-1)
+
+        assert worker.get("k") is None
+        assert worker.stats["misses"] == 1
+
+
+class TestInvalidationFanOut:
+    """Testes de invalidação entre workers."""
+
+    def test_delete_invalidates_other_l1(self, db_path):
+        worker_a = make_worker(db_path)
+        worker_b = make_worker(db_path)
+        worker_a.set("k", "v")
+        assert worker_b.get("k") == "v"  # agora no L1 de B
+        received = worker_b.stats["invalidations_received"]
+
+        worker_a.delete("k")
+
+        assert worker_b.get("k") is None
+        assert worker_b.stats["invalidations_received"] == received + 1
+
+    def test_overwrite_invalidates_stale_l1(self, db_path):
+        worker_a = make_worker(db_path)
+        worker_b = make_worker(db_path)
+        worker_a.set("k", "v1")
+        worker_b.get("k")
+
+        worker_a.set("k", "v2")
+
+        assert worker_b.get("k") == "v2"
+
+    def test_own_invalidations_do_not_drop_l1(self, db_path):
+        worker = make_worker(db_path)
+        worker.set("k", "v")
+        worker.get("k")
+
+        assert worker.stats["l1_hits"] == 1
+        assert worker.stats["invalidations_received"] == 0
+
+
+class TestDefaultPath:
+    """O L2 padrão (pickle) fica num diretório privado, nunca em /tmp."""
+
+    def test_default_db_is_in_private_user_dir(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+
+        backend = SQLiteCacheBackend()
+
+        directory = os.path.dirname(backend.db_path)
+        assert directory == str(tmp_path / "agentes-ia")
+        assert stat.S_IMODE(os.stat(directory).st_mode) == 0o700
+
+    def test_existing_dir_is_made_private(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+        (tmp_path / "agentes-ia").mkdir(mode=0o777)
+
+        backend = SQLiteCacheBackend()
+
+        assert stat.S_IMODE(os.stat(os.path.dirname(backend.db_path)).st_mode) == 0o700
+
+
+class TestL2Failures:
+    """Testes de degradação quando o L2 falha."""
+
+    def test_falls_back_to_l1_when_l2_fails(self):
+        class BrokenBackend:
+            def __getattr__(self, name):
+                def fail(*args, **kwargs):
+                    raise ConnectionError("L2 fora")
+                return fail
+
+        cache = TieredCache(backend=BrokenBackend(), l1=SimpleCache())
+        cache.set("k", "v")
+
+        assert cache.get("k") == "v"
+        assert cache.get_or_compute("x", lambda: 1) == 1
+        assert cache.stats["l2_errors"] > 0
@@ -0,0 +1,125 @@
+"""
+Testes unitários do ledger de tokens e custo.
+"""
+
+import os
+import stat
+from datetime import date
+
+import pytest
+
+from src.utils.token_ledger import (
+    ModelPricing,
+    TokenLedger,
+    TokenUsage,
+    find_pricing,
+    price_usage,
+    usage_from_metrics,
+)
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    return TokenLedger(str(tmp_path / "ledger.db"))
+
+
+class TestUsageAndPricing:
+    def test_usage_from_metrics_object(self):
+        class Metrics:
+            input_tokens = 1200
+            output_tokens = 300
+            cache_read_tokens = 1000
+
+        usage = usage_from_metrics(Metrics())
+
+        assert usage == TokenUsage(1200, 300, 1000)
+        assert usage.total_tokens == 1500
+
+    def test_usage_from_legacy_metrics_dict(self):
+        metrics = {"prompt_tokens": [100, 250], "completion_tokens": [40, 60]}
+
+        assert usage_from_metrics(metrics) == TokenUsage(350, 100, 0)
+        assert usage_from_metrics(None) == TokenUsage()
+
+    def test_longest_prefix_pricing(self):
+        assert find_pricing("gpt-4o-mini-2024-07-18") == find_pricing("gpt-4o-mini")
+        assert find_pricing("gpt-4o-2024-08-06").input == 2.5
+        assert find_pricing("modelo-desconhecido") is None
+
+    def test_cached_tokens_use_cached_price(self):
+        pricing = {"m": ModelPricing(input=10.0, output=20.0, cached_input=1.0)}
+        usage = TokenUsage(prompt_tokens=1_000_000, completion_tokens=500_000, cached_tokens=400_000)
+
+        assert price_usage("m", usage, pricing) == pytest.approx(6.0 + 0.4 + 10.0)
+        assert price_usage("outro", usage, pricing) == 0.0
+
+
+class TestTokenLedger:
+    def test_record_rolls_up_every_scope(self, ledger):
+        ledger.record("vendas", "s1", "u1", "gpt-4o", TokenUsage(1000, 200))
+        ledger.record("vendas", "s1", "u1", "gpt-4o", TokenUsage(500, 100))
+
+        session = ledger.usage_for("session", "s1")
+        assert session["runs"] == 2
+        assert session["total_tokens"] == 1800
+        assert ledger.usage_for("user", "u1") == session
+        assert ledger.usage_for("agent", "vendas") == session
+        assert ledger.usage_for("user", "ninguem")["runs"] == 0
+
+    def test_anonymous_runs_skip_user_scope(self, ledger):
+        ledger.record("vendas", "s1", None, "gpt-4o", TokenUsage(10, 10))
+
+        assert ledger.top_consumers("user") == []
+        assert ledger.usage_for("agent", "vendas")["runs"] == 1
+
+    def test_top_consumers(self, ledger):
+        ledger.record("vendas", "s1", "ana", "gpt-4", TokenUsage(1000, 1000))
+        ledger.record("vendas", "s2", "bruno", "gpt-4o-mini", TokenUsage(50_000, 5_000))
+        ledger.record("vendas", "s3", "ana", "gpt-4", TokenUsage(1000, 0))
+
+        by_cost = ledger.top_consumers("user", n=1)
+        by_tokens = ledger.top_consumers("user", n=2, by="tokens")
+
+        assert [row["id"] for row in by_cost] == ["ana"]
+        assert by_cost[0]["runs"] == 2
+        assert [row["id"] for row in by_tokens] == ["bruno", "ana"]
+
+    @pytest.mark.parametrize("by", ["tokens", "cost", "runs"])
+    def test_top_consumers_orders_by_period_totals(self, ledger, by):
+        # Um rollup por dia: a ordem tem que vir da soma do período, não de uma linha
+        for day in range(1, 31):
+            ledger.record("vendas", f"a{day}", "ana", "gpt-4o", TokenUsage(50, 50), day=date(2025, 1, day))
+        ledger.record("vendas", "b1", "bruno", "gpt-4o", TokenUsage(500, 500), day=date(2025, 1, 15))
+
+        top = ledger.top_consumers("user", by=by)
+
+        assert [row["id"] for row in top] == ["ana", "bruno"]
+        assert [row["total_tokens"] for row in top] == [3000, 1000]
+
+    def test_daily_totals_and_period_filter(self, ledger):
+        ledger.record("vendas", "s1", "u1", "gpt-4o", TokenUsage(100, 10), day=date(2025, 1, 1))
+        ledger.record("suporte", "s2", "u2", "gpt-4o", TokenUsage(200, 20), day=date(2025, 1, 1))
+        ledger.record("vendas", "s3", "u1", "gpt-4o", TokenUsage(300, 30), day=date(2025, 1, 2))
+
+        totals = ledger.daily_totals()
+        assert [(row["day"], row["total_tokens"]) for row in totals] == [
+            ("2025-01-01", 330),
+            ("2025-01-02", 330),
+        ]
+        assert ledger.daily_totals(agent="suporte")[0]["runs"] == 1
+
+        recent = ledger.top_consumers("session", since=date(2025, 1, 2))
+        assert [row["id"] for row in recent] == ["s3"]
+
+    def test_invalid_scope(self, ledger):
+        with pytest.raises(ValueError):
+            ledger.top_consumers("tenant")
+
+    def test_default_db_is_in_private_user_dir(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+
+        default = TokenLedger()
+
+        directory = os.path.dirname(default.db_path)
+        assert directory == str(tmp_path / "agentes-ia")
+        assert stat.S_IMODE(os.stat(directory).st_mode) == 0o700
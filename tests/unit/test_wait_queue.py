@@ -0,0 +1,108 @@
+"""
+Testes unitários da fila FIFO de espera dos limiters.
+"""
+
+import asyncio
+import threading
+import time
+
+from src.utils.wait_queue import WaitQueue
+
+
+class Slots:
+    """Recurso com N vagas protegido pelo lock da fila."""
+
+    def __init__(self, queue: WaitQueue, n: int):
+        self.queue = queue
+        self.free = n
+
+    def attempt(self, now):
+        if self.free == 0:
+            return None
+        self.free -= 1
+        return 0.0
+
+    def release(self):
+        with self.queue.lock:
+            self.free += 1
+            self.queue.notify()
+
+
+class TestWaitQueue:
+    def test_enters_immediately_when_attempt_succeeds(self):
+        queue = WaitQueue()
+
+        assert queue.wait_turn(lambda now: 0.0) == 0.0
+        assert len(queue) == 0
+
+    def test_times_out_and_leaves_queue(self):
+        queue = WaitQueue()
+
+        start = time.monotonic()
+        assert queue.wait_turn(lambda now: None, timeout=0.05) is None
+        assert 0.04 <= time.monotonic() - start < 0.5
+        assert len(queue) == 0
+
+    def test_head_retries_after_returned_wait(self):
+        queue = WaitQueue()
+        ready_at = time.monotonic() + 0.05
+
+        waited = queue.wait_turn(lambda now: 0.0 if now >= ready_at else ready_at - now)
+
+        assert waited >= 0.04
+
+    def test_threads_are_served_in_arrival_order(self):
+        queue = WaitQueue()
+        slots = Slots(queue, 0)
+        order = []
+
+        def worker(i):
+            queue.wait_turn(slots.attempt)
+            order.append(i)
+
+        threads = []
+        for i in range(5):
+            thread = threading.Thread(target=worker, args=(i,))
+            thread.start()
+            threads.append(thread)
+            while len(queue) <= i:
+                time.sleep(0.001)
+
+        for _ in range(5):
+            slots.release()
+            time.sleep(0.01)
+        for thread in threads:
+            thread.join()
+
+        assert order == [0, 1, 2, 3, 4]
+
+    def test_async_waiters_are_woken_by_notify_from_other_thread(self):
+        queue = WaitQueue()
+        slots = Slots(queue, 0)
+        attempts = []
+
+        def attempt(now):
+            attempts.append(now)
+            return slots.attempt(now)
+
+        async def main():
+            threading.Timer(0.05, slots.release).start()
+            threading.Timer(0.1, slots.release).start()
+            return await asyncio.gather(queue.await_turn(attempt), queue.await_turn(attempt))
+
+        waited = asyncio.run(main())
+
+        assert 0.04 <= waited[0] < 0.09
+        assert waited[1] >= 0.09
+        # Sem polling: o primeiro da fila tenta ao chegar, ao acordar e
+        # quando o anterior sai da fila
+        assert len(attempts) <= 5
+        assert len(queue) == 0
+        assert queue.async_waiting == 0
+
+    def test_async_timeout_cleans_up(self):
+        queue = WaitQueue()
+
+        assert asyncio.run(queue.await_turn(lambda now: None, timeout=0.05)) is None
+        assert len(queue) == 0
+        assert queue.async_waiting == 0